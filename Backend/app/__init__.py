@@ -8,32 +8,92 @@ import os
 db = SQLAlchemy()
 migrate = Migrate()
 
-def create_app():
+def create_app(test_config=None):
     # Load environment variables
     load_dotenv()
 
     # Create the Flask app
     app = Flask(__name__)
 
-    # Apply CORS with a specific origin
-    CORS(app, origins=["http://localhost:3000"])
+    # orjson-backed JSON provider (when installed) with ISO 8601 dates
+    from app.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # Apply CORS with a specific origin (pagination cursors travel in response headers)
+    CORS(app, origins=["http://localhost:3000"], expose_headers=["X-Next-Cursor"])
 
     # Load configuration from app.config
     app.config.from_object("app.config.Config")
 
+    # Allow scripts (benchmarks, tooling) to override settings such as the database URI
+    if test_config:
+        app.config.update(test_config)
+
     # Initialize database and migration support
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Keep dashboard counters in step with client/program/enrollment writes
+    from app.services.dashboard_stats import init_dashboard_stats
+    init_dashboard_stats(app)
+
+    # Keep the per-program daily enrollment buckets in step with enrollment writes
+    from app.services.enrollment_timeseries import init_enrollment_timeseries
+    init_enrollment_timeseries(app)
+
+    # Keep the client search trigram index in step with client writes
+    from app.services.client_search import init_client_search
+    init_client_search(app)
+
+    # Bump table versions on writes so GET endpoints can answer If-None-Match
+    from app.services.versioning import init_versioning
+    init_versioning(app)
+
+    # Per-process program catalog cache, invalidated through the program table version
+    from app.services.program_cache import init_program_cache
+    init_program_cache(app)
+
+    # Per-process demographic column arrays, re-extracted when client/enrollment versions change
+    from app.services.demographics import init_demographics
+    init_demographics(app)
+
+    # Per-process LRU of rendered dashboard charts
+    from app.services.charts import init_charts
+    init_charts(app)
+
+    # Per-process duplicate client scan, refreshed on a background thread
+    from app.services.client_dedupe import init_client_dedupe
+    init_client_dedupe(app)
+
+    # Process pool and on-disk store for background report jobs
+    from app.services.report_jobs import init_report_jobs
+    init_report_jobs(app)
+
+    # Per-endpoint latency, response size and SQL statement metrics
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+
+    # Record slow statements (with their plans) issued through the engine
+    from app.services.slow_queries import init_slow_queries
+    init_slow_queries(app)
+
     # Register blueprints
     from app.routes.client_routes import client_bp
     from app.routes.program_routes import program_bp
     from app.routes.enrollment_routes import enrollment_bp
     from app.routes.dashboard_routes import dashboard_bp
+    from app.routes.generate_routes import report_bp
+    from app.routes.metrics_routes import metrics_bp
+    from app.routes.debug_routes import debug_bp
+    from app.routes.analytics_routes import analytics_bp
 
     app.register_blueprint(client_bp, url_prefix="/api/clients")
     app.register_blueprint(program_bp, url_prefix="/api/programs")
     app.register_blueprint(enrollment_bp, url_prefix="/api/enrollments")
     app.register_blueprint(dashboard_bp)
+    app.register_blueprint(report_bp, url_prefix="/api/reports")
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(debug_bp)
+    app.register_blueprint(analytics_bp)
 
     return app
@@ -1,5 +1,14 @@
 import uuid
+from sqlalchemy.orm import validates
 from app import db
+from app.phone import normalize_phone
+
+# B-tree index behind exact and prefix phone lookups
+PHONE_NORMALIZED_INDEX = 'ix_client_phone_normalized'
+
+def _phone_normalized_default(context):
+    # Core inserts (bulk import, seeding) fill the column from the row's phone_number
+    return normalize_phone(context.get_current_parameters().get('phone_number'))
 
 class Client(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))  # Unique UUID for each client
@@ -8,5 +17,16 @@ class Client(db.Model):
     date_of_birth = db.Column(db.Date)
     phone_number = db.Column(db.String(15))
     address = db.Column(db.String(255))
+    # Canonical national form of phone_number ("0712345678"), computed on write
+    phone_normalized = db.Column(db.String(15), default=_phone_normalized_default)
 
     enrollments = db.relationship('Enrollment', back_populates='client', lazy=True)
+
+    __table_args__ = (
+        db.Index(PHONE_NORMALIZED_INDEX, 'phone_normalized'),
+    )
+
+    @validates('phone_number')
+    def _normalize_phone_number(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
@@ -0,0 +1,18 @@
+from app import db
+
+class ClientSearchGram(db.Model):
+    """Trigram postings for client search (see services/client_search.py).
+
+    One row per distinct trigram of a client's normalized full name ("n") or
+    phone number ("p"). No foreign key to client: postings are removed in the
+    same flush that deletes the client.
+    """
+    __tablename__ = 'client_search_gram'
+
+    gram = db.Column(db.String(3), primary_key=True)
+    client_id = db.Column(db.String(36), primary_key=True)
+    field = db.Column(db.String(1), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_client_search_gram_client_id', 'client_id'),
+    )
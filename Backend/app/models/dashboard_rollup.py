@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+class DashboardRollup(db.Model):
+    """Pre-aggregated dashboard counters, one row per metric.
+
+    Metrics are "clients", "programs", "enrollments" and "program:<id>" for the
+    per-program enrollment distribution. The "__reconciled__" row records when
+    the counters were last recomputed from the base tables.
+    """
+    __tablename__ = 'dashboard_rollup'
+
+    metric = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DashboardRollup {self.metric}={self.value}>'
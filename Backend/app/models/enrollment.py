@@ -1,5 +1,8 @@
 from app import db
 
+# Name of the composite unique index on (client_id, program_id)
+UNIQUE_ENROLLMENT_INDEX = 'uq_enrollment_client_program'
+
 class Enrollment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.String(36), db.ForeignKey('client.id'), nullable=False)
@@ -8,3 +11,17 @@ class Enrollment(db.Model):
 
     client = db.relationship('Client', back_populates='enrollments')
     program = db.relationship('Program', back_populates='enrollments')
+
+    __table_args__ = (
+        db.Index(UNIQUE_ENROLLMENT_INDEX, 'client_id', 'program_id', unique=True),
+        db.Index('ix_enrollment_program_id', 'program_id'),
+    )
+
+
+def is_duplicate_enrollment(error):
+    """Check whether an IntegrityError came from the (client_id, program_id) unique index"""
+    orig = getattr(error, 'orig', error)
+    message = str(orig)
+    if UNIQUE_ENROLLMENT_INDEX in message:
+        return True  # MySQL: Duplicate entry ... for key 'enrollment.uq_enrollment_client_program'
+    return 'UNIQUE constraint failed: enrollment.client_id, enrollment.program_id' in message  # SQLite
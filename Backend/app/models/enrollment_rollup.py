@@ -0,0 +1,20 @@
+from app import db
+
+class EnrollmentDailyRollup(db.Model):
+    """Enrollments per program per enrollment_date, maintained incrementally.
+
+    Week and month series are answered by summing these day buckets.
+    Enrollments without an enrollment_date are not counted.
+    """
+    __tablename__ = 'enrollment_daily_rollup'
+
+    program_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_enrollment_daily_rollup_day', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<EnrollmentDailyRollup program={self.program_id} {self.day}={self.count}>'
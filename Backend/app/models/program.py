@@ -4,6 +4,13 @@ from datetime import datetime
 # Enum or constants for valid status values
 VALID_STATUSES = ["Active", "Inactive", "Pending"]
 
+# Composite index behind the default "live rows" scope:
+# WHERE is_deleted = false [AND status = ?] [ORDER BY name]
+LIVE_PROGRAM_INDEX = 'ix_program_is_deleted_status_name'
+# Live rows in primary-key order, the default listing order:
+# WHERE is_deleted = false ORDER BY id
+LIVE_PROGRAM_ID_INDEX = 'ix_program_is_deleted_id'
+
 class Program(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
@@ -11,15 +18,25 @@ class Program(db.Model):
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     status = db.Column(db.String(50), nullable=False, default="Active")  # Status field
-    is_deleted = db.Column(db.Boolean, default=False)  # Soft delete flag
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # Soft delete flag
     deleted_at = db.Column(db.DateTime, nullable=True)  # Soft deletion timestamp (optional)
     
     # Relationship to Enrollment model
     enrollments = db.relationship('Enrollment', back_populates='program', lazy=True)
 
+    __table_args__ = (
+        db.Index(LIVE_PROGRAM_INDEX, 'is_deleted', 'status', 'name'),
+        db.Index(LIVE_PROGRAM_ID_INDEX, 'is_deleted', 'id'),
+    )
+
     def __repr__(self):
         return f'<Program {self.name}>'
 
+    @classmethod
+    def live(cls):
+        """Default read scope: programs that have not been soft-deleted"""
+        return cls.is_deleted == db.false()
+
     @staticmethod
     def valid_status(status):
         """Check if the status is valid"""
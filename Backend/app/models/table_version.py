@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class TableVersion(db.Model):
+    """Monotonic per-table write counter used to build ETags (see services/versioning.py)"""
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
@@ -0,0 +1,93 @@
+import base64
+import json
+import math
+import threading
+import time
+
+
+# Opaque cursor helpers for keyset pagination.
+# A cursor wraps the sort key(s) of the last row a client has seen so the next
+# page can resume with "WHERE key > :last" instead of an OFFSET scan.
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the decoded cursor values, or None if the cursor is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+
+
+def clamp_limit(limit, default, maximum):
+    if limit is None or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def keyset_page(query, key_column, cursor, limit):
+    """Fetch one page of `query` ordered on `key_column` starting after/before a cursor.
+
+    Cursors are ["n", key] (rows after key) or ["p", key] (rows before key),
+    with a str or int key. Returns (rows, next_cursor, prev_cursor); raises
+    ValueError on a bad cursor.
+    """
+    direction, key = "n", None
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if not isinstance(decoded, list) or len(decoded) != 2 or decoded[0] not in ("n", "p"):
+            raise ValueError("Invalid cursor.")
+        direction, key = decoded
+        if isinstance(key, bool) or not isinstance(key, (str, int)):
+            raise ValueError("Invalid cursor.")
+
+    key_name = key_column.key
+    if direction == "n":
+        if key is not None:
+            query = query.filter(key_column > key)
+        rows = query.order_by(key_column).limit(limit + 1).all()
+        has_next, has_prev = len(rows) > limit, key is not None
+        rows = rows[:limit]
+    else:
+        rows = query.filter(key_column < key).order_by(key_column.desc()).limit(limit + 1).all()
+        has_next, has_prev = True, len(rows) > limit
+        rows = rows[:limit][::-1]
+
+    next_cursor = encode_cursor(["n", getattr(rows[-1], key_name)]) if rows and has_next else None
+    prev_cursor = encode_cursor(["p", getattr(rows[0], key_name)]) if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
+
+
+# Per-process cache of COUNT(*) results for filtered listings, so cursor
+# pages do not recount the table on every request.
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def cached_count(key, query, ttl):
+    now = time.monotonic()
+    with _count_cache_lock:
+        hit = _count_cache.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+    count = query.order_by(None).count()
+    with _count_cache_lock:
+        _count_cache[key] = (count, now + ttl)
+    return count
+
+
+def paginate_rows(query, page, per_page):
+    """OFFSET pagination for column queries, matching paginate(error_out=False)"""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    total = query.order_by(None).count()
+    return {
+        "items": items,
+        "total": total,
+        "pages": math.ceil(total / per_page) if total else 0,
+        "page": page
+    }
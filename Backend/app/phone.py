@@ -0,0 +1,64 @@
+import re
+
+# Country calling code assumed for numbers written in national format
+DEFAULT_COUNTRY_CODE = "254"
+
+# National significant number length (without the trunk "0")
+NATIONAL_NUMBER_LENGTH = 9
+
+NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_phone(value):
+    """Return a phone number in national format ("0712345678"), or None if it has too few digits.
+
+    Spaces, dashes, brackets, a leading "+"/"00" and the country code are
+    dropped, so "+254 712 345 678", "0712-345678" and "712345678" all
+    normalize to the same value. Numbers of other lengths keep their digits.
+    """
+    if not value:
+        return None
+    digits = NON_DIGITS.sub("", str(value))
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) == len(DEFAULT_COUNTRY_CODE) + NATIONAL_NUMBER_LENGTH:
+        digits = digits[len(DEFAULT_COUNTRY_CODE):]
+    if len(digits) == NATIONAL_NUMBER_LENGTH:
+        digits = "0" + digits
+    return digits if len(digits) >= 7 else None
+
+
+# Queries made only of digits and phone punctuation, e.g. "+254 712-345", "(0712) 345678"
+PHONE_QUERY = re.compile(r"^\+?[\d\s().-]+$")
+
+# Fewer digits than this is not treated as a phone number
+MIN_QUERY_DIGITS = 4
+
+
+def phone_query(query):
+    """Return (normalized value, exact) for a phone-shaped search query, else None.
+
+    Complete numbers are matched exactly. Partial numbers are matched as a
+    prefix of the normalized value when their start is unambiguous (a
+    trunk "0" or the country code); other digit strings return None and are
+    left to substring search. Callers should fall back to substring search
+    when an exact lookup finds nothing (digit-only id prefixes look like
+    phone numbers too).
+    """
+    query = (query or "").strip()
+    if not PHONE_QUERY.match(query):
+        return None
+    digits = NON_DIGITS.sub("", query)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) < MIN_QUERY_DIGITS:
+        return None
+
+    # A country code followed by less than a full national number is partial
+    if digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) < len(DEFAULT_COUNTRY_CODE) + NATIONAL_NUMBER_LENGTH:
+        return "0" + digits[len(DEFAULT_COUNTRY_CODE):], False
+    if len(digits) > NATIONAL_NUMBER_LENGTH or (len(digits) == NATIONAL_NUMBER_LENGTH and digits[0] != "0"):
+        return normalize_phone(digits), True
+    if digits.startswith("0"):
+        return digits, False
+    return None
@@ -0,0 +1,63 @@
+# routes/analytics_routes.py
+
+from datetime import date, datetime
+
+from flask import Blueprint, jsonify, request
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.services.demographics import get_demographics_cache, AGE_BANDS, GENDERS
+from app.services.program_cache import get_program_cache
+from app.services.versioning import conditional_get
+
+
+analytics_bp = Blueprint('analytics', __name__)
+
+# Age band x gender pivots for clients, and per program for enrollments.
+# Ages are computed on ?as_of=YYYY-MM-DD (default today); ?program_id=1,2
+# limits the program breakdown. counts[band][gender] follow ageBands/genders.
+# Enrollments in soft-deleted programs are left out unless ?include_deleted=true.
+@analytics_bp.route('/api/analytics/demographics', methods=['GET'])
+@conditional_get(Client, Program, Enrollment, extra=lambda: date.today().isoformat())  # ages move daily
+def get_demographics():
+    try:
+        as_of = datetime.strptime(request.args['as_of'], "%Y-%m-%d").date() if request.args.get('as_of') else date.today()
+    except ValueError:
+        return jsonify({"error": "Invalid as_of format. Use YYYY-MM-DD."}), 400
+
+    program_ids = None
+    if request.args.get('program_id'):
+        try:
+            program_ids = {int(p) for p in request.args['program_id'].split(',') if p.strip()}
+        except ValueError:
+            return jsonify({"error": "program_id must be a comma-separated list of integers."}), 400
+
+    include_deleted = request.args.get('include_deleted', '').lower() == 'true'
+    summary, version = get_demographics_cache().get(as_of, include_deleted)
+
+    cache = get_program_cache()
+    programs = []
+    for entry in summary["enrollments"]["programs"]:
+        if program_ids is not None and entry["programId"] not in program_ids:
+            continue
+        program = cache.get(entry["programId"])
+        if program is not None and program.is_deleted and not include_deleted:
+            continue
+        programs.append(dict(entry, programName=program.name if program else None))
+
+    return jsonify({
+        "asOf": as_of.isoformat(),
+        "ageBands": list(AGE_BANDS),
+        "genders": list(GENDERS),
+        "clients": summary["clients"],
+        "enrollments": {
+            "total": summary["enrollments"]["total"],
+            "programs": programs
+        },
+        "dataVersion": {"client": version[0], "enrollment": version[1], "program": version[2]}
+    }), 200
+
+# Extraction/result cache counters for the demographics arrays
+@analytics_bp.route('/api/analytics/cache/stats', methods=['GET'])
+def get_analytics_cache_stats():
+    return jsonify(get_demographics_cache().stats())
@@ -1,6 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm import selectinload, load_only
 from app import db
 from app.models.client import Client
+from app.models.enrollment import Enrollment
+from app.models.program import Program
+from app.pagination import keyset_page, cached_count, clamp_limit, paginate_rows
+from app.serialization import CLIENT_PROJECTION
+from app.services import client_search, client_import, client_dedupe
+from app.services.dashboard_stats import counter, CLIENTS
+from app.services.versioning import conditional_get
 from datetime import datetime
 
 client_bp = Blueprint("client", __name__)
@@ -13,11 +21,16 @@ def create_client():
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Missing required fields."}), 400
 
+    try:
+        date_of_birth = datetime.strptime(data["date_of_birth"], "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date_of_birth format. Use YYYY-MM-DD."}), 400
+
     try:
         client = Client(
             full_name=data["full_name"],
             gender=data["gender"],
-            date_of_birth=data["date_of_birth"],  # Make sure this is ISO (e.g. "1990-06-15")
+            date_of_birth=date_of_birth,
             phone_number=data.get("phone_number"),
             address=data.get("address")
         )
@@ -30,55 +43,247 @@ def create_client():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Helper function to serialize a client
-def serialize_client(client):
-    return {
-        "id": client.id,
-        "full_name": client.full_name,
-        "gender": client.gender,
-        "date_of_birth": client.date_of_birth.isoformat() if client.date_of_birth else None,
-        "phone_number": client.phone_number,
-        "address": client.address
-    }
+# BULK import clients from a CSV or NDJSON upload (raw body or multipart "file")
+@client_bp.route("/bulk", methods=["POST"])
+def bulk_import_clients():
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    filename = upload.filename if upload else ""
+    content_type = (upload.mimetype if upload else request.mimetype) or ""
+
+    fmt = request.args.get("format", "")
+    if not fmt:
+        if "ndjson" in content_type or filename.endswith((".ndjson", ".jsonl")):
+            fmt = "ndjson"
+        elif "csv" in content_type or filename.endswith(".csv"):
+            fmt = "csv"
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "Unsupported format. Upload CSV or NDJSON."}), 415
+
+    records = client_import.iter_csv(stream) if fmt == "csv" else client_import.iter_ndjson(stream)
+
+    try:
+        report = client_import.import_clients(records)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(report), 201 if report["inserted"] else 400
+
+# Helper function to serialize a client (optionally restricted to ?fields= names)
+def serialize_client(client, fields=None):
+    return CLIENT_PROJECTION.serialize_object(client, fields)
 
 # READ all or filtered clients with pagination
 @client_bp.route("/", methods=["GET"])
+@conditional_get(Client)
 def get_clients():
     query = request.args.get('q', '', type=str)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('limit', 10, type=int)
 
-    base_query = Client.query
+    try:
+        fields = CLIENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Opt-in keyset pagination: ?cursor= (empty for the first page)
+    if 'cursor' in request.args:
+        if query:
+            return jsonify({"error": "Cursor pagination does not support 'q'; use /api/clients/search."}), 400
+        try:
+            clients, next_cursor, prev_cursor = keyset_page(
+                CLIENT_PROJECTION.query(fields), Client.id, request.args['cursor'], clamp_limit(per_page, 10, 100)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Total comes from the maintained dashboard counter instead of COUNT(*)
+        total = counter(CLIENTS)
+        if total is None:
+            total = cached_count("clients", Client.query, current_app.config["COUNT_CACHE_TTL"])
+
+        return jsonify({
+            "clients": CLIENT_PROJECTION.serialize_rows(clients, fields),
+            "total": total,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
+        })
+
     if query:
-        base_query = base_query.filter(
-            (Client.full_name.ilike(f"%{query}%")) |
-            (Client.phone_number.ilike(f"%{query}%"))
-        )
+        # Substring search goes through the trigram index instead of ilike('%q%');
+        # phone-shaped queries use the normalized phone index
+        pagination = client_search.paginate(query, page, per_page)
+        return jsonify({
+            "clients": [serialize_client(c, fields) for c in pagination["items"]],
+            "total": pagination["total"],
+            "pages": pagination["pages"],
+            "current_page": pagination["page"]
+        })
+
+    # Only the requested columns are selected, as row tuples
+    pagination = paginate_rows(CLIENT_PROJECTION.query(fields), page, per_page)
+
+    return jsonify({
+        "clients": CLIENT_PROJECTION.serialize_rows(pagination["items"], fields),
+        "total": pagination["total"],
+        "pages": pagination["pages"],
+        "current_page": pagination["page"]
+    })
+
+# Upper bound on ids resolved by one batch lookup
+MAX_BATCH_IDS = 5000
+
+def batch_lookup(ids, fields):
+    # Deduplicate (keeping request order) and resolve with one IN query
+    ids = list(dict.fromkeys(str(client_id).strip() for client_id in ids if client_id is not None))
+    ids = [client_id for client_id in ids if client_id]
+    if not ids:
+        return jsonify({"error": "Provide at least one client id."}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({"error": f"At most {MAX_BATCH_IDS} ids per request."}), 400
+
+    rows = CLIENT_PROJECTION.query(fields).filter(Client.id.in_(ids)).all()
+    to_dict = CLIENT_PROJECTION.row_serializer(fields)
+    found = {row.id: to_dict(row) for row in rows}
+
+    return jsonify({
+        "clients": found,
+        "missing": [client_id for client_id in ids if client_id not in found]
+    }), 200
 
-    pagination = base_query.paginate(page=page, per_page=per_page, error_out=False)
+# READ many clients by id: ?ids=a,b,c
+@client_bp.route("/batch", methods=["GET"])
+@conditional_get(Client)
+def get_clients_batch():
+    try:
+        fields = CLIENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return batch_lookup(request.args.get('ids', '').split(','), fields)
+
+# READ many clients by id from a JSON body: {"ids": [...], "fields": [...]}
+@client_bp.route("/batch", methods=["POST"])
+def post_clients_batch():
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    if not isinstance(ids, list):
+        return jsonify({"error": "ids must be a list."}), 400
+
+    fields = data.get("fields")
+    if isinstance(fields, list):
+        fields = ",".join(str(field) for field in fields)
+    try:
+        fields = CLIENT_PROJECTION.parse_fields(fields or request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return batch_lookup(ids, fields)
+
+# READ likely duplicate clients, grouped: ?min_score=0.8&limit=50&offset=0.
+# Groups come from a cached blocking-key scan of the whole table (see
+# services/client_dedupe.py); while a fresh scan is still running the
+# response is 202 with its progress.
+@client_bp.route("/duplicates", methods=["GET"])
+@conditional_get(Client)
+def get_duplicate_clients():
+    min_score = request.args.get('min_score', client_dedupe.DEFAULT_MIN_SCORE, type=float)
+    if not client_dedupe.MIN_SCORE <= min_score <= 1:
+        return jsonify({"error": f"min_score must be between {client_dedupe.MIN_SCORE} and 1."}), 400
+    limit = clamp_limit(request.args.get('limit', 50, type=int), 50, 200)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    try:
+        scan, progress = client_dedupe.get_duplicate_scanner().get()
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 500
+    if scan is None:
+        response = jsonify({"status": "scanning", "scan": progress})
+        response.headers["Retry-After"] = "5"
+        return response, 202
+
+    groups = scan.groups(min_score)
+    page = groups[offset:offset + limit]
+    ids = {client_id for group in page for client_id in group["client_ids"]}
+    fields = CLIENT_PROJECTION.parse_fields(None)
+    to_dict = CLIENT_PROJECTION.row_serializer(fields)
+    clients = {}
+    if ids:
+        clients = {row.id: to_dict(row) for row in CLIENT_PROJECTION.query(fields).filter(Client.id.in_(ids))}
 
     return jsonify({
-        "clients": [serialize_client(c) for c in pagination.items],
-        "total": pagination.total,
-        "pages": pagination.pages,
-        "current_page": pagination.page
+        "groups": [{**group, "clients": [clients[i] for i in group["client_ids"] if i in clients]} for group in page],
+        "total": len(groups),
+        "offset": offset,
+        "limit": limit,
+        "scan": scan.stats()
     })
 
+# MERGE duplicates into this client: {"duplicate_ids": [...]}
+@client_bp.route("/<string:client_id>/merge", methods=["POST"])
+def merge_clients(client_id):
+    data = request.get_json(silent=True) or {}
+    duplicate_ids = data.get("duplicate_ids")
+    if not isinstance(duplicate_ids, list):
+        return jsonify({"error": "duplicate_ids must be a list."}), 400
+
+    try:
+        summary = client_dedupe.merge_clients(client_id, duplicate_ids)
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"message": "Clients merged successfully!", **summary})
+
 # READ a single client
 @client_bp.route("/<string:client_id>/", methods=["GET"])
+@conditional_get(Client)
 def get_client(client_id):
-    client = Client.query.get(client_id)
+    try:
+        fields = CLIENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    client = CLIENT_PROJECTION.query(fields).filter(Client.id == client_id).first()
     if not client:
         return jsonify({"error": "Client not found"}), 404
 
-    return jsonify({
-        "id": client.id,
-        "full_name": client.full_name,
-        "gender": client.gender,
-        "date_of_birth": client.date_of_birth.isoformat() if client.date_of_birth else None,
-        "phone_number": client.phone_number,
-        "address": client.address
-    })
+    return jsonify(CLIENT_PROJECTION.row_serializer(fields)(client))
+
+# READ a client with their enrollments and program names (ClientDetails page).
+# Two statements: the client, then its enrollments joined to their programs
+# (selectin + joined eager loading instead of a lazy load per enrollment).
+@client_bp.route("/<string:client_id>/profile", methods=["GET"])
+@conditional_get(Client, Program, Enrollment)
+def get_client_profile(client_id):
+    client = (
+        Client.query
+        .options(
+            selectinload(Client.enrollments)
+            .joinedload(Enrollment.program)
+            .options(load_only(Program.name, Program.status, Program.is_deleted))
+        )
+        .filter(Client.id == client_id)
+        .first()
+    )
+    if not client:
+        return jsonify({"error": "Client not found"}), 404
+
+    enrollments = sorted(client.enrollments, key=lambda e: (e.enrollment_date is None, e.enrollment_date, e.id))
+    profile = serialize_client(client)
+    profile["enrollments"] = [
+        {
+            "id": enrollment.id,
+            "program_id": enrollment.program_id,
+            "program_name": enrollment.program.name,
+            "program_status": enrollment.program.status,
+            "program_is_deleted": enrollment.program.is_deleted,
+            "enrollment_date": enrollment.enrollment_date
+        } for enrollment in enrollments
+    ]
+    return jsonify(profile)
 
 # UPDATE client
 @client_bp.route("/<string:client_id>/", methods=["PUT"])
@@ -102,7 +307,7 @@ def update_client(client_id):
     return jsonify({"message": "Client updated successfully!"})
 
 # DELETE client
-@client_bp.route("/<int:client_id>/", methods=["DELETE"])
+@client_bp.route("/<string:client_id>/", methods=["DELETE"])
 def delete_client(client_id):
     client = Client.query.get(client_id)
     if not client:
@@ -113,21 +318,16 @@ def delete_client(client_id):
     return jsonify({"message": "Client deleted successfully!"})
     
 @client_bp.route('/search', methods=['GET'])
+@conditional_get(Client)
 def search_clients():
     query = request.args.get('q', '')
+    limit = request.args.get('limit', client_search.DEFAULT_RESULT_LIMIT, type=int)
+    try:
+        fields = CLIENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    results = Client.query.filter(
-        (Client.id.ilike(f"%{query}%")) |
-        (Client.full_name.ilike(f"%{query}%")) |
-        (Client.phone_number.ilike(f"%{query}%"))
-    ).all()
-
-    return jsonify([{
-        'id': c.id,
-        'full_name': c.full_name,
-        'gender': c.gender,
-        'date_of_birth': c.date_of_birth.isoformat() if c.date_of_birth else None,
-        'phone_number': c.phone_number,
-        'address': c.address
-    } for c in results])
+    # Ranked, capped results from the trigram index (name, phone) and id prefix
+    results = client_search.search(query, limit)
 
+    return jsonify([serialize_client(c, fields) for c in results])
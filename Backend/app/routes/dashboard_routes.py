@@ -1,48 +1,153 @@
 # routes/dashboard_routes.py
 
-from flask import Blueprint, jsonify
-from app import db
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, Response, jsonify, current_app, request
 from app.models.enrollment import Enrollment
 from app.models.client import Client
 from app.models.program import Program
+from app.services.dashboard_stats import snapshot, reconcile_marker
+from app.services.versioning import conditional_get, data_version
+from app.services.program_cache import get_program_cache
+from app.services import charts, enrollment_timeseries
 
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/api/dashboard', methods=['GET'])
+@conditional_get(Client, Program, Enrollment, extra=reconcile_marker)
 def get_dashboard_data():
     try:
-        # Total counts
-        total_programs = Program.query.count()
-        total_clients = Client.query.count()
-        total_enrollments = Enrollment.query.count()
-
-        # Enrollment distribution by program
-        enrollment_distribution = (
-            db.session.query(
-                Program.name.label('program_name'),
-                db.func.count(Enrollment.id).label('enrollment_count')
-            )
-            .join(Enrollment, Enrollment.program_id == Program.id)
-            .group_by(Program.name)
-            .all()
-        )
+        # Totals and per-program distribution come from the pre-aggregated
+        # rollup table (see services/dashboard_stats.py), not from COUNT(*) scans
+        return jsonify(snapshot()), 200
 
-        enrollment_data = [
-            {
-                "programName": item.program_name,
-                "enrollmentCount": item.enrollment_count
-            }
-            for item in enrollment_distribution
-        ]
-
-        return jsonify({
-            "totalPrograms": total_programs,
-            "totalClients": total_clients,
-            "totalEnrollments": total_enrollments,
-            "enrollmentData": enrollment_data
-        }), 200
-
-    except Exception as e:
-        print(f"Dashboard fetch error: {e}")
+    except Exception:
+        current_app.logger.exception("Dashboard fetch error")
         return jsonify({"message": "Failed to load dashboard data"}), 500
+
+# Enrollments per program per day/week/month, summed from the daily rollup:
+# ?interval=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD&program_id=1,2
+# (defaults: day buckets over the last TIMESERIES_DEFAULT_DAYS days, all programs)
+TIMESERIES_DEFAULT_DAYS = 90
+
+def parse_timeseries_args(args):
+    """Return ((start, end, interval, program_ids), error) from timeseries/trend query args"""
+    interval = args.get('interval', 'day')
+    try:
+        end = datetime.strptime(args['end'], "%Y-%m-%d").date() if args.get('end') else date.today()
+        start = (
+            datetime.strptime(args['start'], "%Y-%m-%d").date() if args.get('start')
+            else end - timedelta(days=TIMESERIES_DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        return None, "Invalid start or end format. Use YYYY-MM-DD."
+    except OverflowError:  # the default start would fall before 0001-01-01
+        return None, "start is out of range."
+    if start > end:
+        return None, "start must not be after end."
+
+    program_ids = None
+    if args.get('program_id'):
+        try:
+            program_ids = [int(p) for p in args['program_id'].split(',') if p.strip()]
+        except ValueError:
+            return None, "program_id must be a comma-separated list of integers."
+    return (start, end, interval, program_ids), None
+
+
+def timeseries_payload(start, end, interval, program_ids):
+    """Per-program counts and totals for the range; raises ValueError like series()"""
+    counts, buckets = enrollment_timeseries.series(start, end, interval, program_ids)
+
+    cache = get_program_cache()
+    series = []
+    for program_id in sorted(counts):
+        program = cache.get(program_id)
+        series.append({
+            "programId": program_id,
+            "programName": program.name if program else None,
+            "counts": counts[program_id],
+            "total": sum(counts[program_id])
+        })
+
+    return {
+        "interval": interval,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [bucket.isoformat() for bucket in buckets],
+        "series": series,
+        "totals": [sum(column) for column in zip(*(s["counts"] for s in series))] or [0] * len(buckets)
+    }, buckets
+
+
+@dashboard_bp.route('/api/dashboard/timeseries', methods=['GET'])
+@conditional_get(Program, Enrollment, extra=lambda: date.today().isoformat())  # default range moves daily
+def get_enrollment_timeseries():
+    params, error = parse_timeseries_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        payload, _ = timeseries_payload(*params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(payload), 200
+
+# Server-rendered charts (cached per data version, see services/charts.py):
+#   /api/dashboard/charts/distribution.png|svg  enrollments per program (?top=)
+#   /api/dashboard/charts/trend.png|svg         enrollments over time, same
+#                                               arguments as /timeseries
+# plus ?width=&height= in pixels.
+CHART_KINDS = ("distribution", "trend")
+CHART_DEFAULT_SIZE = (800, 400)
+
+
+def chart_marker():
+    # Distribution counts change on reconcile; rolling trend ranges change daily
+    marker = reconcile_marker()
+    return f"{marker}|{date.today().isoformat()}" if marker else None
+
+
+@dashboard_bp.route('/api/dashboard/charts/<string:kind>.<string:fmt>', methods=['GET'])
+@conditional_get(Program, Enrollment, extra=chart_marker)
+def get_dashboard_chart(kind, fmt):
+    if kind not in CHART_KINDS:
+        return jsonify({"error": "Unknown chart. Use distribution or trend."}), 404
+    if fmt not in charts.CHART_FORMATS:
+        return jsonify({"error": "Unsupported format. Use png or svg."}), 404
+
+    width = min(max(request.args.get('width', CHART_DEFAULT_SIZE[0], type=int), charts.MIN_SIZE), charts.MAX_SIZE)
+    height = min(max(request.args.get('height', CHART_DEFAULT_SIZE[1], type=int), charts.MIN_SIZE), charts.MAX_SIZE)
+
+    if kind == "distribution":
+        top = min(max(request.args.get('top', charts.DISTRIBUTION_TOP, type=int), 1), 50)
+        if reconcile_marker() is None:
+            snapshot()  # reconciles the counters before they are cached against a marker
+        key = (kind, fmt, width, height, top, reconcile_marker(), data_version(Program, Enrollment))
+
+        def render():
+            return charts.render_distribution(snapshot()["enrollmentData"], fmt, width, height, top)
+    else:
+        params, error = parse_timeseries_args(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+        start, end, interval, program_ids = params
+        key = (kind, fmt, width, height, start, end, interval, tuple(sorted(program_ids or ())),
+               data_version(Program, Enrollment))
+
+        def render():
+            payload, buckets = timeseries_payload(start, end, interval, program_ids)
+            return charts.render_trend(buckets, payload["series"], payload["totals"], interval, fmt, width, height)
+
+    try:
+        # series() rejects bad intervals and over-long ranges; nothing is cached then
+        body = charts.get_chart_cache().get_or_render(key, render)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(body, mimetype=charts.CHART_FORMATS[fmt])
+
+# Chart cache counters for this worker
+@dashboard_bp.route('/api/dashboard/charts/stats', methods=['GET'])
+def get_chart_cache_stats():
+    return jsonify(charts.get_chart_cache().stats()), 200
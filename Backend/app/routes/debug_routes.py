@@ -0,0 +1,32 @@
+# routes/debug_routes.py
+
+from flask import Blueprint, jsonify, request
+from app.pagination import clamp_limit
+from app.services.slow_queries import get_slow_query_log
+
+
+debug_bp = Blueprint('debug', __name__)
+
+SLOW_QUERY_SORTS = ("max", "total", "count")
+
+# Worst captured statements (this worker's ring buffer), grouped by SQL text
+@debug_bp.route('/api/debug/slow-queries', methods=['GET'])
+def get_slow_queries():
+    sort = request.args.get('sort', 'max')
+    if sort not in SLOW_QUERY_SORTS:
+        return jsonify({"error": "Unsupported sort. Use max, total or count."}), 400
+    limit = clamp_limit(request.args.get('limit', type=int), 20, 200)
+
+    slow_log = get_slow_query_log()
+    return jsonify({
+        "threshold_ms": slow_log.threshold * 1000,
+        "captured": slow_log.captured,
+        "buffered": len(slow_log.entries),
+        "offenders": slow_log.offenders(sort, limit)
+    }), 200
+
+# Empty the ring buffer (the JSONL file is left untouched)
+@debug_bp.route('/api/debug/slow-queries', methods=['DELETE'])
+def clear_slow_queries():
+    get_slow_query_log().clear()
+    return jsonify({"message": "Slow query buffer cleared."}), 200
@@ -1,12 +1,31 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models.enrollment import Enrollment
+from app.models.enrollment import Enrollment, is_duplicate_enrollment
 from app.models.client import Client
 from app.models.program import Program
+from app.pagination import encode_cursor, decode_cursor, clamp_limit
+from app.streaming import stream_response, STREAM_FORMATS
+from app.serialization import ENROLLMENT_PROJECTION
+from app.services.versioning import conditional_get
+from app.services.program_cache import get_program_cache
+from app.services import bulk_enrollment
+from datetime import datetime
+import uuid
 
 enrollment_bp = Blueprint("enrollment", __name__)
 
+# Reads cover enrollments in live (not soft-deleted) programs unless ?include_deleted=true
+def live_enrollment_filters():
+    if request.args.get('include_deleted', '').lower() == 'true':
+        return []
+    return [Enrollment.program_id.in_(db.select(Program.id).where(Program.live()))]
+
+def live_program(program_id):
+    """Cached program for an id, or None if it does not exist or was soft-deleted"""
+    program = get_program_cache().get(program_id)
+    return program if program and not program.is_deleted else None
+
 # CREATE enrollment
 @enrollment_bp.route('/create', methods=['POST'])
 def create_enrollment():
@@ -18,20 +37,23 @@ def create_enrollment():
 
     # Check if client and program exist
     client = Client.query.get(data['client_id'])
-    program = Program.query.get(data['program_id'])
+    program = live_program(data['program_id'])
 
     if not client or not program:
         return jsonify({'error': 'Client or Program not found.'}), 404
 
-    # Check if client is already enrolled in the program
-    existing_enrollment = Enrollment.query.filter_by(client_id=data['client_id'], program_id=data['program_id']).first()
-    if existing_enrollment:
-        return jsonify({'error': 'Client is already enrolled in this program.'}), 409
+    enrollment_date = None  # None lets the column default (today) apply
+    if data.get('enrollment_date'):
+        try:
+            enrollment_date = datetime.strptime(data['enrollment_date'], "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid enrollment_date format. Use YYYY-MM-DD.'}), 400
 
+    # Duplicates are rejected by the (client_id, program_id) unique index on insert
     enrollment = Enrollment(
         client_id=data['client_id'],
         program_id=data['program_id'],
-        enrollment_date=data.get('enrollment_date', None)  # Use provided date or default to None
+        enrollment_date=enrollment_date
     )
     
     db.session.add(enrollment)
@@ -39,36 +61,94 @@ def create_enrollment():
     try:
         db.session.commit()
         return jsonify({'message': 'Enrollment created successfully!'}), 201
-    except IntegrityError:
+    except IntegrityError as e:
         db.session.rollback()
+        if is_duplicate_enrollment(e):
+            return jsonify({'error': 'Client is already enrolled in this program.'}), 409
         return jsonify({'error': 'Invalid client_id or program_id.'}), 400
 
+# BULK enroll N clients into M programs in one transaction
+@enrollment_bp.route('/bulk', methods=['POST'])
+def bulk_create_enrollments():
+    data = request.get_json()
+    client_ids = data.get('client_ids') if data else None
+    program_ids = data.get('program_ids') if data else None
+
+    if not isinstance(client_ids, list) or not isinstance(program_ids, list) or not client_ids or not program_ids:
+        return jsonify({'error': 'client_ids and program_ids must be non-empty lists.'}), 400
+
+    try:
+        client_ids = [str(c) for c in client_ids]
+        program_ids = [int(p) for p in program_ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'program_ids must be integers.'}), 400
+
+    if len(set(client_ids)) * len(set(program_ids)) > bulk_enrollment.MAX_PAIRS:
+        return jsonify({'error': f'At most {bulk_enrollment.MAX_PAIRS} client/program pairs per request.'}), 400
+
+    enrollment_date = None
+    if data.get('enrollment_date'):
+        try:
+            enrollment_date = datetime.strptime(data['enrollment_date'], "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({'error': 'Invalid enrollment_date format. Use YYYY-MM-DD.'}), 400
+
+    try:
+        summary = bulk_enrollment.enroll(client_ids, program_ids, enrollment_date)
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_duplicate_enrollment(e):
+            # A concurrent request enrolled some of the same pairs; nothing was written
+            return jsonify({'error': 'Some enrollments were created concurrently. Retry the request.'}), 409
+        return jsonify({'error': 'Failed to create enrollments. Check input values.'}), 400
+
+    return jsonify(summary), 201 if summary['created'] else 200
+
+# List enrollments matching `filters` as projected row tuples: a JSON array by
+# default, or streamed for ?format=ndjson|json-stream (capped at ?limit= and STREAM_MAX_ROWS)
+def list_enrollments(filters):
+    try:
+        fields = ENROLLMENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    stmt = ENROLLMENT_PROJECTION.select(fields).where(*filters, *live_enrollment_filters())
+
+    fmt = request.args.get('format')
+    if fmt:
+        if fmt not in STREAM_FORMATS:
+            return jsonify({'error': 'Unsupported format. Use ndjson or json-stream.'}), 400
+        max_rows = current_app.config["STREAM_MAX_ROWS"]
+        limit = clamp_limit(request.args.get('limit', type=int), max_rows, max_rows)
+        stmt = stmt.order_by(Enrollment.id).limit(limit)
+        return stream_response(stmt, ENROLLMENT_PROJECTION.row_serializer(fields), fmt)
+
+    rows = db.session.execute(stmt).all()
+    return jsonify(ENROLLMENT_PROJECTION.serialize_rows(rows, fields)), 200
+
+
 # READ all enrollments
 @enrollment_bp.route('/', methods=['GET'])
+@conditional_get(Program, Enrollment)
 def get_all_enrollments():
-    enrollments = Enrollment.query.all()
-    return jsonify([
-        {
-            'id': e.id,
-            'client_id': e.client_id,
-            'program_id': e.program_id,
-            'enrollment_date': e.enrollment_date.isoformat() if e.enrollment_date else None
-        } for e in enrollments
-    ]), 200
+    return list_enrollments([])
 
 # READ single enrollment
 @enrollment_bp.route('/<int:enrollment_id>/', methods=['GET'])
+@conditional_get(Program, Enrollment)
 def get_enrollment(enrollment_id):
-    enrollment = Enrollment.query.get(enrollment_id)
+    try:
+        fields = ENROLLMENT_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    enrollment = db.session.execute(
+        ENROLLMENT_PROJECTION.select(fields).where(Enrollment.id == enrollment_id, *live_enrollment_filters())
+    ).first()
     if not enrollment:
         return jsonify({'error': 'Enrollment not found'}), 404
 
-    return jsonify({
-        'id': enrollment.id,
-        'client_id': enrollment.client_id,
-        'program_id': enrollment.program_id,
-        'enrollment_date': enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None
-    }), 200
+    return jsonify(ENROLLMENT_PROJECTION.row_serializer(fields)(enrollment)), 200
 
 # UPDATE enrollment
 @enrollment_bp.route('/<int:enrollment_id>/', methods=['PUT'])
@@ -88,20 +168,25 @@ def update_enrollment(enrollment_id):
 
     # Validate and update program_id if provided
     if 'program_id' in data:
-        program = Program.query.get(data['program_id'])
+        program = live_program(data['program_id'])
         if not program:
             return jsonify({'error': 'Program not found'}), 404
         enrollment.program_id = data['program_id']
 
     # Update enrollment_date if provided
     if 'enrollment_date' in data:
-        enrollment.enrollment_date = data['enrollment_date']
+        try:
+            enrollment.enrollment_date = datetime.strptime(data['enrollment_date'], "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid enrollment_date format. Use YYYY-MM-DD.'}), 400
 
     try:
         db.session.commit()
         return jsonify({'message': 'Enrollment updated successfully!'}), 200
-    except IntegrityError:
+    except IntegrityError as e:
         db.session.rollback()
+        if is_duplicate_enrollment(e):
+            return jsonify({'error': 'Client is already enrolled in this program.'}), 409
         return jsonify({'error': 'Failed to update enrollment. Check input values.'}), 400
 
 # DELETE enrollment
@@ -117,54 +202,106 @@ def delete_enrollment(enrollment_id):
 
 # SEARCH enrollments
 @enrollment_bp.route('/search', methods=['GET'])
+@conditional_get(Program, Enrollment)
 def search_enrollments():
     client_id = request.args.get('client_id')
     program_id = request.args.get('program_id')
 
-    query = Enrollment.query
+    filters = []
     if client_id:
-        query = query.filter(Enrollment.client_id == client_id)
+        filters.append(Enrollment.client_id == client_id)
     if program_id:
-        query = query.filter(Enrollment.program_id == program_id)
+        filters.append(Enrollment.program_id == program_id)
 
-    results = query.all()
-    return jsonify([
-        {
-            'id': e.id,
-            'client_id': e.client_id,
-            'program_id': e.program_id,
-            'enrollment_date': e.enrollment_date.isoformat() if e.enrollment_date else None
-        } for e in results
-    ]), 200
+    return list_enrollments(filters)
 
 # GET clients eligible for enrollment (not enrolled in all programs)
+# Resolved in a single statement: an anti-join when a program_id is given,
+# otherwise a grouped LEFT JOIN with a HAVING against the program count.
+# Results are keyset-paginated on Client.id; the next cursor is returned in
+# the X-Next-Cursor header so the response body stays a plain list.
+ELIGIBLE_DEFAULT_LIMIT = 100
+ELIGIBLE_MAX_LIMIT = 1000
+
+def is_client_id(value):
+    """Whether a cursor key is a client id (a UUID string)"""
+    if not isinstance(value, str):
+        return False
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
 @enrollment_bp.route('/eligible-clients', methods=['GET'])
+@conditional_get(Client, Program, Enrollment)
 def get_eligible_clients():
+    program_id = request.args.get('program_id', type=int)
+    cursor = request.args.get('cursor')
+    limit = clamp_limit(request.args.get('limit', type=int), ELIGIBLE_DEFAULT_LIMIT, ELIGIBLE_MAX_LIMIT)
+
+    last_id = None
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if not isinstance(decoded, list) or len(decoded) != 1 or not is_client_id(decoded[0]):
+            return jsonify({'error': 'Invalid cursor.'}), 400
+        last_id = decoded[0]
+
+    if program_id is not None and live_program(program_id) is None:
+        return jsonify({'error': 'Program not found'}), 404
+
     try:
-        programs = Program.query.all()
-        all_clients = Client.query.all()
-        eligible_clients = []
-
-        # Check for clients not enrolled in all programs
-        for client in all_clients:
-            enrolled_program_ids = {
-                e.program_id for e in Enrollment.query.filter_by(client_id=client.id).all()
-            }
-
-            if len(enrolled_program_ids) < len(programs):
-                eligible_clients.append({
-                    'id': client.id,
-                    'name': client.full_name  # Assuming 'full_name' field in Client model
-                })
-
-        return jsonify(eligible_clients), 200
-    except Exception as e:
-        return jsonify({'error': f"Failed to fetch eligible clients: {str(e)}"}), 500
-
-# GET all available programs
+        query = db.session.query(Client.id, Client.full_name)
+
+        if program_id is not None:
+            # Clients with no enrollment row for this particular program
+            query = (
+                query.outerjoin(
+                    Enrollment,
+                    db.and_(Enrollment.client_id == Client.id, Enrollment.program_id == program_id)
+                )
+                .filter(Enrollment.id.is_(None))
+            )
+        else:
+            # Eligible: not yet enrolled in every live program
+            program_count = sum(1 for program in get_program_cache().all() if not program.is_deleted)
+            query = (
+                query.outerjoin(
+                    Enrollment,
+                    db.and_(
+                        Enrollment.client_id == Client.id,
+                        Enrollment.program_id.in_(db.select(Program.id).where(Program.live()))
+                    )
+                )
+                .group_by(Client.id, Client.full_name)
+                .having(db.func.count(db.distinct(Enrollment.program_id)) < program_count)
+            )
+
+        if last_id is not None:
+            query = query.filter(Client.id > last_id)
+
+        rows = query.order_by(Client.id).limit(limit + 1).all()
+
+        eligible_clients = [
+            {
+                'id': row.id,
+                'name': row.full_name
+            } for row in rows[:limit]
+        ]
+
+        response = jsonify(eligible_clients)
+        if len(rows) > limit:
+            response.headers['X-Next-Cursor'] = encode_cursor([rows[limit - 1].id])
+        return response, 200
+    except Exception:
+        current_app.logger.exception("Eligible clients fetch error")
+        return jsonify({'error': 'Failed to fetch eligible clients.'}), 500
+
+# GET all available (live) programs
 @enrollment_bp.route('/available-programs', methods=['GET'])
+@conditional_get(Program)
 def get_available_programs():
-    programs = Program.query.all()
+    programs = [program for program in get_program_cache().all() if not program.is_deleted]
     return jsonify([
         {
             'id': program.id,
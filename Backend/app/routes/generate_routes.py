@@ -1,24 +1,191 @@
-from flask import Flask, send_file, jsonify
+import csv
 import io
+import zlib
+from datetime import datetime
 
-app = Flask(__name__)
+from flask import Blueprint, Response, request, jsonify, stream_with_context, send_file, url_for
+from werkzeug.datastructures import MultiDict
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.streaming import iter_partitions
+from app.services.report_jobs import get_report_jobs, DONE
 
-@app.route('/api/reports/generate', methods=['GET'])
+report_bp = Blueprint('reports', __name__)
+
+# Rows fetched per round trip from the server-side cursor
+REPORT_CHUNK_SIZE = 5000
+
+REPORT_COLUMNS = [
+    "Client ID", "Full Name", "Gender", "Date of Birth", "Phone Number",
+    "Program", "Program Status", "Enrollment Date"
+]
+
+
+def parse_report_filters(args):
+    """Read date-range and program filters from the query string.
+
+    Returns (filters, error); dates must be YYYY-MM-DD.
+    """
+    filters = {"program_ids": args.getlist('program_id', type=int)}
+    for field in ("start_date", "end_date"):
+        value = args.get(field)
+        if value:
+            try:
+                filters[field] = datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError:
+                return None, f"Invalid {field} format. Use YYYY-MM-DD."
+        else:
+            filters[field] = None
+    return filters, None
+
+
+def report_query(filters):
+    """client x program x enrollment join (live programs only) with the filters pushed into SQL"""
+    stmt = (
+        db.select(
+            Client.id, Client.full_name, Client.gender, Client.date_of_birth, Client.phone_number,
+            Program.name, Program.status, Enrollment.enrollment_date
+        )
+        .select_from(Enrollment)
+        .join(Client, Client.id == Enrollment.client_id)
+        .join(Program, Program.id == Enrollment.program_id)
+        .where(Program.live())
+        .order_by(Enrollment.id)
+    )
+    if filters["program_ids"]:
+        stmt = stmt.where(Enrollment.program_id.in_(filters["program_ids"]))
+    if filters["start_date"]:
+        stmt = stmt.where(Enrollment.enrollment_date >= filters["start_date"])
+    if filters["end_date"]:
+        stmt = stmt.where(Enrollment.enrollment_date <= filters["end_date"])
+    return stmt
+
+
+def iter_report_csv(filters, chunk_size=REPORT_CHUNK_SIZE, on_rows=None):
+    """Yield the report as encoded CSV, one chunk of rows per piece.
+
+    `on_rows`, when given, is called with the row count of each chunk (job progress).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_COLUMNS)
+
+    for partition in iter_partitions(report_query(filters), chunk_size):
+        for row in partition:
+            writer.writerow([
+                row[0], row[1], row[2],
+                row[3].isoformat() if row[3] else "",
+                row[4], row[5], row[6],
+                row[7].isoformat() if row[7] else ""
+            ])
+        if on_rows:
+            on_rows(len(partition))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+# Stream the enrollment report as CSV (or gzip-compressed CSV with ?gzip=true)
+@report_bp.route('/generate', methods=['GET'])
 def generate_report():
-    # Dummy CSV content
-    csv_content = "Name,Email,Program\nJohn Doe,john@example.com,Program A\nJane Smith,jane@example.com,Program B"
+    filters, error = parse_report_filters(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    chunks = iter_report_csv(filters)
+    filename = 'enrollment_report.csv'
+    mimetype = 'text/csv'
+    if request.args.get('gzip', '').lower() == 'true':
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+def job_response(status, code=200):
+    body = dict(status)
+    body["status_url"] = url_for("reports.get_report_job", job_id=status["id"])
+    body["download_url"] = url_for("reports.download_report", job_id=status["id"]) if status["state"] == DONE else None
+    return jsonify(body), code
+
 
-    # Create a bytes buffer
-    buffer = io.BytesIO()
-    buffer.write(csv_content.encode())
-    buffer.seek(0)
+# Queue the enrollment report as a background job. Filters come from a JSON
+# body ({"program_id": [...], "start_date": ..., "end_date": ...}) or the query
+# string, as for /generate. The same report over unchanged data maps to the
+# same job, so repeated submissions do not export twice.
+@report_bp.route('', methods=['POST'])
+@report_bp.route('/', methods=['POST'])
+def create_report_job():
+    data = request.get_json(silent=True)
+    if data is None:
+        args = request.args
+    elif isinstance(data, dict):
+        program_ids = data.get("program_id", data.get("program_ids", []))
+        if not isinstance(program_ids, list):
+            program_ids = [program_ids]
+        args = MultiDict(
+            [("program_id", program_id) for program_id in program_ids]
+            + [(field, data[field]) for field in ("start_date", "end_date") if data.get(field)]
+        )
+    else:
+        return jsonify({"error": "Request body must be a JSON object."}), 400
+
+    filters, error = parse_report_filters(args)
+    if error:
+        return jsonify({"error": error}), 400
+    if isinstance(data, dict) and len(filters["program_ids"]) != len(args.getlist("program_id")):
+        return jsonify({"error": "program_id must be a list of integers."}), 400
+
+    status, created = get_report_jobs().submit(filters)
+    response, code = job_response(status, 202 if status["state"] != DONE else 200)
+    response.headers["Location"] = url_for("reports.get_report_job", job_id=status["id"])
+    response.headers["X-Report-Job-Created"] = "true" if created else "false"
+    return response, code
+
+
+# Job state, progress (0-1) and rows processed
+@report_bp.route('/<string:job_id>', methods=['GET'])
+def get_report_job(job_id):
+    status = get_report_jobs().get(job_id)
+    if not status:
+        return jsonify({"error": "Report job not found"}), 404
+    return job_response(status)
+
+
+# The finished report as gzip-compressed CSV
+@report_bp.route('/<string:job_id>/download', methods=['GET'])
+def download_report(job_id):
+    jobs = get_report_jobs()
+    status = jobs.get(job_id)
+    if not status:
+        return jsonify({"error": "Report job not found"}), 404
+    if status["state"] != DONE:
+        return jsonify({"error": f"Report is not ready (state: {status['state']})."}), 409
 
     return send_file(
-        buffer,
-        mimetype='text/csv',
+        jobs.result_path(job_id),
+        mimetype='application/gzip',
         as_attachment=True,
-        download_name='enrollment_report.csv'
+        download_name='enrollment_report.csv.gz',
+        etag=job_id,
+        max_age=0
     )
-
-if __name__ == '__main__':
-    app.run(debug=True)
@@ -0,0 +1,12 @@
+# routes/metrics_routes.py
+
+from flask import Blueprint, Response
+from app.services.metrics import get_metrics_registry, CONTENT_TYPE
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Prometheus scrape target: per-endpoint latency, response size and SQL usage
+@metrics_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(get_metrics_registry().render(), mimetype=None, content_type=CONTENT_TYPE)
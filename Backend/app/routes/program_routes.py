@@ -1,22 +1,22 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.program import Program
+from app.pagination import keyset_page, cached_count, clamp_limit, paginate_rows
+from app.serialization import PROGRAM_PROJECTION
+from app.services.dashboard_stats import counter, PROGRAMS
+from app.services.versioning import conditional_get
+from app.services.program_cache import get_program_cache
 from datetime import datetime
 
 program_bp = Blueprint('programs', __name__)
 
-# Helper function to serialize a program
-def serialize_program(program):
-    return {
-        "id": program.id,
-        "name": program.name,
-        "description": program.description or "",  # Default to empty string if no description
-        "start_date": program.start_date.strftime("%Y-%m-%d"),
-        "end_date": program.end_date.strftime("%Y-%m-%d"),
-        "status": program.status or "Active",  # Ensure a default value for status if it's None
-        "is_deleted": program.is_deleted,
-        "deleted_at": program.deleted_at.strftime("%Y-%m-%d") if program.deleted_at else None
-    }
+# Reads are scoped to live (not soft-deleted) programs unless ?include_deleted=true
+def include_deleted():
+    return request.args.get('include_deleted', '').lower() == 'true'
+
+# Helper function to serialize a program (optionally restricted to ?fields= names)
+def serialize_program(program, fields=None):
+    return PROGRAM_PROJECTION.serialize_object(program, fields)
 
 # Create Program Route
 @program_bp.route("/", methods=["POST"])
@@ -51,11 +51,13 @@ def create_program():
 
     db.session.add(program)
     db.session.commit()
+    get_program_cache().invalidate()
 
     return jsonify({"message": "Program created successfully!"}), 201
 
 # Get All or Filtered Programs with Pagination
 @program_bp.route("/", methods=["GET"])
+@conditional_get(Program)
 def get_programs():
     query = request.args.get('q', '', type=str)
     page = request.args.get('page', 1, type=int)
@@ -63,33 +65,72 @@ def get_programs():
     status = request.args.get('status', '', type=str)  # Optional status filter
     is_deleted = request.args.get('is_deleted', '', type=str)  # Optional soft delete filter
 
-    base_query = Program.query
+    try:
+        fields = PROGRAM_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Only the requested columns are selected, as row tuples
+    base_query = PROGRAM_PROJECTION.query(fields)
     if query:
         base_query = base_query.filter(Program.name.ilike(f"%{query}%"))
 
     if status:
         base_query = base_query.filter(Program.status == status)
 
+    # An explicit ?is_deleted= replaces the default live-only scope
     if is_deleted:
         is_deleted = True if is_deleted.lower() == 'true' else False
         base_query = base_query.filter(Program.is_deleted == is_deleted)
+    elif not include_deleted():
+        base_query = base_query.filter(Program.live())
 
-    pagination = base_query.paginate(page=page, per_page=per_page, error_out=False)
+    # Opt-in keyset pagination: ?cursor= (empty for the first page)
+    if 'cursor' in request.args:
+        try:
+            programs, next_cursor, prev_cursor = keyset_page(
+                base_query, Program.id, request.args['cursor'], clamp_limit(per_page, 10, 100)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # The programs counter tracks live programs, i.e. the default scope
+        filters = (query, status, is_deleted, include_deleted())
+        total = counter(PROGRAMS) if not any(f not in ('', False) for f in filters) else None
+        if total is None:
+            total = cached_count(("programs",) + filters, base_query, current_app.config["COUNT_CACHE_TTL"])
+
+        return jsonify({
+            "programs": PROGRAM_PROJECTION.serialize_rows(programs, fields),
+            "total": total,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
+        })
+
+    # Primary-key order, as the unordered listing returned before; spelled out so
+    # OFFSET pages stay stable when the planner picks the live-programs index
+    pagination = paginate_rows(base_query.order_by(Program.id), page, per_page)
 
     return jsonify({
-        "programs": [serialize_program(p) for p in pagination.items],
-        "total": pagination.total,
-        "pages": pagination.pages,
-        "current_page": pagination.page
+        "programs": PROGRAM_PROJECTION.serialize_rows(pagination["items"], fields),
+        "total": pagination["total"],
+        "pages": pagination["pages"],
+        "current_page": pagination["page"]
     })
 
 # Get Program by ID
 @program_bp.route("/<int:program_id>", methods=["GET"])
+@conditional_get(Program)
 def get_program_by_id(program_id):
-    program = Program.query.get(program_id)
-    if not program:
+    try:
+        fields = PROGRAM_PROJECTION.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    program = get_program_cache().get(program_id)
+    if not program or (program.is_deleted and not include_deleted()):
         return jsonify({"error": "Program not found."}), 404
-    return jsonify(serialize_program(program))
+    return jsonify(serialize_program(program, fields))
 
 # Update Program Route
 @program_bp.route("/<int:program_id>", methods=["PUT"])
@@ -131,6 +172,7 @@ def update_program(program_id):
 
     # Commit changes to the database
     db.session.commit()
+    get_program_cache().invalidate()
 
     return jsonify({"message": "Program updated successfully!"})
 
@@ -145,16 +187,26 @@ def delete_program(program_id):
     program.deleted_at = datetime.utcnow()
 
     db.session.commit()
+    get_program_cache().invalidate()
 
     return jsonify({"message": "Program soft-deleted successfully!"})
 
 # Search Programs Route
 @program_bp.route("/search", methods=["GET"])
+@conditional_get(Program)
 def search_programs():
     query = request.args.get('q', '')
-    results = Program.query.filter(Program.name.ilike(f"%{query}%")).all()
+    programs = Program.query.filter(Program.name.ilike(f"%{query}%"))
+    if not include_deleted():
+        programs = programs.filter(Program.live())
+    results = programs.all()
     return jsonify([{
         'id': p.id,
         'name': p.name,
         'description': p.description or ""  # Default empty string for missing description
     } for p in results])
+
+# Program cache hit/miss counters
+@program_bp.route("/cache/stats", methods=["GET"])
+def get_program_cache_stats():
+    return jsonify(get_program_cache().stats())
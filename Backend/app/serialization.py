@@ -0,0 +1,95 @@
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+
+
+class Projection:
+    """Output fields of one resource mapped to the columns that produce them.
+
+    Listings select only the requested columns as row tuples (see select()/
+    row_serializer()) instead of loading ORM instances; serialize_object()
+    gives the same output for an ORM instance or snapshot. Date values are
+    left as-is for the app's JSON provider to encode. Formatters run only for
+    the fields that need them.
+    """
+
+    def __init__(self, fields, formatters=None, always=("id",)):
+        self.fields = fields
+        self.formatters = formatters or {}
+        self.always = always
+
+    def parse_fields(self, param):
+        """Turn a ?fields= value into field names; raises ValueError on unknown names"""
+        if not param:
+            return tuple(self.fields)
+        requested = [name.strip() for name in param.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}.")
+        return tuple(name for name in self.fields if name in self.always or name in requested)
+
+    def columns(self, names):
+        return [self.fields[name].label(name) for name in names]
+
+    def select(self, names):
+        return db.select(*self.columns(names))
+
+    def query(self, names):
+        return db.session.query(*self.columns(names))
+
+    def row_serializer(self, names):
+        formatters = [(name, self.formatters[name]) for name in names if name in self.formatters]
+        if not formatters:
+            return lambda row: dict(zip(names, row))
+
+        def to_dict(row):
+            data = dict(zip(names, row))
+            for name, formatter in formatters:
+                data[name] = formatter(data[name])
+            return data
+        return to_dict
+
+    def serialize_rows(self, rows, names):
+        to_dict = self.row_serializer(names)
+        return [to_dict(row) for row in rows]
+
+    def serialize_object(self, obj, names=None):
+        names = names or tuple(self.fields)
+        data = {name: getattr(obj, self.fields[name].key) for name in names}
+        for name in names:
+            if name in self.formatters:
+                data[name] = self.formatters[name](data[name])
+        return data
+
+
+CLIENT_PROJECTION = Projection({
+    "id": Client.id,
+    "full_name": Client.full_name,
+    "gender": Client.gender,
+    "date_of_birth": Client.date_of_birth,
+    "phone_number": Client.phone_number,
+    "address": Client.address,
+})
+
+PROGRAM_PROJECTION = Projection({
+    "id": Program.id,
+    "name": Program.name,
+    "description": Program.description,
+    "start_date": Program.start_date,
+    "end_date": Program.end_date,
+    "status": Program.status,
+    "is_deleted": Program.is_deleted,
+    "deleted_at": Program.deleted_at,
+}, formatters={
+    "description": lambda value: value or "",
+    "status": lambda value: value or "Active",
+    "deleted_at": lambda value: value.strftime("%Y-%m-%d") if value else None,
+})
+
+ENROLLMENT_PROJECTION = Projection({
+    "id": Enrollment.id,
+    "client_id": Enrollment.client_id,
+    "program_id": Enrollment.program_id,
+    "enrollment_date": Enrollment.enrollment_date,
+})
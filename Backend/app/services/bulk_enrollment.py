@@ -0,0 +1,95 @@
+# services/bulk_enrollment.py
+#
+# Enroll many clients into many programs in one transaction. Client and
+# program existence and already-existing enrollments are resolved with
+# set-based IN queries (chunked to stay under driver parameter limits), and
+# only the missing (client, program) pairs are inserted, in batches. Rows
+# carry an explicit enrollment_date (the database's current date by default)
+# so the time-series buckets can be updated without reading them back.
+
+from collections import Counter
+
+from app import db
+from app.models.client import Client
+from app.models.enrollment import Enrollment
+from app.services.dashboard_stats import apply_deltas, program_metric, ENROLLMENTS
+from app.services import enrollment_timeseries
+from app.services.versioning import bump
+from app.services.program_cache import get_program_cache
+
+IN_CHUNK_SIZE = 900
+INSERT_BATCH_SIZE = 2000
+MAX_PAIRS = 100_000
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(column, ids):
+    found = set()
+    for chunk in _chunks(ids, IN_CHUNK_SIZE):
+        found.update(row[0] for row in db.session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def existing_pairs(client_ids, program_ids):
+    # Both id lists are chunked so one statement binds at most IN_CHUNK_SIZE parameters
+    pairs = set()
+    for program_chunk in _chunks(program_ids, IN_CHUNK_SIZE // 2):
+        for client_chunk in _chunks(client_ids, IN_CHUNK_SIZE - len(program_chunk)):
+            rows = (
+                db.session.query(Enrollment.client_id, Enrollment.program_id)
+                .filter(Enrollment.client_id.in_(client_chunk), Enrollment.program_id.in_(program_chunk))
+            )
+            pairs.update((row.client_id, row.program_id) for row in rows)
+    return pairs
+
+
+def enroll(client_ids, program_ids, enrollment_date=None):
+    """Insert every missing (client, program) pair and commit once; return a summary"""
+    client_ids = list(dict.fromkeys(client_ids))
+    program_ids = list(dict.fromkeys(program_ids))
+
+    # One cache lookup for all ids; soft-deleted programs count as missing,
+    # as in single enrollment creation
+    programs = get_program_cache().get_many(program_ids)
+    found_programs = {p for p, program in programs.items() if program is not None and not program.is_deleted}
+    found_clients = existing_ids(Client.id, client_ids)
+    valid_programs = [p for p in program_ids if p in found_programs]
+    valid_clients = [c for c in client_ids if c in found_clients]
+
+    already = existing_pairs(valid_clients, valid_programs) if valid_clients and valid_programs else set()
+
+    connection = db.session.connection()
+    if enrollment_date is None:
+        enrollment_date = enrollment_timeseries.database_today(connection)
+
+    rows = []
+    for client_id in valid_clients:
+        for program_id in valid_programs:
+            if (client_id, program_id) not in already:
+                rows.append({"client_id": client_id, "program_id": program_id, "enrollment_date": enrollment_date})
+
+    for batch in _chunks(rows, INSERT_BATCH_SIZE):
+        connection.execute(db.insert(Enrollment), batch)
+
+    # Core inserts bypass the flush hooks; keep the dashboard counters and time series in step
+    deltas = Counter({ENROLLMENTS: len(rows)})
+    buckets = Counter()
+    for row in rows:
+        deltas[program_metric(row["program_id"])] += 1
+        buckets[(row["program_id"], enrollment_date)] += 1
+    apply_deltas(connection, deltas)
+    enrollment_timeseries.apply_deltas(connection, buckets)
+    if rows:
+        bump(connection, Enrollment.__table__.name)
+    db.session.commit()
+
+    return {
+        "created": len(rows),
+        "already_enrolled": len(already),
+        "missing_clients": [c for c in client_ids if c not in found_clients],
+        "missing_programs": [p for p in program_ids if p not in found_programs]
+    }
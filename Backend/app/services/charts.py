@@ -0,0 +1,163 @@
+# services/charts.py
+#
+# Server-side dashboard charts. Figures are drawn with matplotlib's headless
+# Agg backend through the object-oriented Figure API (no pyplot global state)
+# and the encoded PNG/SVG bytes are kept in a bounded per-process LRU cache.
+# Cache keys combine the chart kind, format and normalized parameters with
+# the data version the chart was drawn from (table versions, reconcile time,
+# today's date for rolling ranges), so a repeated view is a dictionary lookup
+# and the first view after a write renders once.
+
+import io
+import threading
+import time
+from collections import OrderedDict
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure  # noqa: E402
+
+from flask import current_app
+
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Same palette as the dashboard's chart.js pie
+PALETTE = ["#4e73df", "#1cc88a", "#36b9cc", "#f6c23e", "#e74a3b", "#858796", "#5a5c69"]
+
+# Programs shown individually in the distribution chart; the rest become "Other"
+DISTRIBUTION_TOP = 12
+
+# Program lines drawn in the trend chart next to the total
+TREND_TOP = 6
+
+MIN_SIZE, MAX_SIZE = 200, 2000
+DPI = 100
+
+
+def _figure(width, height):
+    return Figure(figsize=(width / DPI, height / DPI), dpi=DPI)
+
+
+def _encode(fig, fmt):
+    buffer = io.BytesIO()
+    # Fixed metadata keeps SVG/PNG bytes stable across renders of the same data
+    metadata = {"Date": None} if fmt == "svg" else {"Software": None}
+    fig.savefig(buffer, format=fmt, metadata=metadata)
+    return buffer.getvalue()
+
+
+def render_distribution(items, fmt, width, height, top=DISTRIBUTION_TOP):
+    """Pie of enrollments per program; items are {"programName", "enrollmentCount"} dicts"""
+    items = sorted(items, key=lambda item: item["enrollmentCount"], reverse=True)
+    shown = items[:top]
+    rest = sum(item["enrollmentCount"] for item in items[top:])
+    labels = [item["programName"] for item in shown] + (["Other"] if rest else [])
+    values = [item["enrollmentCount"] for item in shown] + ([rest] if rest else [])
+
+    fig = _figure(width, height)
+    ax = fig.add_subplot()
+    if values:
+        colors = [PALETTE[i % len(PALETTE)] for i in range(len(values))]
+        ax.pie(values, colors=colors, startangle=90, counterclock=False,
+               wedgeprops={"edgecolor": "white", "linewidth": 2})
+        total = sum(values)
+        ax.legend(
+            [f"{label} ({value / total:.1%})" for label, value in zip(labels, values)],
+            loc="center left", bbox_to_anchor=(1.0, 0.5), frameon=False, fontsize=8
+        )
+        ax.set_aspect("equal")
+    else:
+        ax.text(0.5, 0.5, "No enrollment data available.", ha="center", va="center", color="#858796")
+        ax.set_axis_off()
+    ax.set_title("Enrollment distribution")
+    fig.tight_layout()
+    return _encode(fig, fmt)
+
+
+def render_trend(buckets, series, totals, interval, fmt, width, height, top=TREND_TOP):
+    """Total enrollments per bucket, plus the busiest programs, as lines"""
+    fig = _figure(width, height)
+    ax = fig.add_subplot()
+    ax.plot(buckets, totals, color="#5a5c69", linewidth=2, label="All programs")
+    busiest = sorted(series, key=lambda s: s["total"], reverse=True)[:top]
+    for i, program in enumerate(busiest):
+        ax.plot(buckets, program["counts"], color=PALETTE[i % len(PALETTE)], linewidth=1,
+                label=program["programName"] or f"Program {program['programId']}")
+    ax.set_title(f"Enrollments per {interval}")
+    ax.set_ylabel("Enrollments")
+    ax.set_ylim(bottom=0)
+    ax.grid(axis="y", alpha=0.3)
+    ax.legend(loc="upper left", frameon=False, fontsize=8)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return _encode(fig, fmt)
+
+
+class ChartCache:
+    """Bounded LRU of rendered chart bytes"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One render at a time per process; waiters re-check the cache first
+        self._render_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+    def _lookup(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def get_or_render(self, key, render):
+        """Return cached bytes for `key`, calling render() once on a miss"""
+        body = self._lookup(key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        with self._render_lock:
+            body = self._lookup(key)
+            if body is not None:
+                self.hits += 1
+                return body
+            self.misses += 1
+            started = time.perf_counter()
+            body = render()
+            self.render_seconds += time.perf_counter() - started
+
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(body) for body in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "render_seconds": round(self.render_seconds, 4)
+            }
+
+
+def get_chart_cache():
+    return current_app.extensions["charts"]
+
+
+def init_charts(app):
+    app.extensions["charts"] = ChartCache(app.config["CHART_CACHE_SIZE"])
@@ -0,0 +1,443 @@
+# services/client_dedupe.py
+#
+# Duplicate client detection. Comparing every client with every other one is
+# O(n^2), so clients are first grouped by blocking keys and only pairs that
+# share a block are scored:
+#
+#   phone block  client.phone_normalized (see app/phone.py)
+#   name block   Soundex of the first or the last name token + birth year
+#                (so swapped name order still meets); within a block only
+#                clients born the same day (or with month and day swapped,
+#                a common data-entry slip) become candidate pairs
+#
+# Candidate pairs get a weighted score from name similarity (accent-folded,
+# token-sorted, difflib ratio), date of birth and phone; pairs scoring at
+# least MIN_SCORE are kept and grouped with union-find. A scan reads the
+# client table once, keeps only the scored pairs and is cached per client
+# table version. Scans run on a background thread; a request waits up to
+# DEDUPE_WAIT_SECONDS for one and otherwise reports its progress.
+#
+# merge_clients() folds duplicates into a surviving client through the ORM,
+# so the dashboard counters, time-series buckets, search grams and table
+# versions follow through the usual flush hooks.
+
+import threading
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import click
+from flask import current_app
+
+from app import db
+from app.models.client import Client
+from app.services.client_search import normalize
+from app.services.versioning import current_versions
+
+CLIENT_TABLE = Client.__table__.name
+
+# Lowest score a scan keeps; requests filter further with ?min_score=
+MIN_SCORE = 0.7
+DEFAULT_MIN_SCORE = 0.8
+
+NAME_WEIGHT, DOB_WEIGHT, PHONE_WEIGHT = 0.55, 0.3, 0.15
+
+# Blocks larger than this are skipped (placeholder phone numbers and the like)
+MAX_BLOCK_SIZE = 5000
+
+EXTRACT_CHUNK_SIZE = 20_000
+
+# Highest-scoring pairs listed per group (groups of placeholder names can link thousands)
+MAX_GROUP_PAIRS = 50
+
+# Most clients a merge folds into one survivor
+MAX_MERGE_IDS = 50
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def soundex(word):
+    """American Soundex code of a word (letters only), e.g. "Otieno" -> "O350" """
+    letters = [ch for ch in word.lower() if "a" <= ch <= "z"]
+    if not letters:
+        return ""
+    code = [letters[0].upper()]
+    previous = SOUNDEX_CODES.get(letters[0])
+    for ch in letters[1:]:
+        digit = SOUNDEX_CODES.get(ch)
+        if digit and digit != previous:
+            code.append(digit)
+            if len(code) == 4:
+                break
+        if ch not in "hw":
+            previous = digit
+    return "".join(code).ljust(4, "0")
+
+
+def name_tokens(full_name):
+    """Accent-folded, lower-case alphabetic name tokens"""
+    return ["".join(ch for ch in token if ch.isalpha()) for token in normalize(full_name).split()
+            if any(ch.isalpha() for ch in token)]
+
+
+def dob_score(a, b):
+    if a is None or b is None:
+        return 0.3
+    if a == b:
+        return 1.0
+    if a.year == b.year and a.month == b.day and a.day == b.month:
+        return 0.6
+    return 0.0
+
+
+def phone_score(a, b):
+    if a is None or b is None:
+        return 0.5
+    return 1.0 if a == b else 0.0
+
+
+def name_ratio(a, b):
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def score_pair(a, b, ratios=None):
+    """(score, reasons) for two ScanRecords; the name ratio is skipped when the score cannot reach MIN_SCORE.
+
+    `ratios` is an optional dict memoizing name ratios by name-key pair;
+    common names meet each other over and over in a registry.
+    """
+    dob = dob_score(a.dob, b.dob)
+    phone = phone_score(a.phone, b.phone)
+    partial = DOB_WEIGHT * dob + PHONE_WEIGHT * phone
+    if partial + NAME_WEIGHT < MIN_SCORE:
+        return partial, ()
+    if ratios is None:
+        name = name_ratio(a.name_key, b.name_key)
+    else:
+        key = (a.name_key, b.name_key) if a.name_key < b.name_key else (b.name_key, a.name_key)
+        name = ratios.get(key)
+        if name is None:
+            name = ratios[key] = name_ratio(*key)
+    score = NAME_WEIGHT * name + partial
+    if a.gender and b.gender and a.gender != b.gender:
+        score -= 0.1
+
+    reasons = []
+    if name == 1.0:
+        reasons.append("same_name")
+    elif name >= 0.8:
+        reasons.append("similar_name")
+    if dob == 1.0:
+        reasons.append("same_date_of_birth")
+    elif dob == 0.6:
+        reasons.append("swapped_day_month")
+    if phone == 1.0:
+        reasons.append("same_phone")
+    return round(score, 4), tuple(reasons)
+
+
+def parse_name(full_name):
+    """(name_key, blocking codes) for a full name"""
+    tokens = name_tokens(full_name)
+    # Token-sorted so "Otieno John" and "John Otieno" compare equal
+    name_key = " ".join(sorted(tokens))
+    return name_key, tuple({soundex(tokens[0]), soundex(tokens[-1])}) if tokens else ()
+
+
+class ScanRecord:
+    __slots__ = ("id", "name_key", "name_codes", "dob", "phone", "gender")
+
+    def __init__(self, client_id, full_name, date_of_birth, phone_normalized, gender, names=None):
+        # `names` memoizes parse_name() across the records of one scan
+        parsed = names.get(full_name) if names is not None else None
+        if parsed is None:
+            parsed = parse_name(full_name)
+            if names is not None:
+                names[full_name] = parsed
+        self.id = client_id
+        self.name_key, self.name_codes = parsed
+        self.dob = date_of_birth
+        self.phone = phone_normalized
+        self.gender = (gender or "").strip().lower()[:1] or None
+
+
+class DuplicateScan:
+    """Scored candidate pairs for the whole client table at one data version"""
+
+    def __init__(self, version):
+        self.version = version
+        self.clients = 0
+        self.blocks = 0
+        self.oversized_blocks = 0
+        self.comparisons = 0
+        self.pairs = {}  # (id, id) -> (score, reasons), ids in sorted order
+        self.seconds = None
+        self._groups = {}
+        self._ratios = {}
+
+    def run(self):
+        started = time.perf_counter()
+        records = []
+        names = {}
+        phone_blocks = defaultdict(list)
+        name_blocks = defaultdict(list)
+
+        stmt = db.select(Client.id, Client.full_name, Client.date_of_birth, Client.phone_normalized, Client.gender)
+        result = db.session.execute(stmt.execution_options(yield_per=EXTRACT_CHUNK_SIZE))
+        for rows in result.partitions():
+            for row in rows:
+                record = ScanRecord(*row, names=names)
+                index = len(records)
+                records.append(record)
+                if record.phone:
+                    phone_blocks[record.phone].append(index)
+                if record.dob:
+                    for code in record.name_codes:
+                        name_blocks[(code, record.dob.year)].append(index)
+            self.clients = len(records)
+
+        for members in phone_blocks.values():
+            self._score_block(records, members, all_pairs=True)
+        for members in name_blocks.values():
+            self._score_block(records, members, all_pairs=False)
+
+        self.blocks = len(phone_blocks) + len(name_blocks)
+        self._ratios = {}
+        self.seconds = round(time.perf_counter() - started, 3)
+        return self
+
+    def _score_block(self, records, members, all_pairs):
+        if len(members) < 2:
+            return
+        if len(members) > MAX_BLOCK_SIZE:
+            self.oversized_blocks += 1
+            return
+        if all_pairs:
+            candidates = ((members[i], members[j]) for i in range(len(members)) for j in range(i + 1, len(members)))
+        else:
+            candidates = _same_birthday_pairs(records, members)
+        for i, j in candidates:
+            a, b = records[i], records[j]
+            key = (a.id, b.id) if a.id < b.id else (b.id, a.id)
+            if key in self.pairs:
+                continue
+            self.comparisons += 1
+            score, reasons = score_pair(a, b, self._ratios)
+            if score >= MIN_SCORE:
+                self.pairs[key] = (score, reasons)
+
+    def groups(self, min_score):
+        """Clusters of clients linked by pairs scoring >= min_score, highest-scoring first"""
+        if min_score not in self._groups:
+            parent = {}
+
+            def find(x):
+                parent.setdefault(x, x)
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+
+            kept = [(key, value) for key, value in self.pairs.items() if value[0] >= min_score]
+            for (a, b), _ in kept:
+                parent[find(a)] = find(b)
+
+            clusters = defaultdict(lambda: {"client_ids": set(), "pairs": []})
+            for (a, b), (score, reasons) in kept:
+                cluster = clusters[find(a)]
+                cluster["client_ids"].update((a, b))
+                cluster["pairs"].append({"a": a, "b": b, "score": score, "reasons": list(reasons)})
+
+            groups = []
+            for cluster in clusters.values():
+                pairs = sorted(cluster["pairs"], key=lambda p: -p["score"])
+                groups.append({
+                    "score": pairs[0]["score"],
+                    "client_ids": sorted(cluster["client_ids"]),
+                    "pair_count": len(pairs),
+                    "pairs": pairs[:MAX_GROUP_PAIRS]
+                })
+            groups.sort(key=lambda g: (-g["score"], g["client_ids"][0]))
+            if len(self._groups) >= 8:
+                self._groups.pop(next(iter(self._groups)))
+            self._groups[min_score] = groups
+        return self._groups[min_score]
+
+    def stats(self):
+        return {
+            "clients": self.clients,
+            "blocks": self.blocks,
+            "oversized_blocks": self.oversized_blocks,
+            "comparisons": self.comparisons,
+            "pairs": len(self.pairs),
+            "seconds": self.seconds,
+            "version": self.version
+        }
+
+
+def _same_birthday_pairs(records, members):
+    """Pairs within a name block born the same day, or with day and month swapped"""
+    by_day = defaultdict(list)
+    for index in members:
+        dob = records[index].dob
+        by_day[(dob.month, dob.day)].append(index)
+    for (month, day), group in by_day.items():
+        for i in range(len(group)):
+            for j in range(i + 1, len(group)):
+                yield group[i], group[j]
+        if month < day <= 12:
+            for i in group:
+                for j in by_day.get((day, month), ()):
+                    yield i, j
+
+
+class DuplicateScanner:
+    """The latest DuplicateScan of this process, refreshed when the client table version changes"""
+
+    def __init__(self, wait_seconds):
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+        self._scan = None
+        self._running = None  # (version, done event, scan in progress)
+        self.scans = 0
+        self.last_error = None
+
+    def _start(self, app, version):
+        scan = DuplicateScan(version)
+        done = threading.Event()
+
+        def work():
+            try:
+                with app.app_context():
+                    scan.run()
+                with self._lock:
+                    self._scan = scan
+                    self.scans += 1
+                    self.last_error = None
+            except Exception as e:
+                app.logger.exception("Duplicate client scan failed")
+                self.last_error = str(e)
+            finally:
+                with self._lock:
+                    self._running = None
+                done.set()
+
+        self._running = (version, done, scan)
+        threading.Thread(target=work, name="client-dedupe-scan", daemon=True).start()
+
+    def get(self, wait=None):
+        """Return (scan, None) for the current version, or (None, progress stats) if it is still running.
+
+        A missing or stale scan is started on a background thread and waited
+        for up to `wait` seconds (DEDUPE_WAIT_SECONDS by default).
+        """
+        version = current_versions([CLIENT_TABLE])[CLIENT_TABLE]
+        with self._lock:
+            if self._scan is not None and self._scan.version == version:
+                return self._scan, None
+            if self._running is None or self._running[0] != version:
+                self._start(current_app._get_current_object(), version)
+            _, done, scan = self._running
+
+        if done.wait(self.wait_seconds if wait is None else wait):
+            with self._lock:
+                if self._scan is scan:
+                    return scan, None
+            raise RuntimeError(self.last_error or "Duplicate scan did not complete.")
+        return None, scan.stats()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "scans": self.scans,
+                "running": self._running is not None,
+                "last_error": self.last_error,
+                "last_scan": self._scan.stats() if self._scan is not None else None
+            }
+
+
+def merge_clients(survivor_id, duplicate_ids):
+    """Fold duplicate clients into the survivor and commit; returns a summary.
+
+    Enrollments move to the survivor; where the survivor is already enrolled
+    in the same program the duplicate row is dropped and the earlier
+    enrollment date kept. Empty survivor fields are filled from the
+    duplicates. Raises LookupError for unknown ids, ValueError for bad input.
+    """
+    duplicate_ids = list(dict.fromkeys(str(client_id) for client_id in duplicate_ids))
+    if not duplicate_ids:
+        raise ValueError("Provide at least one duplicate id.")
+    if len(duplicate_ids) > MAX_MERGE_IDS:
+        raise ValueError(f"At most {MAX_MERGE_IDS} duplicates per merge.")
+    if survivor_id in duplicate_ids:
+        raise ValueError("A client cannot be merged into itself.")
+
+    survivor = db.session.get(Client, survivor_id)
+    if survivor is None:
+        raise LookupError("Client not found")
+    duplicates = Client.query.filter(Client.id.in_(duplicate_ids)).all()
+    missing = set(duplicate_ids) - {client.id for client in duplicates}
+    if missing:
+        raise LookupError(f"Unknown duplicate ids: {', '.join(sorted(missing))}")
+
+    enrolled = {enrollment.program_id: enrollment for enrollment in survivor.enrollments}
+    moved = dropped = 0
+    filled = set()
+    for duplicate in duplicates:
+        for enrollment in list(duplicate.enrollments):
+            kept = enrolled.get(enrollment.program_id)
+            if kept is None:
+                enrollment.client = survivor
+                enrolled[enrollment.program_id] = enrollment
+                moved += 1
+                continue
+            # The (client_id, program_id) unique index allows one row per program
+            if enrollment.enrollment_date and (
+                kept.enrollment_date is None or enrollment.enrollment_date < kept.enrollment_date
+            ):
+                kept.enrollment_date = enrollment.enrollment_date
+            db.session.delete(enrollment)
+            dropped += 1
+
+        for field in ("gender", "date_of_birth", "phone_number", "address"):
+            if not getattr(survivor, field) and getattr(duplicate, field):
+                setattr(survivor, field, getattr(duplicate, field))
+                filled.add(field)
+        db.session.delete(duplicate)
+
+    db.session.commit()
+    return {
+        "survivor_id": survivor.id,
+        "merged_ids": [client.id for client in duplicates],
+        "enrollments_moved": moved,
+        "enrollments_dropped": dropped,
+        "fields_filled": sorted(filled)
+    }
+
+
+@click.command("find-duplicate-clients")
+@click.option("--min-score", default=DEFAULT_MIN_SCORE, show_default=True, type=float)
+@click.option("--limit", default=20, show_default=True, help="Groups to print.")
+def find_duplicate_clients_command(min_score, limit):
+    """Scan the client table for likely duplicates."""
+    scan = DuplicateScan(current_versions([CLIENT_TABLE])[CLIENT_TABLE]).run()
+    groups = scan.groups(max(min_score, MIN_SCORE))
+    stats = scan.stats()
+    click.echo(
+        f"Scanned {stats['clients']} clients in {stats['seconds']}s: {stats['comparisons']} comparisons "
+        f"in {stats['blocks']} blocks ({stats['oversized_blocks']} oversized), {len(groups)} groups"
+    )
+    for group in groups[:limit]:
+        click.echo(f"{group['score']:.2f}  {', '.join(group['client_ids'])}")
+
+
+def get_duplicate_scanner():
+    return current_app.extensions["client_dedupe"]
+
+
+def init_client_dedupe(app):
+    app.extensions["client_dedupe"] = DuplicateScanner(app.config["DEDUPE_WAIT_SECONDS"])
+    app.cli.add_command(find_duplicate_clients_command)
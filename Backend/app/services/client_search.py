@@ -0,0 +1,253 @@
+# services/client_search.py
+#
+# Trigram inverted index for client search. Names and phone numbers are
+# normalized (lower-cased, accents folded, whitespace collapsed), padded with
+# PAD and split into trigrams stored in client_search_gram. A query of three or
+# more characters becomes an intersection of its trigram posting lists; shorter
+# queries use a prefix range over the gram index (the end padding guarantees
+# every substring starts some gram). Candidates are verified against the real
+# values, ranked and capped. Client ids are matched by prefix on the primary key.
+#
+# Phone-shaped queries ("+254 712 345 678", "0712-345") are looked up on the
+# indexed client.phone_normalized column instead, so every stored format of a
+# number matches: complete numbers exactly, partial ones by prefix (topped up
+# with trigram substring matches).
+
+import math
+import re
+import unicodedata
+
+import click
+from sqlalchemy import event, inspect
+
+from app import db
+from app.models.client import Client
+from app.models.client_search_gram import ClientSearchGram
+from app.phone import phone_query
+
+GRAM_SIZE = 3
+PAD = "$" * (GRAM_SIZE - 1)
+NAME_FIELD = "n"
+PHONE_FIELD = "p"
+
+DEFAULT_RESULT_LIMIT = 50
+MAX_RESULT_LIMIT = 1000
+CANDIDATE_FACTOR = 5
+REBUILD_BATCH_SIZE = 5000
+
+ID_PREFIX_PATTERN = re.compile(r"^[0-9a-f-]{4,36}$")
+
+grams_table = ClientSearchGram.__table__
+
+
+def normalize(text):
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return " ".join(folded.lower().replace("$", "").split())
+
+
+def text_grams(text):
+    padded = normalize(text) + PAD
+    if padded == PAD:
+        return set()
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def client_gram_rows(client_id, full_name, phone_number):
+    rows = [{"gram": g, "client_id": client_id, "field": NAME_FIELD} for g in text_grams(full_name)]
+    rows += [{"gram": g, "client_id": client_id, "field": PHONE_FIELD} for g in text_grams(phone_number)]
+    return rows
+
+
+def _upper_bound(prefix):
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _candidate_ids(term, limit):
+    if len(term) >= GRAM_SIZE:
+        query_grams = {term[i:i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)}
+        condition = grams_table.c.gram.in_(query_grams)
+        needed = len(query_grams)
+    else:
+        condition = db.and_(grams_table.c.gram >= term, grams_table.c.gram < _upper_bound(term))
+        needed = 1
+
+    shared = db.func.count(db.distinct(grams_table.c.gram))
+    stmt = (
+        db.select(grams_table.c.client_id)
+        .where(condition)
+        .group_by(grams_table.c.client_id)
+        .having(shared >= needed)
+        .limit(limit)
+    )
+    if needed == 1:
+        # Prefix ranges match a varying number of grams per client: keep the
+        # best-matching candidates when the limit cuts. (With needed > 1 every
+        # group shares exactly `needed` grams, so the order would be a no-op.)
+        stmt = stmt.order_by(shared.desc(), grams_table.c.client_id)
+    return [row[0] for row in db.session.execute(stmt)]
+
+
+def _rank(client, term):
+    name = normalize(client.full_name)
+    phone = normalize(client.phone_number)
+    if name == term or client.id == term:
+        rank = 0
+    elif name.startswith(term):
+        rank = 1
+    elif any(word.startswith(term) for word in name.split()):
+        rank = 2
+    elif term in name:
+        rank = 3
+    elif phone.startswith(term):
+        rank = 4
+    elif term in phone:
+        rank = 5
+    elif client.id.startswith(term):
+        rank = 6
+    else:
+        return None
+    return (rank, len(name), name, client.id)
+
+
+def _phone_matches(phone, exact, limit):
+    if exact:
+        condition = Client.phone_normalized == phone
+    else:
+        condition = db.and_(Client.phone_normalized >= phone, Client.phone_normalized < _upper_bound(phone))
+    return Client.query.filter(condition).order_by(Client.phone_normalized, Client.id).limit(limit).all()
+
+
+def _search_text(term, limit):
+    """Trigram (name, phone) and id-prefix matches, verified and ranked"""
+    candidate_ids = set(_candidate_ids(term, limit * CANDIDATE_FACTOR))
+    if ID_PREFIX_PATTERN.match(term):
+        id_matches = (
+            db.session.query(Client.id)
+            .filter(Client.id >= term, Client.id < _upper_bound(term))
+            .limit(limit)
+        )
+        candidate_ids.update(row.id for row in id_matches)
+    if not candidate_ids:
+        return []
+
+    ranked = []
+    for client in Client.query.filter(Client.id.in_(candidate_ids)).all():
+        key = _rank(client, term)
+        if key is not None:
+            ranked.append((key, client))
+    ranked.sort(key=lambda item: item[0])
+    return [client for _, client in ranked[:limit]]
+
+
+def search(query, limit=DEFAULT_RESULT_LIMIT):
+    """Return up to `limit` clients whose name, phone or id prefix matches, best first"""
+    term = normalize(query)
+    limit = max(1, min(limit, MAX_RESULT_LIMIT))
+    if not term:
+        return Client.query.order_by(Client.full_name, Client.id).limit(limit).all()
+
+    phone = phone_query(query)
+    if phone is None:
+        return _search_text(term, limit)
+
+    value, exact = phone
+    matches = _phone_matches(value, exact, limit)
+    if exact and not matches:
+        # Not a stored number after all, e.g. an id prefix such as "12345678-1"
+        return _search_text(term, limit)
+    if exact or len(matches) >= limit:
+        return matches
+    # A partial number may also occur inside stored values; prefix hits rank first
+    seen = {client.id for client in matches}
+    others = [client for client in _search_text(term, limit) if client.id not in seen]
+    return matches + others[:limit - len(matches)]
+
+
+def paginate(query, page, per_page):
+    """Page over the capped, ranked search results (total is capped at MAX_RESULT_LIMIT)"""
+    matches = search(query, MAX_RESULT_LIMIT)
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    start = (page - 1) * per_page
+    return {
+        "items": matches[start:start + per_page],
+        "total": len(matches),
+        "pages": math.ceil(len(matches) / per_page),
+        "page": page
+    }
+
+
+def _after_flush(session, flush_context):
+    reindex = []
+    removed = []
+
+    for obj in session.new:
+        if isinstance(obj, Client):
+            reindex.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Client):
+            state = inspect(obj)
+            if state.attrs.full_name.history.has_changes() or state.attrs.phone_number.history.has_changes():
+                removed.append(obj.id)
+                reindex.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Client):
+            removed.append(obj.id)
+
+    if not reindex and not removed:
+        return
+
+    connection = session.connection()
+    if removed:
+        connection.execute(db.delete(grams_table).where(grams_table.c.client_id.in_(removed)))
+    index_clients(connection, [
+        {"id": c.id, "full_name": c.full_name, "phone_number": c.phone_number} for c in reindex
+    ])
+
+
+def index_clients(connection, clients):
+    """Insert postings for client dicts written outside the ORM (bulk Core inserts)"""
+    rows = []
+    for client in clients:
+        rows.extend(client_gram_rows(client["id"], client["full_name"], client.get("phone_number")))
+    if rows:
+        connection.execute(db.insert(grams_table), rows)
+
+
+def rebuild_index(batch_size=REBUILD_BATCH_SIZE):
+    """Rebuild the whole index from the client table in keyset-ordered batches"""
+    db.session.execute(db.delete(grams_table))
+    indexed = 0
+    last_id = None
+    while True:
+        query = db.session.query(Client.id, Client.full_name, Client.phone_number)
+        if last_id is not None:
+            query = query.filter(Client.id > last_id)
+        batch = query.order_by(Client.id).limit(batch_size).all()
+        if not batch:
+            break
+        rows = []
+        for client_id, full_name, phone_number in batch:
+            rows.extend(client_gram_rows(client_id, full_name, phone_number))
+        if rows:
+            db.session.execute(db.insert(grams_table), rows)
+        indexed += len(batch)
+        last_id = batch[-1].id
+    db.session.commit()
+    return indexed
+
+
+@click.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Rebuild the client search trigram index."""
+    indexed = rebuild_index()
+    click.echo(f"Indexed {indexed} clients")
+
+
+def init_client_search(app):
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+    app.cli.add_command(rebuild_search_index_command)
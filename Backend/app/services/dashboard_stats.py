@@ -0,0 +1,252 @@
+# services/dashboard_stats.py
+#
+# Incrementally maintained dashboard counters. Every ORM flush that adds or
+# removes clients, programs or enrollments applies the matching deltas to the
+# dashboard_rollup table inside the same transaction, so /api/dashboard can be
+# served from O(number of programs) rows. Writes that bypass the ORM (bulk
+# Core inserts, manual SQL) are corrected by reconcile(), which runs lazily
+# once the counters are older than DASHBOARD_RECONCILE_INTERVAL seconds and
+# can also be scheduled through `flask reconcile-dashboard`.
+
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql, sqlite
+
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.models.dashboard_rollup import DashboardRollup
+from app.services.program_cache import get_program_cache
+
+CLIENTS = "clients"
+PROGRAMS = "programs"
+ENROLLMENTS = "enrollments"
+RECONCILED = "__reconciled__"
+PROGRAM_PREFIX = "program:"
+
+rollup = DashboardRollup.__table__
+
+
+def program_metric(program_id):
+    return f"{PROGRAM_PREFIX}{program_id}"
+
+
+def _collect_deltas(session):
+    deltas = Counter()
+    created_programs = []
+    removed_programs = []
+
+    for obj in session.new:
+        if isinstance(obj, Client):
+            deltas[CLIENTS] += 1
+        elif isinstance(obj, Program):
+            if not obj.is_deleted:
+                deltas[PROGRAMS] += 1
+            created_programs.append(obj.id)
+        elif isinstance(obj, Enrollment):
+            deltas[ENROLLMENTS] += 1
+            deltas[program_metric(obj.program_id)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Client):
+            deltas[CLIENTS] -= 1
+        elif isinstance(obj, Program):
+            if not obj.is_deleted:
+                deltas[PROGRAMS] -= 1
+            removed_programs.append(obj.id)
+        elif isinstance(obj, Enrollment):
+            deltas[ENROLLMENTS] -= 1
+            deltas[program_metric(obj.program_id)] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Program):
+            # The programs counter covers live (not soft-deleted) programs only
+            history = inspect(obj).attrs.is_deleted.history
+            if history.has_changes():
+                was_deleted = bool(history.deleted[0]) if history.deleted else False
+                if was_deleted != bool(obj.is_deleted):
+                    deltas[PROGRAMS] += -1 if obj.is_deleted else 1
+        if isinstance(obj, Enrollment):
+            history = inspect(obj).attrs.program_id.history
+            if history.has_changes():
+                for old_id in history.deleted:
+                    deltas[program_metric(old_id)] -= 1
+                for new_id in history.added:
+                    deltas[program_metric(new_id)] += 1
+
+    return deltas, created_programs, removed_programs
+
+
+def apply_deltas(connection, deltas, created_programs=(), removed_programs=()):
+    """Apply counter deltas on the given connection (i.e. in the caller's transaction)"""
+    now = datetime.utcnow()
+
+    for program_id in created_programs:
+        connection.execute(
+            db.insert(rollup).values(metric=program_metric(program_id), value=0, updated_at=now)
+        )
+
+    for metric, delta in deltas.items():
+        if delta:
+            connection.execute(
+                db.update(rollup)
+                .where(rollup.c.metric == metric)
+                .values(value=rollup.c.value + delta, updated_at=now)
+            )
+
+    for program_id in removed_programs:
+        connection.execute(db.delete(rollup).where(rollup.c.metric == program_metric(program_id)))
+
+
+def _after_flush(session, flush_context):
+    deltas, created_programs, removed_programs = _collect_deltas(session)
+    if deltas or created_programs or removed_programs:
+        apply_deltas(session.connection(), deltas, created_programs, removed_programs)
+
+
+def _upsert(rows):
+    """Insert or overwrite rollup rows by metric, leaving every other row in place"""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(rollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[rollup.c.metric],
+            set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at}
+        )
+    elif dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(rollup)
+        stmt = stmt.on_duplicate_key_update(value=stmt.inserted.value, updated_at=stmt.inserted.updated_at)
+    else:
+        existing = set(db.session.scalars(db.select(rollup.c.metric)))
+        for row in rows:
+            if row["metric"] in existing:
+                db.session.execute(
+                    db.update(rollup).where(rollup.c.metric == row["metric"])
+                    .values(value=row["value"], updated_at=row["updated_at"])
+                )
+        rows = [row for row in rows if row["metric"] not in existing]
+        stmt = db.insert(rollup)
+    if rows:
+        db.session.execute(stmt, rows)
+
+
+def reconcile():
+    """Recompute every counter from the base tables and commit.
+
+    Counters are upserted in place rather than deleted and re-inserted, so
+    concurrent flushes keep finding (and incrementing) their rows; only the
+    counters of programs that no longer exist are removed. Writes committed
+    by other workers while this runs may be counted twice or not at all; the
+    next reconciliation corrects that.
+    """
+    now = datetime.utcnow()
+    counts = {
+        CLIENTS: db.session.query(db.func.count(Client.id)).scalar(),
+        PROGRAMS: db.session.query(db.func.count(Program.id)).filter(Program.live()).scalar(),
+        ENROLLMENTS: db.session.query(db.func.count(Enrollment.id)).scalar(),
+    }
+
+    per_program = dict(
+        db.session.query(Program.id, db.func.count(Enrollment.id))
+        .outerjoin(Enrollment, Enrollment.program_id == Program.id)
+        .group_by(Program.id)
+        .all()
+    )
+    for program_id, count in per_program.items():
+        counts[program_metric(program_id)] = count
+    counts[RECONCILED] = 0
+
+    _upsert([{"metric": metric, "value": value, "updated_at": now} for metric, value in counts.items()])
+    unknown = {
+        int(metric[len(PROGRAM_PREFIX):]): metric for metric in db.session.scalars(
+            db.select(rollup.c.metric).where(rollup.c.metric.startswith(PROGRAM_PREFIX))
+        )
+        if metric not in counts
+    }
+    if unknown:
+        # Programs committed since the count above keep their counters
+        created = set(db.session.scalars(db.select(Program.id).where(Program.id.in_(unknown))))
+        stale = [metric for program_id, metric in unknown.items() if program_id not in created]
+        if stale:
+            db.session.execute(db.delete(rollup).where(rollup.c.metric.in_(stale)))
+    db.session.commit()
+    return now
+
+
+def counter(metric):
+    """Return the current value of one counter, or None if it has not been reconciled yet"""
+    row = db.session.get(DashboardRollup, metric)
+    return row.value if row is not None else None
+
+
+def _reconcile_due(reconciled):
+    interval = current_app.config["DASHBOARD_RECONCILE_INTERVAL"]
+    return reconciled is None or (datetime.utcnow() - reconciled.updated_at).total_seconds() > interval
+
+
+def reconcile_marker():
+    """Last reconcile time as an ETag component, or None when a reconcile is due"""
+    reconciled = db.session.get(DashboardRollup, RECONCILED)
+    if _reconcile_due(reconciled):
+        return None
+    return reconciled.updated_at.isoformat()
+
+
+def snapshot():
+    """Return dashboard totals, distribution and freshness from the rollup table"""
+    rows = {row.metric: row for row in DashboardRollup.query.all()}
+
+    reconciled = rows.get(RECONCILED)
+    if _reconcile_due(reconciled):
+        reconcile()
+        rows = {row.metric: row for row in DashboardRollup.query.all()}
+        reconciled = rows[RECONCILED]
+
+    # Like the programs counter, the distribution and the enrollments total
+    # cover live programs only; per-program counters are kept for all of them
+    names = {program.id: program.name for program in get_program_cache().all() if not program.is_deleted}
+    enrollment_data = []
+    total_enrollments = 0
+    for metric, row in rows.items():
+        if not metric.startswith(PROGRAM_PREFIX) or row.value <= 0:
+            continue
+        program_id = int(metric[len(PROGRAM_PREFIX):])
+        if program_id in names:
+            total_enrollments += row.value
+            enrollment_data.append({
+                "programName": names[program_id],
+                "enrollmentCount": row.value
+            })
+    enrollment_data.sort(key=lambda item: item["programName"])
+
+    last_updated = max(row.updated_at for row in rows.values())
+
+    return {
+        "totalPrograms": rows[PROGRAMS].value,
+        "totalClients": rows[CLIENTS].value,
+        "totalEnrollments": total_enrollments,
+        "enrollmentData": enrollment_data,
+        "freshness": {
+            "lastReconciledAt": reconciled.updated_at.isoformat(),
+            "lastUpdatedAt": last_updated.isoformat(),
+            "reconcileInterval": current_app.config["DASHBOARD_RECONCILE_INTERVAL"]
+        }
+    }
+
+
+@click.command("reconcile-dashboard")
+def reconcile_dashboard_command():
+    """Recompute dashboard counters from the base tables."""
+    reconciled_at = reconcile()
+    click.echo(f"Dashboard counters reconciled at {reconciled_at.isoformat()}")
+
+
+def init_dashboard_stats(app):
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+    app.cli.add_command(reconcile_dashboard_command)
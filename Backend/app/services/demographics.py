@@ -0,0 +1,214 @@
+# services/demographics.py
+#
+# Demographic analytics over clients and enrollments. Client and enrollment
+# columns are extracted once per data version into compact numpy arrays -
+# dates of birth as int32 day numbers (days since 1970-01-01), gender and
+# program as small categorical codes, both encoded by the database so rows
+# arrive as plain integers - and age-band x gender (x program) pivots are
+# computed from them with vectorized age arithmetic and a single bincount.
+# The arrays and the pivots are cached per process, keyed on the client and
+# enrollment table versions (see services/versioning.py), so only the first
+# request after a write pays for the extraction.
+
+import threading
+import time
+import numpy as np
+from flask import current_app
+
+from app import db
+from app.models.client import Client
+from app.models.enrollment import Enrollment
+from app.models.program import Program
+from app.services.versioning import current_versions
+
+GENDERS = ("Female", "Male", "Other", "Unknown")
+GENDER_CODES = {"female": 0, "f": 0, "male": 1, "m": 1}
+OTHER_GENDER = 2
+UNKNOWN_GENDER = 3
+
+# Lower bounds (in whole years) of each age band; the last band is open-ended
+AGE_BAND_EDGES = (0, 5, 15, 25, 35, 50, 65)
+AGE_BANDS = ("0-4", "5-14", "15-24", "25-34", "35-49", "50-64", "65+", "Unknown")
+UNKNOWN_BAND = len(AGE_BANDS) - 1
+
+MISSING_DAY = np.iinfo(np.int32).min
+
+EXTRACT_CHUNK_SIZE = 50_000
+# The program version is included so a soft-delete drops the program's pivots
+VERSIONED_TABLES = (Client.__table__.name, Enrollment.__table__.name, Program.__table__.name)
+MAX_CACHED_RESULTS = 16
+
+
+def _day_number(column):
+    """SQL expression for a date column as days since 1970-01-01 (MISSING_DAY when NULL)"""
+    if db.engine.dialect.name == "sqlite":
+        days = db.cast(db.func.julianday(column) - 2440587.5, db.Integer)
+    else:
+        days = db.func.to_days(column) - 719528  # MySQL: TO_DAYS('1970-01-01')
+    return db.func.coalesce(days, MISSING_DAY)
+
+
+def _gender(column):
+    """SQL expression mapping gender to its GENDERS code (blank/NULL unknown, unlisted other), so codes arrive as integers"""
+    normalized = db.func.lower(db.func.trim(column))
+    whens = [(normalized == label, code) for label, code in GENDER_CODES.items()]
+    return db.case(
+        (column.is_(None), UNKNOWN_GENDER),
+        (normalized == "", UNKNOWN_GENDER),
+        *whens,
+        else_=OTHER_GENDER
+    )
+
+
+def _extract(stmt, dtypes):
+    """Stream a select of integer columns into one numpy array per column, chunk by chunk"""
+    parts = [[] for _ in dtypes]
+    result = db.session.execute(stmt.execution_options(yield_per=EXTRACT_CHUNK_SIZE))
+    for rows in result.partitions():
+        for i, (values, dtype) in enumerate(zip(zip(*rows), dtypes)):
+            parts[i].append(np.array(values, dtype=dtype))
+    return [np.concatenate(p) if p else np.empty(0, dtype=dtype) for p, dtype in zip(parts, dtypes)]
+
+
+class DemographicColumns:
+    """Column arrays for all clients and all enrollments at one data version.
+
+    Enrollments carry a live flag (program not soft-deleted) so the default
+    live-only scope is a mask rather than a second extraction.
+    """
+
+    def __init__(self):
+        dob, gender = _day_number(Client.date_of_birth), _gender(Client.gender)
+        self.client_dob, self.client_gender = _extract(db.select(dob, gender), (np.int32, np.int8))
+        program_ids, live, self.enrollment_dob, self.enrollment_gender = _extract(
+            db.select(Enrollment.program_id, db.case((Program.live(), 1), else_=0), dob, gender)
+            .join(Client, Client.id == Enrollment.client_id)
+            .join(Program, Program.id == Enrollment.program_id),
+            (np.int32, np.int8, np.int32, np.int8)
+        )
+        self.enrollment_live = live.astype(bool)
+        # Dense program codes: index into self.program_ids / self.program_live
+        self.program_ids, codes = np.unique(program_ids, return_inverse=True)
+        self.enrollment_program = codes.astype(np.int32)
+        self.program_live = np.zeros(len(self.program_ids), dtype=bool)
+        self.program_live[self.enrollment_program[self.enrollment_live]] = True
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (
+            self.client_dob, self.client_gender, self.enrollment_dob, self.enrollment_gender,
+            self.enrollment_program, self.enrollment_live, self.program_ids, self.program_live
+        ))
+
+
+def age_band_codes(dob_days, as_of):
+    """Return (AGE_BANDS index, exact age in whole years or -1) for each day number on `as_of`"""
+    known = dob_days != MISSING_DAY
+    dob = np.where(known, dob_days, 0).astype("datetime64[D]")
+    years = dob.astype("datetime64[Y]")
+    months = dob.astype("datetime64[M]")
+    birth_year = years.astype(np.int64) + 1970
+    birth_month_day = ((months - years).astype(np.int64) + 1) * 100 + (dob - months).astype(np.int64) + 1
+
+    ages = as_of.year - birth_year - (as_of.month * 100 + as_of.day < birth_month_day)
+    valid = known & (ages >= 0)  # missing or future dates of birth fall into "Unknown"
+    bands = np.searchsorted(AGE_BAND_EDGES, ages, side="right") - 1
+    return np.where(valid, bands, UNKNOWN_BAND), np.where(valid, ages, -1)
+
+
+def pivot(dob_days, gender_codes, as_of, program_codes=None, n_programs=1):
+    """Counts shaped (programs, age bands, genders); a single program axis when no codes are given"""
+    bands, _ = age_band_codes(dob_days, as_of)
+    index = bands * len(GENDERS) + gender_codes
+    if program_codes is not None:
+        index = program_codes.astype(np.int64) * (len(AGE_BANDS) * len(GENDERS)) + index
+    counts = np.bincount(index, minlength=n_programs * len(AGE_BANDS) * len(GENDERS))
+    return counts.reshape(n_programs, len(AGE_BANDS), len(GENDERS))
+
+
+def summarize(columns, as_of, include_deleted=False):
+    """Age/gender pivots for clients and per program for enrollments, as plain lists.
+
+    Enrollments in soft-deleted programs are left out unless `include_deleted`.
+    """
+    _, ages = age_band_codes(columns.client_dob, as_of)
+    known_ages = ages[ages >= 0]
+    clients = pivot(columns.client_dob, columns.client_gender, as_of)[0]
+    dob, gender, program = columns.enrollment_dob, columns.enrollment_gender, columns.enrollment_program
+    listed = np.ones(len(columns.program_ids), dtype=bool)
+    if not include_deleted:
+        live = columns.enrollment_live
+        dob, gender, program = dob[live], gender[live], program[live]
+        listed = columns.program_live
+    enrollments = pivot(dob, gender, as_of, program, len(columns.program_ids))
+    return {
+        "clients": {
+            "total": int(len(columns.client_dob)),
+            "medianAge": float(np.median(known_ages)) if len(known_ages) else None,
+            "counts": clients.tolist(),
+            "byGender": clients.sum(axis=0).tolist(),
+            "byAgeBand": clients.sum(axis=1).tolist()
+        },
+        "enrollments": {
+            "total": int(len(program)),
+            "programs": [
+                {"programId": int(program_id), "total": int(counts.sum()), "counts": counts.tolist()}
+                for program_id, counts, shown in zip(columns.program_ids, enrollments, listed) if shown
+            ]
+        }
+    }
+
+
+class DemographicsCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+        self._version = None
+        self._results = {}
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_load_seconds = None
+
+    def get(self, as_of, include_deleted=False):
+        """Return (summary, version) for `as_of`, re-extracting columns after any client/enrollment/program write"""
+        versions = current_versions(VERSIONED_TABLES)
+        version = tuple(versions[name] for name in VERSIONED_TABLES)
+        with self._lock:
+            if version != self._version:
+                started = time.perf_counter()
+                self._columns = DemographicColumns()
+                self._version = version
+                self._results = {}
+                self.loads += 1
+                self.last_load_seconds = time.perf_counter() - started
+
+            key = (as_of, include_deleted)
+            summary = self._results.get(key)
+            if summary is None:
+                self.misses += 1
+                summary = summarize(self._columns, as_of, include_deleted)
+                if len(self._results) >= MAX_CACHED_RESULTS:
+                    self._results.pop(next(iter(self._results)))
+                self._results[key] = summary
+            else:
+                self.hits += 1
+            return summary, version
+
+    def stats(self):
+        return {
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "last_load_seconds": self.last_load_seconds,
+            "version": list(self._version) if self._version else None,
+            "array_bytes": self._columns.nbytes if self._columns is not None else 0
+        }
+
+
+def get_demographics_cache():
+    return current_app.extensions["demographics"]
+
+
+def init_demographics(app):
+    app.extensions["demographics"] = DemographicsCache()
@@ -0,0 +1,228 @@
+# services/enrollment_timeseries.py
+#
+# Enrollments per program per day, kept in enrollment_daily_rollup. ORM
+# flushes that create, move (program or date) or delete enrollments apply +1/-1
+# to the affected day buckets in the same transaction; bulk Core writers call
+# apply_deltas() themselves. series() answers any date range at day, week or
+# month granularity by summing the day buckets in range, which is bounded by
+# programs x days instead of the size of the enrollment table.
+# `flask rebuild-enrollment-timeseries` recomputes the table for backfills.
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.enrollment import Enrollment
+from app.models.program import Program
+from app.models.enrollment_rollup import EnrollmentDailyRollup
+from app.services.versioning import bump
+
+INTERVALS = ("day", "week", "month")
+
+# Longest series (in buckets) one request may ask for
+MAX_BUCKETS = 3700
+
+buckets_table = EnrollmentDailyRollup.__table__
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def database_today(connection):
+    """The database's CURRENT_DATE, i.e. what the enrollment_date default stores"""
+    return _as_date(connection.execute(db.select(db.func.current_date())).scalar())
+
+
+def _old_and_new(attr):
+    history = attr.history
+    if history.unchanged:
+        old = new = history.unchanged[0]
+    else:
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+    return old, new
+
+
+def _collect_deltas(session):
+    deltas = Counter()
+    unresolved = []
+
+    for obj in session.new:
+        if isinstance(obj, Enrollment):
+            day = _as_date(obj.__dict__.get("enrollment_date"))
+            if day is None and "enrollment_date" not in obj.__dict__:
+                # Filled by the server-side default; read it back below
+                unresolved.append(obj.id)
+            elif day is not None:
+                deltas[(obj.program_id, day)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Enrollment):
+            day = _as_date(obj.__dict__.get("enrollment_date"))
+            if day is not None:
+                deltas[(obj.__dict__.get("program_id"), day)] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Enrollment):
+            continue
+        state = inspect(obj)
+        if not (state.attrs.program_id.history.has_changes() or state.attrs.enrollment_date.history.has_changes()):
+            continue
+        old_program, new_program = _old_and_new(state.attrs.program_id)
+        old_day, new_day = (_as_date(value) for value in _old_and_new(state.attrs.enrollment_date))
+        if old_program is not None and old_day is not None:
+            deltas[(old_program, old_day)] -= 1
+        if new_program is not None and new_day is not None:
+            deltas[(new_program, new_day)] += 1
+
+    return deltas, unresolved
+
+
+def apply_deltas(connection, deltas):
+    """Apply {(program_id, day): delta} on the given connection (the caller's transaction)"""
+    for (program_id, day), delta in sorted(deltas.items(), key=lambda item: (item[0][0] or 0, item[0][1])):
+        if not delta or program_id is None:
+            continue
+        stmt = (
+            db.update(buckets_table)
+            .where(buckets_table.c.program_id == program_id, buckets_table.c.day == day)
+            .values(count=buckets_table.c.count + delta)
+        )
+        if connection.execute(stmt).rowcount or delta < 0:
+            continue
+        # First enrollment in this bucket (another worker may race us)
+        try:
+            with connection.begin_nested():
+                connection.execute(db.insert(buckets_table).values(program_id=program_id, day=day, count=delta))
+        except IntegrityError:
+            connection.execute(stmt)
+
+
+def _after_flush(session, flush_context):
+    deltas, unresolved = _collect_deltas(session)
+    if not deltas and not unresolved:
+        return
+    connection = session.connection()
+    if unresolved:
+        rows = connection.execute(
+            db.select(Enrollment.program_id, Enrollment.enrollment_date).where(Enrollment.id.in_(unresolved))
+        )
+        for program_id, day in rows:
+            if day is not None:
+                deltas[(program_id, _as_date(day))] += 1
+    apply_deltas(connection, deltas)
+
+
+def rebuild():
+    """Recompute every bucket from the enrollment table and commit; returns the bucket count"""
+    db.session.execute(db.delete(buckets_table))
+    db.session.execute(
+        db.insert(buckets_table).from_select(
+            ["program_id", "day", "count"],
+            db.select(Enrollment.program_id, Enrollment.enrollment_date, db.func.count(Enrollment.id))
+            .where(Enrollment.enrollment_date.isnot(None))
+            .group_by(Enrollment.program_id, Enrollment.enrollment_date)
+        )
+    )
+    bump(db.session.connection(), Enrollment.__table__.name)
+    db.session.commit()
+    return db.session.query(db.func.count()).select_from(buckets_table).scalar()
+
+
+def bucket_start(day, interval):
+    if interval == "week":
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, interval):
+    if interval == "week":
+        return start + timedelta(days=7)
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(start, end, interval):
+    """Number of buckets from the one containing `start` through the one containing `end`"""
+    if interval == "week":
+        return (bucket_start(end, interval) - bucket_start(start, interval)).days // 7 + 1
+    if interval == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def bucket_starts(start, end, interval):
+    """Every bucket start from the bucket containing `start` through the one containing `end`"""
+    current = bucket_start(start, interval)
+    starts = []
+    while current <= end:
+        starts.append(current)
+        try:
+            current = _next_bucket(current, interval)
+        except OverflowError:  # the last bucket of date.max's range
+            break
+    return starts
+
+
+def series(start, end, interval="day", program_ids=None):
+    """Return ({program_id: [count per bucket]}, [bucket starts]) for start..end inclusive.
+
+    Raises ValueError for an unknown interval or a range over MAX_BUCKETS buckets.
+    Without program_ids, every live program with enrollments in range is
+    included; soft-deleted programs are left out either way.
+    """
+    if interval not in INTERVALS:
+        raise ValueError("Unsupported interval. Use day, week or month.")
+    # Checked arithmetically so an absurd range is rejected before it is enumerated
+    if bucket_count(start, end, interval) > MAX_BUCKETS:
+        raise ValueError(f"Range too long: at most {MAX_BUCKETS} {interval} buckets per request.")
+    starts = bucket_starts(start, end, interval)
+
+    query = db.session.query(
+        EnrollmentDailyRollup.program_id, EnrollmentDailyRollup.day, EnrollmentDailyRollup.count
+    ).filter(EnrollmentDailyRollup.day >= start, EnrollmentDailyRollup.day <= end)
+    live_ids = db.select(Program.id).where(Program.live())
+    if program_ids:
+        program_ids = sorted(db.session.scalars(live_ids.where(Program.id.in_(program_ids))))
+        query = query.filter(EnrollmentDailyRollup.program_id.in_(program_ids))
+    else:
+        query = query.filter(EnrollmentDailyRollup.program_id.in_(live_ids))
+
+    position = {bucket: i for i, bucket in enumerate(starts)}
+    counts = {program_id: [0] * len(starts) for program_id in program_ids or ()}
+    for program_id, day, count in query:
+        if not count:
+            continue
+        row = counts.setdefault(program_id, [0] * len(starts))
+        row[position[bucket_start(_as_date(day), interval)]] += count
+    return counts, starts
+
+
+@click.command("rebuild-enrollment-timeseries")
+def rebuild_enrollment_timeseries_command():
+    """Recompute the enrollment time-series rollup from the enrollment table."""
+    buckets = rebuild()
+    click.echo(f"Rebuilt {buckets} program/day buckets")
+
+
+def init_enrollment_timeseries(app):
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+    app.cli.add_command(rebuild_enrollment_timeseries_command)
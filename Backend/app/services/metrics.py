@@ -0,0 +1,234 @@
+# services/metrics.py
+#
+# Per-endpoint request instrumentation exported in the Prometheus text format
+# at /api/metrics. For every request routed to a blueprint endpoint we record
+# its latency, response size, and the number of SQL statements and time spent
+# in them (counted through engine cursor events on the request's thread).
+# Requests issuing more than METRICS_N_PLUS_ONE_THRESHOLD statements are
+# logged and counted as likely N+1 patterns.
+#
+# The registry lives in the process: with several workers each one exports
+# its own series, which Prometheus aggregates. For streamed responses latency
+# is time to first byte and neither their size nor the statements issued
+# while the body is generated are counted.
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_local = threading.local()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield bound, total
+
+
+class EndpointStats:
+    __slots__ = ("latency", "size", "statements", "sql_seconds", "n_plus_one", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.n_plus_one = 0
+        self.statuses = {}
+
+
+class RequestState:
+    __slots__ = ("started", "statements", "sql_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self, n_plus_one_threshold):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, method, status, seconds, size, statements, sql_seconds):
+        """Record one finished request; returns True when it crossed the N+1 threshold"""
+        n_plus_one = statements > self.n_plus_one_threshold
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = EndpointStats()
+            stats.latency.observe(seconds)
+            if size is not None:
+                stats.size.observe(size)
+            stats.statements.observe(statements)
+            stats.sql_seconds += sql_seconds
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if n_plus_one:
+                stats.n_plus_one += 1
+        return n_plus_one
+
+    def render(self):
+        """Return all series in the Prometheus text exposition format"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            lines += [
+                "# HELP http_requests_total Requests handled, by endpoint, method and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (endpoint, method), stats in endpoints:
+                for status, n in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{{_labels(endpoint, method)},status="{status}"}} {n}'
+                    )
+
+            _histogram(lines, "http_request_duration_seconds", "Request latency in seconds.",
+                       endpoints, "latency")
+            _histogram(lines, "http_response_size_bytes", "Response body size in bytes (excludes streamed bodies).",
+                       endpoints, "size")
+            _histogram(lines, "http_request_sql_statements", "SQL statements executed per request.",
+                       endpoints, "statements")
+
+            lines += [
+                "# HELP http_request_sql_seconds_total Time spent executing SQL statements.",
+                "# TYPE http_request_sql_seconds_total counter",
+            ]
+            for (endpoint, method), stats in endpoints:
+                lines.append(f"http_request_sql_seconds_total{{{_labels(endpoint, method)}}} {stats.sql_seconds:.6f}")
+
+            lines += [
+                f"# HELP http_request_n_plus_one_total Requests executing more than "
+                f"{self.n_plus_one_threshold} SQL statements.",
+                "# TYPE http_request_n_plus_one_total counter",
+            ]
+            for (endpoint, method), stats in endpoints:
+                lines.append(f"http_request_n_plus_one_total{{{_labels(endpoint, method)}}} {stats.n_plus_one}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(endpoint, method):
+    return f'endpoint="{_escape(endpoint)}",method="{method}"'
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _histogram(lines, name, help_text, endpoints, attr):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (endpoint, method), stats in endpoints:
+        histogram = getattr(stats, attr)
+        labels = _labels(endpoint, method)
+        for bound, total in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+# SQL accounting: only statements issued on a thread that is serving an
+# instrumented request are counted; everything else costs one attribute lookup.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = getattr(_local, "request", None)
+    if state is not None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = getattr(_local, "request", None)
+    if state is not None:
+        started = conn.info.get("metrics_started")
+        if started:
+            state.sql_seconds += time.perf_counter() - started.pop()
+        state.statements += 1
+
+
+def _handle_error(exception_context):
+    # A failed statement (e.g. an IntegrityError) never reaches after_cursor_execute;
+    # pop its start time so later statements on this pooled connection pair up correctly
+    conn = exception_context.connection
+    started = conn.info.get("metrics_started") if conn is not None else None
+    if started:
+        elapsed = time.perf_counter() - started.pop()
+        state = getattr(_local, "request", None)
+        if state is not None:
+            state.sql_seconds += elapsed
+            state.statements += 1
+
+
+def _before_request():
+    _local.request = RequestState()
+
+
+def _after_request(response):
+    state = getattr(_local, "request", None)
+    _local.request = None
+    if state is None or request.endpoint in (None, "static"):
+        return response
+
+    seconds = time.perf_counter() - state.started
+    size = None if response.is_streamed else response.calculate_content_length()
+    registry = current_app.extensions["metrics"]
+    if registry.record(request.endpoint, request.method, response.status_code, seconds,
+                       size, state.statements, state.sql_seconds):
+        current_app.logger.warning(
+            "Possible N+1: %s %s executed %d SQL statements (threshold %d)",
+            request.method, request.full_path.rstrip("?"), state.statements, registry.n_plus_one_threshold
+        )
+    return response
+
+
+def _teardown_request(exc):
+    # Requests that never reached after_request (unhandled, propagated errors)
+    _local.request = None
+
+
+def get_metrics_registry():
+    return current_app.extensions["metrics"]
+
+
+def init_metrics(app):
+    app.extensions["metrics"] = MetricsRegistry(app.config["METRICS_N_PLUS_ONE_THRESHOLD"])
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,117 @@
+# services/program_cache.py
+#
+# In-process cache of the (small, read-mostly) program catalog. The cache is
+# loaded lazily and tagged with the shared "program" table version (see
+# services/versioning.py). The writing worker invalidates it directly after
+# create/update/delete; other workers notice the bumped version the next time
+# they check it, at most every PROGRAM_CACHE_VERSION_TTL seconds (immediately
+# when an unknown program id is looked up).
+
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from app import db
+from app.models.program import Program
+from app.services.versioning import current_versions
+
+ProgramSnapshot = namedtuple(
+    "ProgramSnapshot",
+    ["id", "name", "description", "start_date", "end_date", "status", "is_deleted", "deleted_at"]
+)
+
+PROGRAM_TABLE = Program.__table__.name
+
+
+class ProgramCache:
+    def __init__(self, version_ttl):
+        self.version_ttl = version_ttl
+        self._lock = threading.Lock()
+        self._programs = None
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.version_checks = 0
+        self.invalidations = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._programs = None
+            self.invalidations += 1
+
+    def _load(self):
+        self.misses += 1
+        version = current_versions([PROGRAM_TABLE])[PROGRAM_TABLE]
+        rows = db.session.query(
+            Program.id, Program.name, Program.description, Program.start_date, Program.end_date,
+            Program.status, Program.is_deleted, Program.deleted_at
+        ).order_by(Program.id).all()
+        self._programs = {row.id: ProgramSnapshot(*row) for row in rows}
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _programs_map(self, force_check=False):
+        with self._lock:
+            if self._programs is None:
+                self._load()
+                return self._programs
+
+            if force_check or time.monotonic() - self._checked_at > self.version_ttl:
+                self.version_checks += 1
+                self._checked_at = time.monotonic()
+                if current_versions([PROGRAM_TABLE])[PROGRAM_TABLE] != self._version:
+                    self._load()
+                    return self._programs
+
+            self.hits += 1
+            return self._programs
+
+    def get(self, program_id):
+        """Return the ProgramSnapshot for an id (int or numeric string), or None"""
+        try:
+            program_id = int(program_id)
+        except (TypeError, ValueError):
+            return None
+        program = self._programs_map().get(program_id)
+        if program is None:
+            # Unknown id: make sure another worker has not just created it
+            program = self._programs_map(force_check=True).get(program_id)
+        return program
+
+    def get_many(self, program_ids):
+        """Return {id: ProgramSnapshot or None} for many ids, with at most one version check"""
+        ids = {}
+        for program_id in program_ids:
+            try:
+                ids[program_id] = int(program_id)
+            except (TypeError, ValueError):
+                ids[program_id] = None
+        programs = self._programs_map()
+        if any(key is not None and key not in programs for key in ids.values()):
+            # Unknown ids: make sure another worker has not just created them
+            programs = self._programs_map(force_check=True)
+        return {program_id: programs.get(key) for program_id, key in ids.items()}
+
+    def all(self):
+        return list(self._programs_map().values())
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "version_checks": self.version_checks,
+            "invalidations": self.invalidations,
+            "version": self._version,
+            "cached_programs": len(self._programs) if self._programs is not None else 0
+        }
+
+
+def get_program_cache():
+    return current_app.extensions["program_cache"]
+
+
+def init_program_cache(app):
+    app.extensions["program_cache"] = ProgramCache(app.config["PROGRAM_CACHE_VERSION_TTL"])
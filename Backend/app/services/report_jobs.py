@@ -0,0 +1,304 @@
+# services/report_jobs.py
+#
+# Background report jobs. POST /api/reports hands the export to a local
+# process pool instead of streaming it from the request thread; the worker
+# writes gzip-compressed CSV into REPORT_DIR (under the instance folder) and
+# keeps a small JSON status file next to it with progress and row counts, so
+# any web worker can answer status and download requests from disk.
+#
+# A job id is a hash of the normalized report parameters plus the client,
+# program and enrollment table versions: submitting the same report again
+# attaches to the queued, running or finished job instead of starting a new
+# one, while any write to those tables yields a fresh id (and a fresh export).
+#
+# A pending job is live while its status file is fresh or while the process
+# holding it (the submitting web worker while queued, the pool worker while
+# running) is still alive on this host, so a long queue wait is not mistaken
+# for a dead job. Each run writes to its own temporary file, and a worker
+# picking up a job that another live run already holds leaves it alone.
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from flask import current_app
+
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.services.versioning import current_versions
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+PENDING_STATES = (QUEUED, RUNNING)
+
+REPORT_TABLES = (Client.__table__.name, Program.__table__.name, Enrollment.__table__.name)
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Seconds between status file writes while a job runs
+PROGRESS_INTERVAL = 0.5
+
+
+def job_key(filters, versions):
+    """Normalized, JSON-safe report parameters plus the data versions they were computed against"""
+    return {
+        "program_ids": sorted(set(filters["program_ids"])),
+        "start_date": filters["start_date"].isoformat() if filters["start_date"] else None,
+        "end_date": filters["end_date"].isoformat() if filters["end_date"] else None,
+        "versions": {name: versions[name] for name in sorted(versions)}
+    }
+
+
+def job_id_for(key):
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def _write_json(path, data):
+    # Write-then-rename so readers never see a half-written status file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def holder_alive(status):
+    """Whether the process holding a pending job (submitter while queued, worker while running) still runs here"""
+    pid = status.get("worker_pid") if status["state"] == RUNNING else status.get("owner_pid")
+    return pid is not None and status.get("host") == socket.gethostname() and _pid_alive(pid)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class ReportJobStore:
+    """Status and result files for report jobs in one directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def status_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def result_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.csv.gz")
+
+    def get(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id or ""):
+            return None
+        return _read_json(self.status_path(job_id))
+
+    def put(self, status):
+        status["updated_at"] = time.time()
+        _write_json(self.status_path(status["id"]), status)
+
+    def prune(self, max_age):
+        """Delete jobs (status and result) that finished more than max_age seconds ago"""
+        cutoff = time.time() - max_age
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            status = self.get(job_id)
+            if status and status["state"] not in PENDING_STATES and status["updated_at"] < cutoff:
+                for path in (self.result_path(job_id), self.status_path(job_id)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                removed += 1
+        return removed
+
+
+_worker_apps = {}
+
+
+def _worker_app(config):
+    # One app (and engine) per pool process, reused across jobs
+    key = json.dumps(config, sort_keys=True)
+    if key not in _worker_apps:
+        from app import create_app
+        _worker_apps[key] = create_app(config)
+    return _worker_apps[key]
+
+
+def run_report_job(config, directory, job_id):
+    """Pool entry point: export one report to <job_id>.csv.gz, updating its status file as it goes"""
+    # The CSV layout lives with the synchronous /generate route; import it here
+    # so the web process does not import routes through this service.
+    from app.routes.generate_routes import iter_report_csv, gzip_chunks, report_query
+
+    store = ReportJobStore(directory)
+    status = store.get(job_id)
+    if status is None or status["state"] == DONE or (
+        status["state"] == RUNNING and status.get("worker_pid") != os.getpid() and holder_alive(status)
+    ):
+        # Finished meanwhile, or another live run holds it (a resubmission after a false stale check)
+        return status
+    key = status["params"]
+    filters = {
+        "program_ids": key["program_ids"],
+        "start_date": date.fromisoformat(key["start_date"]) if key["start_date"] else None,
+        "end_date": date.fromisoformat(key["end_date"]) if key["end_date"] else None
+    }
+
+    # Rewritten on pickup so the job's liveness now follows this worker
+    status.update(state=RUNNING, started_at=time.time(), worker_pid=os.getpid(), host=socket.gethostname())
+    store.put(status)
+    result_path = store.result_path(job_id)
+    tmp_path = f"{result_path}.{os.getpid()}.{time.monotonic_ns()}.tmp"  # per run, never shared
+    try:
+        with _worker_app(config).app_context():
+            status["rows_total"] = db.session.execute(
+                db.select(db.func.count()).select_from(report_query(filters).order_by(None).subquery())
+            ).scalar()
+            store.put(status)
+
+            last_write = time.perf_counter()
+
+            def on_rows(count):
+                nonlocal last_write
+                status["rows_processed"] += count
+                if status["rows_total"]:
+                    status["progress"] = round(min(status["rows_processed"] / status["rows_total"], 1.0), 4)
+                if time.perf_counter() - last_write >= PROGRESS_INTERVAL:
+                    store.put(status)
+                    last_write = time.perf_counter()
+
+            with open(tmp_path, "wb") as out:
+                for chunk in gzip_chunks(iter_report_csv(filters, on_rows=on_rows)):
+                    out.write(chunk)
+            db.session.rollback()
+        os.replace(tmp_path, result_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        status.update(state=FAILED, error=str(e), finished_at=time.time())
+        store.put(status)
+        raise
+
+    status.update(
+        state=DONE, progress=1.0, finished_at=time.time(),
+        size_bytes=os.path.getsize(result_path)
+    )
+    store.put(status)
+    return status
+
+
+class ReportJobManager:
+    def __init__(self, directory, workers, retention, stale_after, worker_config):
+        self.store = ReportJobStore(directory)
+        self.workers = workers
+        self.retention = retention
+        self.stale_after = stale_after
+        self.worker_config = worker_config
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = {}
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def _pool(self):
+        # Created on first use; spawn so workers never inherit the web process's connections
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _is_live(self, status):
+        """Whether a pending job is still being worked on (here, or recently by another process)"""
+        future = self._futures.get(status["id"])
+        if future is not None:
+            return not future.done()
+        return time.time() - status["updated_at"] < self.stale_after or holder_alive(status)
+
+    def submit(self, filters):
+        """Return (status, created): an existing job for the same report and data, or a new queued one"""
+        key = job_key(filters, current_versions(REPORT_TABLES))
+        job_id = job_id_for(key)
+
+        with self._lock:
+            status = self.store.get(job_id)
+            if status and (
+                (status["state"] == DONE and os.path.exists(self.store.result_path(job_id)))
+                or (status["state"] in PENDING_STATES and self._is_live(status))
+            ):
+                self.deduplicated += 1
+                return status, False
+
+            self.store.prune(self.retention)
+            self._futures = {k: f for k, f in self._futures.items() if not f.done()}
+            status = {
+                "id": job_id, "state": QUEUED, "params": key,
+                "progress": 0.0, "rows_processed": 0, "rows_total": None,
+                "created_at": time.time(), "started_at": None, "finished_at": None,
+                "size_bytes": None, "error": None,
+                "owner_pid": os.getpid(), "worker_pid": None, "host": socket.gethostname()
+            }
+            self.store.put(status)
+            self._futures[job_id] = self._pool().submit(
+                run_report_job, self.worker_config, self.store.directory, job_id
+            )
+            self.submitted += 1
+            return status, True
+
+    def get(self, job_id):
+        status = self.store.get(job_id)
+        if status and status["state"] in PENDING_STATES and not self._is_live(status):
+            # The worker went away (restart, crash) without recording an outcome
+            status.update(state=FAILED, error="Report worker stopped before finishing.", finished_at=time.time())
+            self.store.put(status)
+        return status
+
+    def result_path(self, job_id):
+        return self.store.result_path(job_id)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def get_report_jobs():
+    return current_app.extensions["report_jobs"]
+
+
+def init_report_jobs(app):
+    directory = os.path.join(app.instance_path, app.config["REPORT_DIR"])
+    os.makedirs(directory, exist_ok=True)
+
+    # Pool processes build their own app against the same database
+    worker_config = {
+        "SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"],
+        "SLOW_QUERY_LOG_FILE": app.config["SLOW_QUERY_LOG_FILE"],
+        "METRICS_ENABLED": False
+    }
+    app.extensions["report_jobs"] = ReportJobManager(
+        directory,
+        app.config["REPORT_WORKERS"],
+        app.config["REPORT_RETENTION_SECONDS"],
+        app.config["REPORT_STALE_SECONDS"],
+        worker_config
+    )
@@ -0,0 +1,182 @@
+# services/slow_queries.py
+#
+# Slow-query recorder on the app's engine. Every statement that takes longer
+# than SLOW_QUERY_THRESHOLD_MS is captured with its SQL, the shape of its
+# bound parameters (types only - values may hold client data), the route that
+# issued it and, with SLOW_QUERY_EXPLAIN set, the database's plan for it.
+# Entries go into a bounded ring buffer, read by /api/debug/slow-queries, and
+# are appended to a JSONL file (SLOW_QUERY_LOG_FILE, relative to the instance
+# folder) for offline digging.
+#
+# The plan is fetched with a raw DB-API cursor on the same connection, so it
+# runs in the caller's transaction and does not re-enter the engine events.
+# Streaming statements (stream_results / yield_per) are recorded without a
+# plan: their server-side cursor is still open on that connection and an
+# EXPLAIN there would drain or break its pending rows.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+    "postgresql": "EXPLAIN ",
+}
+EXPLAINABLE = ("SELECT", "WITH")
+
+_START_KEY = "slow_query_started"
+
+STREAMING_OPTIONS = ("stream_results", "yield_per")
+
+
+def parameter_shape(parameters, executemany):
+    """Describe bound parameters by type so no values end up in the log"""
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def explain(connection, statement, parameters):
+    """Return the plan rows for a SELECT as a list of dicts, or None when not explainable"""
+    prefix = EXPLAIN_PREFIXES.get(connection.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, (str(v) if v is not None else None for v in row))) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, buffer_size, log_file=None, explain=False):
+        self.threshold = threshold_ms / 1000.0
+        self.log_file = log_file
+        self.explain = explain
+        self.entries = deque(maxlen=buffer_size)
+        self.captured = 0
+        self._lock = threading.Lock()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(_START_KEY)
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if elapsed >= self.threshold:
+            self.record(conn, statement, parameters, executemany, elapsed, context)
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_START_KEY):
+            conn.info[_START_KEY].pop()
+
+    def record(self, conn, statement, parameters, executemany, elapsed, context=None):
+        entry = {
+            "at": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "params": parameter_shape(parameters, executemany),
+            "route": None,
+            "plan": None,
+        }
+        if has_request_context():
+            entry["route"] = {"endpoint": request.endpoint, "method": request.method, "path": request.path}
+        options = context.execution_options if context is not None else {}
+        if self.explain and any(options.get(option) for option in STREAMING_OPTIONS):
+            entry["explain_skipped"] = "streaming"
+        elif self.explain and not executemany:
+            try:
+                entry["plan"] = explain(conn, statement, parameters)
+            except Exception as e:
+                entry["explain_error"] = str(e)
+
+        with self._lock:
+            self.entries.append(entry)
+            self.captured += 1
+            if self.log_file:
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    def offenders(self, sort="max", limit=20):
+        """Group buffered entries by statement text and rank them"""
+        with self._lock:
+            entries = list(self.entries)
+
+        groups = {}
+        for entry in entries:
+            group = groups.get(entry["statement"])
+            if group is None:
+                group = groups[entry["statement"]] = {
+                    "statement": entry["statement"],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": [],
+                }
+            group["count"] += 1
+            group["total_ms"] += entry["duration_ms"]
+            if entry["duration_ms"] >= group["max_ms"]:
+                group["max_ms"] = entry["duration_ms"]
+                group["params"] = entry["params"]
+                group["plan"] = entry["plan"]
+                group["last_seen"] = entry["at"]
+            route = entry["route"] and f'{entry["route"]["method"]} {entry["route"]["endpoint"]}'
+            if route and route not in group["routes"]:
+                group["routes"].append(route)
+
+        key = {"max": "max_ms", "total": "total_ms", "count": "count"}[sort]
+        ranked = sorted(groups.values(), key=lambda g: g[key], reverse=True)[:limit]
+        for group in ranked:
+            group["total_ms"] = round(group["total_ms"], 3)
+            group["mean_ms"] = round(group["total_ms"] / group["count"], 3)
+        return ranked
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+def get_slow_query_log():
+    return current_app.extensions["slow_queries"]
+
+
+def init_slow_queries(app):
+    log_file = app.config["SLOW_QUERY_LOG_FILE"]
+    if log_file:
+        log_file = os.path.join(app.instance_path, log_file)
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    slow_log = SlowQueryLog(
+        app.config["SLOW_QUERY_THRESHOLD_MS"], app.config["SLOW_QUERY_BUFFER_SIZE"], log_file,
+        app.config["SLOW_QUERY_EXPLAIN"]
+    )
+    app.extensions["slow_queries"] = slow_log
+    if not app.config["SLOW_QUERY_LOG_ENABLED"]:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", slow_log._before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", slow_log._after_cursor_execute)
+    event.listen(engine, "handle_error", slow_log._handle_error)
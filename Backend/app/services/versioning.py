@@ -0,0 +1,112 @@
+# services/versioning.py
+#
+# Table-level version counters for conditional GETs. Any flush that inserts,
+# updates or deletes a client, program or enrollment bumps that table's row in
+# table_version inside the same transaction (bulk Core writers call bump()
+# themselves). Views decorated with conditional_get() build a strong ETag from
+# the versions of the tables they read plus the request path and query string,
+# and answer a matching If-None-Match with 304 before running the view.
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.models.table_version import TableVersion
+
+TRACKED_MODELS = (Client, Program, Enrollment)
+
+versions_table = TableVersion.__table__
+
+
+def bump(connection, *table_names):
+    """Increment the version of each table on the given connection (caller's transaction)"""
+    now = datetime.utcnow()
+    for name in sorted(set(table_names)):
+        stmt = (
+            db.update(versions_table)
+            .where(versions_table.c.table_name == name)
+            .values(version=versions_table.c.version + 1, updated_at=now)
+        )
+        if connection.execute(stmt).rowcount:
+            continue
+        # First write to this table: create its counter (another worker may race us)
+        try:
+            with connection.begin_nested():
+                connection.execute(db.insert(versions_table).values(table_name=name, version=1, updated_at=now))
+        except IntegrityError:
+            connection.execute(stmt)
+
+
+def _after_flush(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            changed.add(obj.__table__.name)
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED_MODELS) and session.is_modified(obj, include_collections=False):
+            changed.add(obj.__table__.name)
+    if changed:
+        bump(session.connection(), *changed)
+
+
+def current_versions(table_names):
+    rows = db.session.query(TableVersion.table_name, TableVersion.version).filter(
+        TableVersion.table_name.in_(table_names)
+    )
+    versions = dict.fromkeys(table_names, 0)
+    versions.update(dict(rows.all()))
+    return versions
+
+
+def data_version(*models):
+    """The current versions of `models`' tables as a hashable tuple (for cache keys)"""
+    versions = current_versions([model.__table__.name for model in models])
+    return tuple(sorted(versions.items()))
+
+
+def compute_etag(table_names, extra=""):
+    versions = current_versions(table_names)
+    key = "|".join([request.full_path, extra] + [f"{name}={versions[name]}" for name in sorted(versions)])
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def conditional_get(*models, extra=None):
+    """Answer If-None-Match with 304 while none of `models`' tables have changed.
+
+    `extra` may return an additional version component, or None when the
+    response must not be validated (it is then served without an ETag).
+    """
+    table_names = [model.__table__.name for model in models]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            extra_part = extra() if extra else ""
+            if extra_part is None:
+                return view(*args, **kwargs)
+
+            etag = compute_etag(table_names, extra_part)
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
+
+
+def init_versioning(app):
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
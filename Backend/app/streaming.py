@@ -0,0 +1,42 @@
+from flask import Response, current_app, stream_with_context
+from app import db
+
+# Rows fetched per round trip from the server-side cursor
+STREAM_CHUNK_SIZE = 2000
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json-stream": "application/json",
+}
+
+
+def iter_partitions(stmt, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield lists of rows from a server-side cursor, chunk_size at a time"""
+    result = db.session.execute(stmt, execution_options={"yield_per": chunk_size})
+    for partition in result.partitions():
+        yield partition
+
+
+def iter_ndjson(stmt, to_dict, chunk_size=STREAM_CHUNK_SIZE):
+    dumps = current_app.json.dumps
+    for partition in iter_partitions(stmt, chunk_size):
+        yield "".join(dumps(to_dict(row)) + "\n" for row in partition).encode()
+
+
+def iter_json_array(stmt, to_dict, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield one JSON array, written a chunk of rows at a time"""
+    dumps = current_app.json.dumps
+    yield b"["
+    first = True
+    for partition in iter_partitions(stmt, chunk_size):
+        body = ",".join(dumps(to_dict(row)) for row in partition)
+        if body:
+            yield (body if first else "," + body).encode()
+            first = False
+    yield b"]"
+
+
+def stream_response(stmt, to_dict, fmt, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream `stmt` as NDJSON ("ndjson") or a chunked JSON array ("json-stream")"""
+    chunks = iter_ndjson(stmt, to_dict, chunk_size) if fmt == "ndjson" else iter_json_array(stmt, to_dict, chunk_size)
+    return Response(stream_with_context(chunks), mimetype=STREAM_FORMATS[fmt])
@@ -0,0 +1,66 @@
+# benchmarks/bench_bulk_enrollment.py
+#
+# Enrolls a cohort of clients into several programs through
+# /api/enrollments/bulk and compares statements and wall time with the
+# one-request-per-pair /api/enrollments/create path.
+#
+#   python -m benchmarks.bench_bulk_enrollment [cohort ...]
+
+import sys
+
+from app import db
+from app.models.enrollment import Enrollment
+from app.services.dashboard_stats import reconcile, counter, ENROLLMENTS
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALES = [1_000, 10_000]
+PROGRAM_IDS = [1, 2, 3]
+SEQUENTIAL_LIMIT = 2_000
+
+
+def run(cohort):
+    app = make_app()
+    try:
+        client_ids = populate(app, cohort * 2, n_programs=5, enrollments_per_client=0)
+        client = app.test_client()
+        with app.app_context():
+            reconcile()
+            # Pre-enroll a few so duplicate detection has something to find
+            client.post("/api/enrollments/bulk", json={"client_ids": client_ids[:10], "program_ids": [1]})
+
+            payload = {"client_ids": client_ids[:cohort] + ["missing-client"], "program_ids": PROGRAM_IDS + [999]}
+            with StatementCounter(db.engine) as bulk_q, timed() as bulk_t:
+                response = client.post("/api/enrollments/bulk", json=payload)
+            assert response.status_code == 201, response.get_data(as_text=True)
+            summary = response.get_json()
+            assert summary["created"] == cohort * len(PROGRAM_IDS) - 10
+            assert summary["already_enrolled"] == 10
+            assert summary["missing_clients"] == ["missing-client"]
+            assert summary["missing_programs"] == [999]
+            assert counter(ENROLLMENTS) == Enrollment.query.count()
+
+            # Baseline: one create request per pair, on a disjoint set of clients
+            sequential = client_ids[cohort:cohort + min(cohort, SEQUENTIAL_LIMIT)]
+            with StatementCounter(db.engine) as seq_q, timed() as seq_t:
+                for client_id in sequential:
+                    for program_id in PROGRAM_IDS:
+                        client.post("/api/enrollments/create", json={"client_id": client_id, "program_id": program_id})
+            scale_up = cohort / len(sequential)
+        return bulk_q.count, bulk_t["seconds"], seq_q.count * scale_up, seq_t["seconds"] * scale_up
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    print(f"{'pairs':>8} {'bulk queries':>13} {'bulk s':>7} {'per-pair queries':>17} {'per-pair s':>11}")
+    for cohort in scales:
+        bulk_q, bulk_s, seq_q, seq_s = run(cohort)
+        print(f"{cohort * len(PROGRAM_IDS):>8} {bulk_q:>13} {bulk_s:>7.2f} {seq_q:>17.0f} {seq_s:>11.2f}")
+    print("(per-pair figures are extrapolated beyond "
+          f"{SEQUENTIAL_LIMIT * len(PROGRAM_IDS)} pairs)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+# benchmarks/bench_charts.py
+#
+# Server-side dashboard charts: time for a cold render (Agg, PNG and SVG) of
+# the distribution and trend charts against a repeated view served from the
+# chart cache, and check that an enrollment write makes the next view render
+# again while unchanged data keeps hitting the cache.
+#
+#   python -m benchmarks.bench_charts [scale]
+
+import statistics
+import sys
+
+from app import db
+from app.services.charts import get_chart_cache
+from app.services.dashboard_stats import reconcile
+from app.services.enrollment_timeseries import rebuild as rebuild_timeseries
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALE = 50_000
+WARM_REQUESTS = 50
+
+CHARTS = [
+    ("distribution", "png", "/api/dashboard/charts/distribution.png"),
+    ("distribution", "svg", "/api/dashboard/charts/distribution.svg"),
+    ("trend", "png", "/api/dashboard/charts/trend.png?interval=week&start=2024-01-01&end=2024-12-31"),
+    ("trend", "svg", "/api/dashboard/charts/trend.svg?interval=week&start=2024-01-01&end=2024-12-31"),
+]
+SIGNATURES = {"png": b"\x89PNG", "svg": b"<?xml"}
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app()
+    try:
+        populate(app, scale, n_programs=20, enrollments_per_client=2)
+        with app.app_context():
+            rebuild_timeseries()
+            reconcile()
+            db.session.remove()
+        client = app.test_client()
+        with app.app_context():
+            cache = get_chart_cache()
+
+        print(f"{'chart':<18} {'cold ms':>9} {'cached ms':>10} {'speedup':>8} {'bytes':>9}")
+        for kind, fmt, url in CHARTS:
+            cache.clear()
+            with timed() as cold:
+                body = client.get(url).data
+            assert body.startswith(SIGNATURES[fmt]), body[:40]
+
+            samples = []
+            for _ in range(WARM_REQUESTS):
+                with timed() as t:
+                    assert client.get(url).data == body
+                samples.append(t["seconds"] * 1000)
+            warm = statistics.median(samples)
+            print(f"{kind + '.' + fmt:<18} {cold['seconds'] * 1000:>9.1f} {warm:>10.2f} "
+                  f"{cold['seconds'] * 1000 / warm:>7.0f}x {len(body):>9}")
+
+        # Unchanged data: every chart is a cache hit; after a write, the next view renders
+        client.get(CHARTS[0][2])
+        misses = cache.misses
+        client.get(CHARTS[0][2])
+        assert cache.misses == misses
+        new_client = client.post("/api/clients/", json={
+            "full_name": "Chart Probe", "gender": "Female", "date_of_birth": "1990-01-01"
+        }).get_json()["id"]
+        response = client.post("/api/enrollments/create", json={"client_id": new_client, "program_id": 20})
+        assert response.status_code == 201, response.get_json()
+        client.get(CHARTS[0][2])
+        assert cache.misses == misses + 1
+
+        stats = client.get("/api/dashboard/charts/stats").get_json()
+        print(f"cache: {stats}")
+        print("OK: repeated views served from the cache, writes trigger a re-render")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,52 @@
+# benchmarks/bench_client_batch.py
+#
+# Resolving N client ids: N requests to /api/clients/<id>/ versus one
+# /api/clients/batch lookup (GET for short lists, POST for long ones).
+#
+#   python -m benchmarks.bench_client_batch [scale]
+
+import sys
+
+from app import db
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALE = 100_000
+BATCH_SIZES = [10, 100, 1000, 4000]
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app()
+    try:
+        client_ids = populate(app, scale, n_programs=10)
+        client = app.test_client()
+        with app.app_context():
+            client.get(f"/api/clients/{client_ids[0]}/")  # warm up
+            print(f"{scale} clients")
+            print(f"{'ids':>6} {'one-by-one ms':>14} {'queries':>8} {'batch ms':>9} {'queries':>8} {'speedup':>8}")
+            for size in BATCH_SIZES:
+                ids = client_ids[-size:]
+                with StatementCounter(db.engine) as single_q, timed() as single_t:
+                    singles = [client.get(f"/api/clients/{client_id}/").get_json() for client_id in ids]
+
+                wanted = ids + ["missing-id"]
+                with StatementCounter(db.engine) as batch_q, timed() as batch_t:
+                    if size <= 100:
+                        response = client.get("/api/clients/batch?ids=" + ",".join(wanted))
+                    else:
+                        response = client.post("/api/clients/batch", json={"ids": wanted})
+                body = response.get_json()
+
+                assert response.status_code == 200
+                assert body["missing"] == ["missing-id"]
+                assert [body["clients"][client_id] for client_id in ids] == singles
+                print(f"{size:>6} {single_t['seconds'] * 1000:>14.1f} {single_q.count:>8} "
+                      f"{batch_t['seconds'] * 1000:>9.1f} {batch_q.count:>8} "
+                      f"{single_t['seconds'] / batch_t['seconds']:>7.0f}x")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,208 @@
+# benchmarks/bench_client_dedupe.py
+#
+# Duplicate client detection at scale. Loads seed.py's synthetic clients plus
+# about 1% injected duplicates (a typo in a name, swapped name order, the
+# phone reformatted or missing, day and month of birth swapped), then:
+#   - runs the blocking-key scan and reports time, blocks and comparisons
+#   - measures recall against the injected pairs
+#   - extrapolates an all-pairs comparison from the per-pair scoring cost
+#   - calls /api/clients/duplicates (202 while scanning, then cached) and
+#     merges one injected pair through /api/clients/<id>/merge
+#
+#   python -m benchmarks.bench_client_dedupe [clients]
+
+import random
+import sys
+import time
+import uuid
+from datetime import date
+
+from app import db
+from app.models.client import Client
+from app.models.enrollment import Enrollment
+from app.models.program import Program
+from app.services import client_dedupe
+from app.services.versioning import bump
+from benchmarks.common import make_app, timed, cleanup
+from seed import SHARD_SIZE, generate_shard
+
+DEFAULT_SCALE = 1_000_000
+DUPLICATE_RATE = 0.01
+SCORING_SAMPLE = 200_000
+CHUNK_SIZE = 5000
+SEED = 42
+
+
+def typo(name, rng):
+    """Swap two adjacent letters or drop one in a random token"""
+    tokens = name.split()
+    i = rng.randrange(len(tokens))
+    token = tokens[i]
+    if len(token) > 3:
+        j = rng.randrange(1, len(token) - 1)
+        if rng.random() < 0.5:
+            token = token[:j] + token[j + 1] + token[j] + token[j + 2:]
+        else:
+            token = token[:j] + token[j + 1:]
+    tokens[i] = token
+    return " ".join(tokens)
+
+
+def reformat_phone(phone, rng):
+    if phone is None or rng.random() < 0.3:
+        return None
+    digits = "".join(ch for ch in phone if ch.isdigit())[-9:]
+    return rng.choice([f"+254{digits}", f"0{digits[:3]} {digits[3:6]} {digits[6:]}", f"0{digits}"])
+
+
+def make_duplicate(client, rng):
+    """A copy of `client` with one or two data-entry differences"""
+    duplicate = dict(client, id=str(uuid.UUID(int=rng.getrandbits(128), version=4)))
+    for change in rng.sample(["typo", "order", "phone", "dob"], rng.choice([1, 2])):
+        if change == "typo":
+            duplicate["full_name"] = typo(duplicate["full_name"], rng)
+        elif change == "order":
+            duplicate["full_name"] = " ".join(reversed(duplicate["full_name"].split()))
+        elif change == "phone":
+            duplicate["phone_number"] = reformat_phone(duplicate["phone_number"], rng)
+        elif change == "dob":
+            dob = duplicate["date_of_birth"]
+            if dob.day <= 12 and dob.day != dob.month:
+                duplicate["date_of_birth"] = date(dob.year, dob.day, dob.month)
+    return duplicate
+
+
+def load(app, scale):
+    """Insert `scale` seed clients plus injected duplicates; returns the (original, duplicate) id pairs"""
+    rng = random.Random(SEED)
+    truth = []
+    with app.app_context():
+        for shard in range(-(-scale // SHARD_SIZE)):
+            clients, _ = generate_shard(shard, scale, [], 0, SEED)
+            duplicates = []
+            for client in clients:
+                if rng.random() < DUPLICATE_RATE:
+                    duplicate = make_duplicate(client, rng)
+                    duplicates.append(duplicate)
+                    truth.append((client["id"], duplicate["id"]))
+            rows = clients + duplicates
+            for start in range(0, len(rows), CHUNK_SIZE):
+                db.session.execute(db.insert(Client), rows[start:start + CHUNK_SIZE])
+        db.session.commit()
+    return truth
+
+
+def all_pairs_estimate(records, n):
+    """Seconds to score every pair of n clients, from the cost of scoring random pairs"""
+    rng = random.Random(SEED)
+    pairs = [(rng.choice(records), rng.choice(records)) for _ in range(SCORING_SAMPLE)]
+    started = time.perf_counter()
+    for a, b in pairs:
+        client_dedupe.score_pair(a, b)
+    per_pair = (time.perf_counter() - started) / SCORING_SAMPLE
+    return per_pair, per_pair * n * (n - 1) / 2
+
+
+def check_merge(app, client, survivor_id, duplicate_id):
+    with app.app_context():
+        db.session.execute(db.insert(Program), [
+            {"id": 1, "name": "Program 1", "status": "Active", "is_deleted": False, "start_date": date(2024, 1, 1)},
+            {"id": 2, "name": "Program 2", "status": "Active", "is_deleted": False, "start_date": date(2024, 1, 1)},
+        ])
+        db.session.execute(db.insert(Enrollment), [
+            {"client_id": survivor_id, "program_id": 1, "enrollment_date": date(2025, 5, 1)},
+            {"client_id": duplicate_id, "program_id": 1, "enrollment_date": date(2024, 3, 1)},
+            {"client_id": duplicate_id, "program_id": 2, "enrollment_date": date(2025, 1, 1)},
+        ])
+        db.session.commit()
+        bump(db.session.connection(), "enrollment", "program")
+        db.session.commit()
+
+    with timed() as t:
+        response = client.post(f"/api/clients/{survivor_id}/merge", json={"duplicate_ids": [duplicate_id]})
+    assert response.status_code == 200, response.get_json()
+    summary = response.get_json()
+    assert summary["enrollments_moved"] == 1 and summary["enrollments_dropped"] == 1, summary
+
+    with app.app_context():
+        assert db.session.get(Client, duplicate_id) is None
+        enrollments = {e.program_id: e.enrollment_date for e in Enrollment.query.filter_by(client_id=survivor_id)}
+        assert enrollments == {1: date(2024, 3, 1), 2: date(2025, 1, 1)}, enrollments
+    assert client.post(f"/api/clients/{survivor_id}/merge", json={"duplicate_ids": [duplicate_id]}).status_code == 404
+    assert client.post(f"/api/clients/{survivor_id}/merge", json={"duplicate_ids": [survivor_id]}).status_code == 400
+    return t["seconds"]
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app(DEDUPE_WAIT_SECONDS=0.05)
+    try:
+        with timed() as t:
+            truth = load(app, scale)
+        n = scale + len(truth)
+        print(f"Loaded {n} clients ({len(truth)} injected duplicates) in {t['seconds']:.1f}s")
+
+        with app.app_context():
+            scan = client_dedupe.DuplicateScan(version=None).run()
+            records = [client_dedupe.ScanRecord(*row) for row in db.session.execute(
+                db.select(Client.id, Client.full_name, Client.date_of_birth, Client.phone_normalized, Client.gender)
+                .limit(50_000)
+            )]
+        stats = scan.stats()
+        per_pair, naive_seconds = all_pairs_estimate(records, n)
+
+        found_kept = sum(1 for a, b in truth if (min(a, b), max(a, b)) in scan.pairs)
+        group_of = {}
+        for number, group in enumerate(scan.groups(client_dedupe.DEFAULT_MIN_SCORE)):
+            for client_id in group["client_ids"]:
+                group_of[client_id] = number
+        found_default = sum(1 for a, b in truth if a in group_of and group_of.get(a) == group_of.get(b))
+        truth_keys = {(min(a, b), max(a, b)) for a, b in truth}
+        other_pairs = sum(1 for key in scan.pairs if key not in truth_keys)
+
+        client = app.test_client()
+        with app.app_context():
+            bump(db.session.connection(), "client")
+            db.session.commit()
+        with timed() as first:
+            response = client.get("/api/clients/duplicates")
+        first_status = response.status_code
+        polls = 0
+        while response.status_code == 202:
+            polls += 1
+            time.sleep(0.5)
+            response = client.get("/api/clients/duplicates")
+        assert response.status_code == 200, response.status_code
+        body = response.get_json()
+        with timed() as cached:
+            again = client.get("/api/clients/duplicates?offset=50")
+        assert again.status_code == 200
+
+        survivor_id, duplicate_id = truth[0]
+        merge_seconds = check_merge(app, client, survivor_id, duplicate_id)
+
+        print()
+        print(f"{'blocking scan':<34} {stats['seconds']:>10.2f} s")
+        print(f"{'blocks / oversized':<34} {stats['blocks']:>10} / {stats['oversized_blocks']}")
+        print(f"{'comparisons (blocked)':<34} {stats['comparisons']:>10}")
+        print(f"{'comparisons (all pairs)':<34} {n * (n - 1) // 2:>10}")
+        print(f"{'score_pair cost':<34} {per_pair * 1e6:>10.2f} us")
+        print(f"{'all-pairs estimate':<34} {naive_seconds / 3600:>10.1f} h")
+        print(f"{'pairs kept (score >= 0.7)':<34} {stats['pairs']:>10} ({other_pairs} not injected)")
+        print(f"{'recall at 0.7':<34} {found_kept / len(truth):>10.1%}")
+        print(f"{'recall at 0.8 (grouped)':<34} {found_default / len(truth):>10.1%}")
+        print(f"{'GET duplicates (first)':<34} {first['seconds'] * 1000:>10.1f} ms  {first_status}, {polls} polls")
+        print(f"{'GET duplicates (cached page)':<34} {cached['seconds'] * 1000:>10.1f} ms  {body['total']} groups")
+        print(f"{'POST merge':<34} {merge_seconds * 1000:>10.1f} ms")
+
+        assert stats["comparisons"] < n * 10
+        assert found_kept / len(truth) >= 0.9
+        if n > 100_000:
+            assert first_status == 202
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,102 @@
+# benchmarks/bench_client_import.py
+#
+# Uploads synthetic registries to /api/clients/bulk as NDJSON and CSV and
+# reports throughput and peak Python heap, checking that bad rows are
+# reported and good rows land in the client table, search index and
+# dashboard counters.
+#
+#   python -m benchmarks.bench_client_import [rows ...]
+
+import io
+import json
+import random
+import sys
+import tracemalloc
+
+from app.models.client import Client
+from app.services import client_search
+from app.services.dashboard_stats import counter, reconcile, CLIENTS
+from benchmarks.common import make_app, cleanup, FIRST_NAMES, LAST_NAMES
+
+DEFAULT_SCALES = [50_000, 200_000]
+BAD_ROW_EVERY = 1000
+
+
+def records(n, seed=7):
+    rng = random.Random(seed)
+    for i in range(n):
+        record = {
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "gender": rng.choice(["Male", "Female"]),
+            "date_of_birth": f"{rng.randint(1950, 2010)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "phone_number": f"07{rng.randrange(10 ** 8):08d}",
+            "address": "Nairobi, Kenya",
+        }
+        if i % BAD_ROW_EVERY == BAD_ROW_EVERY - 1:
+            record["date_of_birth"] = "not-a-date"
+        yield record
+
+
+def ndjson_body(n):
+    return "".join(json.dumps(r) + "\n" for r in records(n)).encode()
+
+
+def csv_body(n):
+    fields = ["full_name", "gender", "date_of_birth", "phone_number", "address"]
+    lines = [",".join(fields)]
+    lines += [",".join(f'"{r[f]}"' for f in fields) for r in records(n)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def upload(client, body, content_type, trace=False):
+    if trace:
+        tracemalloc.start()
+    try:
+        response = client.post("/api/clients/bulk", data=io.BytesIO(body), content_type=content_type)
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json(), peak
+
+
+def run(scale):
+    results = []
+    for label, body, content_type in [
+        ("ndjson", ndjson_body(scale), "application/x-ndjson"),
+        ("csv", csv_body(scale), "text/csv"),
+    ]:
+        # First pass untraced for throughput, second pass under tracemalloc for peak heap
+        measured = []
+        for trace in (False, True):
+            app = make_app()
+            try:
+                client = app.test_client()
+                with app.app_context():
+                    reconcile()
+                    report, peak = upload(client, body, content_type, trace)
+                    expected_bad = scale // BAD_ROW_EVERY
+                    assert report["rejected"] == expected_bad, report["rejected"]
+                    assert report["inserted"] == scale - expected_bad
+                    assert Client.query.count() == report["inserted"] == counter(CLIENTS)
+                    assert client_search.search("mwangi", 5)
+                    measured.append((report, peak))
+            finally:
+                cleanup(app)
+        (report, _), (_, peak) = measured
+        results.append((label, len(body), report["rows_per_second"], peak, report["elapsed_seconds"]))
+    return results
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    print(f"{'rows':>9} {'format':<7} {'MiB':>6} {'rows/s':>9} {'peak MiB':>9} {'seconds':>8}")
+    for scale in scales:
+        for label, size, rate, peak, seconds in run(scale):
+            print(f"{scale:>9} {label:<7} {size / 2 ** 20:>6.1f} {rate:>9.0f} {peak / 2 ** 20:>9.1f} {seconds:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,66 @@
+# benchmarks/bench_client_profile.py
+#
+# /api/clients/<id>/profile must stay at a fixed number of statements no
+# matter how many enrollments a client has: one for the client, one for its
+# enrollments joined to their programs (plus the ETag version read). Compares
+# it with building the same view through the lazy relationships.
+#
+#   python -m benchmarks.bench_client_profile [scale]
+
+import sys
+
+from app import db
+from app.models.client import Client
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALE = 10_000
+N_PROGRAMS = 50
+ENROLLMENT_COUNTS = [1, 10, 50]
+
+# Client + enrollments/programs, and the table_version read for the ETag
+PROFILE_STATEMENTS = 2
+ETAG_STATEMENTS = 1
+
+
+def lazy_profile(client_id):
+    client = db.session.get(Client, client_id)
+    return [(e.id, e.program.name) for e in client.enrollments]
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    print(f"{'enrollments':>11} {'profile ms':>11} {'queries':>8} {'lazy ms':>8} {'queries':>8}")
+    for per_client in ENROLLMENT_COUNTS:
+        app = make_app()
+        try:
+            client_ids = populate(app, scale, N_PROGRAMS, enrollments_per_client=per_client)
+            client = app.test_client()
+            with app.app_context():
+                client.get(f"/api/clients/{client_ids[1]}/profile")  # warm up
+                client_id = client_ids[0]
+
+                with StatementCounter(db.engine) as profile_q, timed() as profile_t:
+                    response = client.get(f"/api/clients/{client_id}/profile")
+                body = response.get_json()
+                assert response.status_code == 200
+                assert len(body["enrollments"]) == per_client
+                assert all(e["program_name"] for e in body["enrollments"])
+                assert profile_q.count == PROFILE_STATEMENTS + ETAG_STATEMENTS, profile_q.statements
+
+                db.session.expunge_all()
+                with StatementCounter(db.engine) as lazy_q, timed() as lazy_t:
+                    lazy = lazy_profile(client_id)
+                assert sorted(lazy) == sorted((e["id"], e["program_name"]) for e in body["enrollments"])
+
+                print(f"{per_client:>11} {profile_t['seconds'] * 1000:>11.2f} {profile_q.count:>8} "
+                      f"{lazy_t['seconds'] * 1000:>8.2f} {lazy_q.count:>8}")
+
+            assert client.get("/api/clients/unknown/profile").status_code == 404
+        finally:
+            cleanup(app)
+    print(f"OK: profile uses {PROFILE_STATEMENTS + ETAG_STATEMENTS} statements at every enrollment count")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+# benchmarks/bench_client_search.py
+#
+# Compares the trigram index behind /api/clients/search against the previous
+# ilike('%q%') scan, then looks up stored numbers written in other formats
+# ("+254 ...", spaced, without the trunk 0), which go through the indexed
+# client.phone_normalized column. The default scale is 1M clients (building
+# it takes a few minutes); pass smaller scales for a quick run:
+#
+#   python -m benchmarks.bench_client_search [scale ...]
+
+import sys
+
+from app import db
+from app.models.client import Client
+from app.services import client_search
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALES = [1_000_000]
+QUERIES = ["mwangi", "grace kam", "ali", "jo", "0712", "4242", "zzzz"]
+REPEATS = 3
+PHONE_SAMPLES = 20
+
+
+def phone_formats(phone):
+    """The same national number ("07xxxxxxxx") as users type it"""
+    digits = phone[1:]
+    return {
+        "national": phone,
+        "international": f"+254{digits}",
+        "spaced": f"+254 {digits[:3]} {digits[3:6]} {digits[6:]}",
+        "no trunk 0": digits,
+        "prefix": f"+254{digits[:5]}",
+    }
+
+
+def ilike_search(query, limit=None):
+    """The previous implementation (optionally with a LIMIT for a fairer comparison)"""
+    stmt = Client.query.filter(
+        (Client.id.ilike(f"%{query}%")) |
+        (Client.full_name.ilike(f"%{query}%")) |
+        (Client.phone_number.ilike(f"%{query}%"))
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt.all()
+
+
+def best_of(fn):
+    best = None
+    for _ in range(REPEATS):
+        with timed() as t:
+            result = fn()
+        best = t["seconds"] if best is None else min(best, t["seconds"])
+    return best, result
+
+
+def run(scale):
+    app = make_app()
+    try:
+        with timed() as load:
+            populate(app, scale, n_programs=1, enrollments_per_client=0)
+        with app.app_context():
+            with timed() as build:
+                client_search.rebuild_index()
+            print(f"{scale} clients: load {load['seconds']:.1f}s, index build {build['seconds']:.1f}s")
+            print(f"{'query':<12} {'ilike ms':>9} {'ilike+limit ms':>15} {'index ms':>9} {'matches':>8} {'returned':>9}")
+
+            for query in QUERIES:
+                ilike_time, ilike_rows = best_of(lambda: ilike_search(query))
+                limited_time, _ = best_of(lambda: ilike_search(query, client_search.DEFAULT_RESULT_LIMIT))
+                index_time, index_rows = best_of(lambda: client_search.search(query))
+                db.session.expunge_all()
+
+                expected = {c.id for c in ilike_rows}
+                returned = {c.id for c in index_rows}
+                # The index matches ids by prefix only, so ignore pure id-substring hits
+                assert returned <= expected, query
+                if len(expected) <= client_search.DEFAULT_RESULT_LIMIT:
+                    missing = {
+                        c.id for c in ilike_rows
+                        if c.id not in returned and query.lower() not in c.id
+                    }
+                    assert not missing, (query, missing)
+
+                print(f"{query:<12} {ilike_time * 1000:>9.1f} {limited_time * 1000:>15.1f} "
+                      f"{index_time * 1000:>9.1f} {len(expected):>8} {len(returned):>9}")
+
+            samples = db.session.query(Client.id, Client.phone_number).limit(PHONE_SAMPLES).all()
+            print(f"\n{'phone format':<14} {'ilike ms':>9} {'ilike found':>12} {'index ms':>9} {'index found':>12}")
+            for label in phone_formats(samples[0].phone_number):
+                ilike_total = index_total = 0.0
+                ilike_found = index_found = 0
+                for client_id, phone in samples:
+                    query = phone_formats(phone)[label]
+                    ilike_time, ilike_rows = best_of(lambda: ilike_search(query, client_search.DEFAULT_RESULT_LIMIT))
+                    index_time, index_rows = best_of(lambda: client_search.search(query))
+                    db.session.expunge_all()
+                    ilike_total += ilike_time
+                    index_total += index_time
+                    ilike_found += client_id in {c.id for c in ilike_rows}
+                    index_found += client_id in {c.id for c in index_rows}
+                    if label != "prefix":
+                        assert client_id in {c.id for c in index_rows}, (label, query)
+                print(f"{label:<14} {ilike_total / len(samples) * 1000:>9.2f} {ilike_found:>12} "
+                      f"{index_total / len(samples) * 1000:>9.2f} {index_found:>12}")
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    for scale in scales:
+        run(scale)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+# benchmarks/bench_conditional_get.py
+#
+# For each polled endpoint, compares a full GET with a revalidation that
+# sends the previous ETag in If-None-Match: the 304 path should only read
+# the version counters. Also checks that a write invalidates the ETag.
+#
+#   python -m benchmarks.bench_conditional_get [scale]
+
+import sys
+
+from app import db
+from app.models.program import Program
+from app.services.dashboard_stats import reconcile
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALE = 50_000
+ENDPOINTS = [
+    "/api/clients/?page=3",
+    "/api/clients/search?q=mwangi",
+    "/api/programs/",
+    "/api/enrollments/",
+    "/api/enrollments/eligible-clients",
+    "/api/dashboard",
+]
+
+
+def measure(client, url, headers=None):
+    with StatementCounter(db.engine) as counter, timed() as t:
+        response = client.get(url, headers=headers or {})
+    return response, counter.count, t["seconds"]
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app()
+    try:
+        populate(app, scale, n_programs=10, enrollments_per_client=2)
+        client = app.test_client()
+        with app.app_context():
+            reconcile()
+            print(f"{scale} clients")
+            print(f"{'endpoint':<36} {'200 ms':>8} {'queries':>8} {'304 ms':>8} {'queries':>8}")
+            for url in ENDPOINTS:
+                full, full_q, full_s = measure(client, url)
+                assert full.status_code == 200 and full.headers.get("ETag"), url
+                cached, cached_q, cached_s = measure(client, url, {"If-None-Match": full.headers["ETag"]})
+                assert cached.status_code == 304, (url, cached.status_code)
+                print(f"{url:<36} {full_s * 1000:>8.1f} {full_q:>8} {cached_s * 1000:>8.2f} {cached_q:>8}")
+
+            etag = client.get("/api/programs/").headers["ETag"]
+            program = db.session.get(Program, 1)
+            program.description = "changed"
+            db.session.commit()
+            after = client.get("/api/programs/", headers={"If-None-Match": etag})
+            assert after.status_code == 200 and after.headers["ETag"] != etag
+            print("OK: writes invalidate ETags")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
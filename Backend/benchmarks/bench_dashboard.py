@@ -0,0 +1,101 @@
+# benchmarks/bench_dashboard.py
+#
+# Compares /api/dashboard served from the rollup table against the previous
+# full COUNT(*) + GROUP BY implementation, and checks that incremental
+# maintenance keeps the counters equal to the real table counts.
+#
+#   python -m benchmarks.bench_dashboard [scale ...]
+
+import re
+import sys
+
+from app import db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+from app.services.dashboard_stats import reconcile
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALES = [10_000, 100_000]
+N_PROGRAMS = 20
+REPEATS = 20
+LARGE_TABLES = re.compile(r"\bFROM (client|enrollment)\b", re.IGNORECASE)
+
+
+def full_scan_dashboard():
+    """The previous implementation, kept here as the baseline"""
+    totals = (Program.query.count(), Client.query.count(), Enrollment.query.count())
+    distribution = (
+        db.session.query(Program.name, db.func.count(Enrollment.id))
+        .join(Enrollment, Enrollment.program_id == Program.id)
+        .group_by(Program.name)
+        .all()
+    )
+    return totals, distribution
+
+
+def check_incremental(app):
+    client = app.test_client()
+    with app.app_context():
+        client_id = Client.query.first().id
+        program = Program(name="Bench Program", status="Active")
+        db.session.add(program)
+        db.session.commit()
+
+        response = client.post("/api/enrollments/create", json={"client_id": client_id, "program_id": program.id})
+        assert response.status_code == 201, response.get_data(as_text=True)
+        enrollment = Enrollment.query.filter_by(client_id=client_id, program_id=program.id).first()
+        enrollment.program_id = 1
+        db.session.commit()
+
+        data = client.get("/api/dashboard").get_json()
+        assert data["totalPrograms"] == Program.query.count()
+        assert data["totalClients"] == Client.query.count()
+        assert data["totalEnrollments"] == Enrollment.query.count()
+        expected = dict(
+            db.session.query(Program.name, db.func.count(Enrollment.id))
+            .join(Enrollment, Enrollment.program_id == Program.id)
+            .group_by(Program.name)
+            .all()
+        )
+        served = {item["programName"]: item["enrollmentCount"] for item in data["enrollmentData"]}
+        assert served == expected, (served, expected)
+
+
+def run(scale):
+    app = make_app()
+    try:
+        populate(app, scale, N_PROGRAMS, enrollments_per_client=3)
+        client = app.test_client()
+        with app.app_context():
+            reconcile()
+
+            with timed() as baseline:
+                for _ in range(REPEATS):
+                    full_scan_dashboard()
+
+            with StatementCounter(db.engine) as counter, timed() as rollup:
+                for _ in range(REPEATS):
+                    response = client.get("/api/dashboard")
+                    assert response.status_code == 200
+            touched = [s for s in counter.statements if LARGE_TABLES.search(s)]
+            assert not touched, touched
+
+        check_incremental(app)
+        return baseline["seconds"] / REPEATS, rollup["seconds"] / REPEATS, counter.count // REPEATS
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    print(f"{'clients':>10} {'full scan ms':>13} {'rollup ms':>10} {'queries':>8}")
+    for scale in scales:
+        baseline, rollup, queries = run(scale)
+        print(f"{scale:>10} {baseline * 1000:>13.2f} {rollup * 1000:>10.2f} {queries:>8}")
+    print("OK: rollup served without touching client/enrollment and matches real counts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,65 @@
+# benchmarks/bench_eligible_clients.py
+#
+# Shows that /api/enrollments/eligible-clients issues a constant number of SQL
+# statements regardless of how many clients exist (the old implementation ran
+# one enrollment query per client).
+#
+#   python -m benchmarks.bench_eligible_clients [scale ...]
+
+import sys
+
+from app import db
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALES = [1_000, 10_000, 50_000]
+N_PROGRAMS = 5
+
+
+def run(scale):
+    app = make_app()
+    try:
+        populate(app, scale, N_PROGRAMS, enrollments_per_client=2)
+        client = app.test_client()
+        results = {}
+        with app.app_context():
+            # Warm per-process caches (program catalog) so only steady-state queries are counted
+            client.get("/api/enrollments/eligible-clients?limit=1")
+            for label, url in [
+                ("all programs", "/api/enrollments/eligible-clients?limit=500"),
+                ("program_id=1", "/api/enrollments/eligible-clients?program_id=1&limit=500"),
+            ]:
+                with StatementCounter(db.engine) as counter, timed() as t:
+                    response = client.get(url)
+                assert response.status_code == 200, response.get_data(as_text=True)
+                # Follow one cursor to make sure paging costs the same
+                next_cursor = response.headers.get("X-Next-Cursor")
+                if next_cursor:
+                    with StatementCounter(db.engine) as page_counter:
+                        page = client.get(f"{url}&cursor={next_cursor}")
+                    assert page.status_code == 200
+                    assert page_counter.count == counter.count
+                results[label] = (counter.count, t["seconds"], len(response.get_json()))
+        return results
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    counts = set()
+    print(f"{'clients':>10}  {'variant':<14} {'queries':>7} {'ms':>9} {'rows':>6}")
+    for scale in scales:
+        for label, (queries, seconds, rows) in run(scale).items():
+            counts.add((label, queries))
+            print(f"{scale:>10}  {label:<14} {queries:>7} {seconds * 1000:>9.1f} {rows:>6}")
+
+    variants = {label for label, _ in counts}
+    if len(counts) != len(variants):
+        print("FAIL: statement count changed with client count")
+        return 1
+    print("OK: statement count is constant across scales")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
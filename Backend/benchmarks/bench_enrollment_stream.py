@@ -0,0 +1,66 @@
+# benchmarks/bench_enrollment_stream.py
+#
+# Peak Python heap (tracemalloc) while consuming /api/enrollments in the
+# default materialized mode versus ?format=ndjson and ?format=json-stream.
+# Streaming peaks should stay constant as the enrollment count grows.
+#
+#   python -m benchmarks.bench_enrollment_stream [scale ...]
+
+import json
+import sys
+import tracemalloc
+
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALES = [50_000, 200_000, 500_000]
+ENROLLMENTS_PER_CLIENT = 5
+
+
+def consume(client, url):
+    tracemalloc.start()
+    try:
+        with timed() as t:
+            response = client.get(url, buffered=False)
+            assert response.status_code == 200
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, peak, t["seconds"]
+
+
+def run(scale):
+    app = make_app()
+    try:
+        populate(app, scale // ENROLLMENTS_PER_CLIENT, n_programs=10, enrollments_per_client=ENROLLMENTS_PER_CLIENT)
+        client = app.test_client()
+        with app.app_context():
+            # Sanity checks on the formats and the row limit
+            ndjson = client.get("/api/enrollments/?format=ndjson&limit=10").get_data(as_text=True).splitlines()
+            assert len(ndjson) == 10 and all(json.loads(line)["id"] for line in ndjson)
+            array = json.loads(client.get("/api/enrollments/search?program_id=1&format=json-stream").get_data())
+            assert array and all(e["program_id"] == 1 for e in array)
+
+            return [
+                (mode, *consume(client, url)) for mode, url in [
+                    ("all()", "/api/enrollments/"),
+                    ("ndjson", "/api/enrollments/?format=ndjson"),
+                    ("json-stream", "/api/enrollments/?format=json-stream"),
+                ]
+            ]
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    print(f"{'rows':>9} {'mode':<12} {'MiB out':>8} {'peak MiB':>9} {'seconds':>8}")
+    for scale in scales:
+        for mode, size, peak, seconds in run(scale):
+            print(f"{scale:>9} {mode:<12} {size / 2 ** 20:>8.1f} {peak / 2 ** 20:>9.1f} {seconds:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,81 @@
+# benchmarks/bench_metrics.py
+#
+# Overhead of the per-endpoint request metrics: the same request mix is
+# replayed against the app with METRICS_ENABLED off and on, then the
+# /api/metrics exposition is checked for the expected series.
+#
+#   python -m benchmarks.bench_metrics [scale] [rounds]
+
+import statistics
+import sys
+
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALE = 20_000
+DEFAULT_ROUNDS = 200
+PASSES = 3
+
+
+def replay(app, urls, rounds):
+    client = app.test_client()
+    for url in urls:
+        client.get(url)  # warm caches and the connection pool
+    samples = []
+    for _ in range(rounds):
+        for url in urls:
+            with timed() as t:
+                response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            samples.append(t["seconds"])
+    return sorted(samples)
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    rounds = int(argv[1]) if len(argv) > 1 else DEFAULT_ROUNDS
+
+    plain = make_app(METRICS_ENABLED=False)
+    try:
+        client_ids = populate(plain, scale, n_programs=10, enrollments_per_client=2)
+        instrumented = make_app(plain.bench_db_path)
+        urls = [
+            "/api/clients/?page=3",
+            f"/api/clients/{client_ids[0]}/",
+            "/api/programs/",
+            "/api/programs/1",
+            f"/api/enrollments/search?client_id={client_ids[0]}",
+            "/api/enrollments/available-programs",
+            "/api/dashboard",
+        ]
+
+        # Alternate the two apps and keep each one's fastest pass to damp noise
+        results = {}
+        for _ in range(PASSES):
+            for label, app in (("off", plain), ("on", instrumented)):
+                samples = replay(app, urls, rounds)
+                if label not in results or statistics.median(samples) < statistics.median(results[label]):
+                    results[label] = samples
+
+        print(f"{scale} clients, {rounds * len(urls)} requests per pass, best of {PASSES}")
+        print(f"{'metrics':<8} {'mean ms':>9} {'median ms':>10} {'p95 ms':>8}")
+        for label, samples in results.items():
+            p95 = samples[int(len(samples) * 0.95)]
+            print(f"{label:<8} {statistics.mean(samples) * 1000:>9.3f} "
+                  f"{statistics.median(samples) * 1000:>10.3f} {p95 * 1000:>8.3f}")
+        off = statistics.median(results["off"])
+        on = statistics.median(results["on"])
+        print(f"median overhead: {(on - off) * 1e6:.1f} us/request ({(on / off - 1) * 100:+.1f}%)")
+
+        body = instrumented.test_client().get("/api/metrics").get_data(as_text=True)
+        assert 'http_request_duration_seconds_count{endpoint="client.get_clients",method="GET"}' in body
+        assert 'http_request_sql_statements_bucket{endpoint="programs.get_programs",method="GET",le="+Inf"}' in body
+        assert 'http_requests_total{endpoint="dashboard.get_dashboard_data",method="GET",status="200"}' in body
+        assert "client.get_clients" not in plain.test_client().get("/api/metrics").get_data(as_text=True)
+        print("OK: /api/metrics exposes per-endpoint series")
+    finally:
+        cleanup(plain)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
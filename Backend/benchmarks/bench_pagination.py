@@ -0,0 +1,82 @@
+# benchmarks/bench_pagination.py
+#
+# Compares OFFSET pagination (?page=) with keyset pagination (?cursor=) on
+# /api/clients/ at increasing page depths, and walks the cursor chain forward
+# and back to check it visits every client exactly once.
+#
+#   python -m benchmarks.bench_pagination [scale ...]
+
+import sys
+
+from app import db
+from app.models.client import Client
+from app.pagination import encode_cursor
+from app.services.dashboard_stats import reconcile
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALES = [200_000]
+PER_PAGE = 50
+DEPTHS = [0.0, 0.25, 0.5, 0.99]
+WALK_LIMIT = 20_000
+
+
+def check_walk(client, n_clients):
+    seen, pages, cursor = [], [], ""
+    while cursor is not None:
+        data = client.get(f"/api/clients/?cursor={cursor}&limit=100").get_json()
+        seen.extend(c["id"] for c in data["clients"])
+        pages.append(data)
+        cursor = data["next_cursor"]
+    assert len(seen) == len(set(seen)) == n_clients
+
+    # Walk back from the last page with prev cursors
+    back, cursor = list(pages[-1]["clients"]), pages[-1]["prev_cursor"]
+    while cursor is not None:
+        data = client.get(f"/api/clients/?cursor={cursor}&limit=100").get_json()
+        back = data["clients"] + back
+        cursor = data["prev_cursor"]
+    assert [c["id"] for c in back] == seen
+
+
+def run(scale):
+    app = make_app()
+    try:
+        populate(app, scale, n_programs=1, enrollments_per_client=0)
+        client = app.test_client()
+        with app.app_context():
+            reconcile()
+            ids = [row.id for row in db.session.query(Client.id).order_by(Client.id)]
+            if scale <= WALK_LIMIT:
+                check_walk(client, scale)
+
+            print(f"{scale} clients, {PER_PAGE} per page")
+            print(f"{'depth':>6} {'offset ms':>10} {'queries':>8} {'cursor ms':>10} {'queries':>8}")
+            for depth in DEPTHS:
+                offset = int((scale - PER_PAGE) * depth)
+                page = offset // PER_PAGE + 1
+                with StatementCounter(db.engine) as offset_q, timed() as offset_t:
+                    response = client.get(f"/api/clients/?page={page}&limit={PER_PAGE}")
+                assert response.status_code == 200
+
+                start = (page - 1) * PER_PAGE
+                cursor = encode_cursor(["n", ids[start - 1]]) if start else ""
+                with StatementCounter(db.engine) as cursor_q, timed() as cursor_t:
+                    response = client.get(f"/api/clients/?cursor={cursor}&limit={PER_PAGE}")
+                assert response.status_code == 200
+                assert [c["id"] for c in response.get_json()["clients"]] == ids[start:start + PER_PAGE]
+
+                print(f"{depth:>6.0%} {offset_t['seconds'] * 1000:>10.1f} {offset_q.count:>8} "
+                      f"{cursor_t['seconds'] * 1000:>10.1f} {cursor_q.count:>8}")
+    finally:
+        cleanup(app)
+
+
+def main(argv):
+    scales = [int(arg) for arg in argv] or DEFAULT_SCALES
+    for scale in scales:
+        run(scale)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
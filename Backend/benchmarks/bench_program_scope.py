@@ -0,0 +1,136 @@
+# benchmarks/bench_program_scope.py
+#
+# Default live-rows scope for programs with most of the table soft-deleted.
+# Loads programs (DELETED_SHARE of them soft-deleted), then for each program
+# read prints the SQLite plan of every statement the request issues against
+# the program table and the median latency, with the (is_deleted, status,
+# name) and (is_deleted, id) indexes and again after dropping them, and checks
+# that with the indexes no statement scans the whole table.
+#
+#   python -m benchmarks.bench_program_scope [programs]
+
+import random
+import statistics
+import sys
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+from app import db
+from app.models.program import Program, LIVE_PROGRAM_INDEX, LIVE_PROGRAM_ID_INDEX, VALID_STATUSES
+from app.services.dashboard_stats import reconcile
+from benchmarks.common import make_app, timed, cleanup
+
+DEFAULT_PROGRAMS = 200_000
+DELETED_SHARE = 0.9
+REQUESTS = 20
+CHUNK_SIZE = 5000
+
+CASES = [
+    ("list first page", "/api/programs/?limit=20"),
+    ("list page 50", "/api/programs/?limit=20&page=50"),
+    ("list ?status=Pending", "/api/programs/?status=Pending&limit=20"),
+    ("search ?q=", "/api/programs/search?q=Program 12345"),
+]
+
+
+def load_programs(app, n_programs):
+    rng = random.Random(7)
+    with app.app_context():
+        for start in range(0, n_programs, CHUNK_SIZE):
+            rows = []
+            for i in range(start, min(start + CHUNK_SIZE, n_programs)):
+                deleted = rng.random() < DELETED_SHARE
+                rows.append({
+                    "id": i + 1, "name": f"Program {i + 1}", "description": "",
+                    "status": rng.choice(VALID_STATUSES), "is_deleted": deleted,
+                    "deleted_at": datetime(2025, 1, 1) if deleted else None,
+                    "start_date": date(2024, 1, 1), "end_date": date(2026, 12, 31)
+                })
+            db.session.execute(db.insert(Program), rows)
+        db.session.commit()
+        reconcile()
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+        return db.session.query(db.func.count()).select_from(Program).filter(Program.live()).scalar()
+
+
+def program_statements(client, url):
+    """(sql, parameters) of each SELECT on the program table issued by one request"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM program" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        client.get(url)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    return captured
+
+
+def plans(statements):
+    with db.engine.connect() as conn:
+        return [
+            " / ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+            for sql, params in statements
+        ]
+
+
+def measure(client):
+    results = {}
+    for label, url in CASES:
+        statements = program_statements(client, url)
+        samples = []
+        for _ in range(REQUESTS):
+            with timed() as t:
+                response = client.get(url)
+            assert response.status_code == 200
+            samples.append(t["seconds"] * 1000)
+        results[label] = (plans(statements), statistics.median(samples))
+    return results
+
+
+def full_scan(plan):
+    # "SCAN program" without an index walks every row, deleted or not
+    return any(step.strip() == "SCAN program" for step in plan.split("/"))
+
+
+def main(argv):
+    n_programs = int(argv[0]) if argv else DEFAULT_PROGRAMS
+    app = make_app()
+    try:
+        live = load_programs(app, n_programs)
+        client = app.test_client()
+        with app.app_context():
+            listing = client.get("/api/programs/?limit=20").get_json()
+            assert listing["total"] == live, (listing["total"], live)
+            assert not any(p["is_deleted"] for p in listing["programs"])
+            assert client.get("/api/programs/?cursor=").get_json()["total"] == live
+            assert client.get("/api/programs/?include_deleted=true&limit=1").get_json()["total"] == n_programs
+
+            indexed = measure(client)
+            for index in (LIVE_PROGRAM_INDEX, LIVE_PROGRAM_ID_INDEX):
+                db.session.execute(db.text(f"DROP INDEX {index}"))
+            db.session.commit()
+            db.engine.dispose()  # pooled connections keep the old schema's prepared statements
+            unindexed = measure(client)
+
+        print(f"{n_programs} programs, {live} live ({1 - live / n_programs:.0%} soft-deleted)")
+        print(f"{'case':<22} {'indexed ms':>11} {'no index ms':>12}")
+        for label, _ in CASES:
+            (with_plans, with_ms), (without_plans, without_ms) = indexed[label], unindexed[label]
+            print(f"{label:<22} {with_ms:>11.2f} {without_ms:>12.2f}")
+            for with_plan, without_plan in zip(with_plans, without_plans):
+                print(f"    indexed:  {with_plan}\n    no index: {without_plan}")
+            assert not any(full_scan(plan) for plan in with_plans), with_plans
+        print("OK: with the indexes no live-scope statement scans the program table")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
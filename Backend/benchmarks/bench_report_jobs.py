@@ -0,0 +1,96 @@
+# benchmarks/bench_report_jobs.py
+#
+# Background report jobs vs the synchronous export. Times how long the
+# request thread is held by GET /api/reports/generate against POST
+# /api/reports (which only queues the job), follows the job's progress until
+# it finishes, checks that identical submissions share one job, and that the
+# downloaded result matches the synchronous CSV byte for byte.
+#
+#   python -m benchmarks.bench_report_jobs [scale]
+
+import gzip
+import statistics
+import sys
+import time
+
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALE = 100_000
+POLL_INTERVAL = 0.05
+PROBE_REQUESTS = 20
+
+
+def probe_latency(client):
+    samples = []
+    for _ in range(PROBE_REQUESTS):
+        with timed() as t:
+            client.get("/api/programs/")
+        samples.append(t["seconds"] * 1000)
+    return statistics.median(samples)
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app()
+    try:
+        populate(app, scale, n_programs=20, enrollments_per_client=2)
+        client = app.test_client()
+        idle_ms = probe_latency(client)
+
+        with timed() as sync_t:
+            sync_body = client.get("/api/reports/generate?gzip=true").data
+
+        params = {"program_id": [3, 1, 2], "start_date": "2024-01-01"}
+        with timed() as submit_t:
+            response = client.post("/api/reports", json=params)
+        job = response.get_json()
+        assert response.status_code == 202 and response.headers["X-Report-Job-Created"] == "true"
+
+        # Same report, parameters in another order: attaches to the running job
+        again = client.post("/api/reports", json={"program_id": [2, 3, 1], "start_date": "2024-01-01"})
+        assert again.get_json()["id"] == job["id"] and again.headers["X-Report-Job-Created"] == "false"
+
+        # Follow progress while probing request latency alongside the worker
+        busy_ms = probe_latency(client)
+        progress = []
+        started = time.perf_counter()
+        while job["state"] in ("queued", "running"):
+            time.sleep(POLL_INTERVAL)
+            job = client.get(f"/api/reports/{job['id']}").get_json()
+            if job["state"] == "running" and (not progress or progress[-1] != job["progress"]):
+                progress.append(job["progress"])
+        job_seconds = time.perf_counter() - started + submit_t["seconds"]
+        assert job["state"] == "done", job
+        assert job["rows_processed"] == job["rows_total"]
+
+        finished = client.post("/api/reports", json=params)
+        assert finished.status_code == 200 and finished.get_json()["id"] == job["id"]
+
+        download = client.get(job["download_url"]).data
+        full = client.post("/api/reports", json={})
+        while full.get_json()["state"] != "done":
+            time.sleep(POLL_INTERVAL)
+            full = client.get(full.get_json()["status_url"])
+        full_body = client.get(full.get_json()["download_url"]).data
+        assert gzip.decompress(full_body) == gzip.decompress(sync_body)
+
+        # A write changes the data version, so the same parameters start a new job
+        client.post("/api/clients/", json={"full_name": "Report Probe", "gender": "Female", "date_of_birth": "1990-01-01"})
+        assert client.post("/api/reports", json=params).get_json()["id"] != job["id"]
+
+        print(f"{scale * 2} enrollments, filtered job {job['rows_total']} rows, "
+              f"{len(download) / 2 ** 20:.1f} MiB gzip ({len(gzip.decompress(download)) / 2 ** 20:.1f} MiB CSV)")
+        print(f"{'sync /generate (request held)':<34} {sync_t['seconds'] * 1000:>9.1f} ms")
+        print(f"{'POST /api/reports (request held)':<34} {submit_t['seconds'] * 1000:>9.1f} ms")
+        print(f"{'job submit -> done':<34} {job_seconds * 1000:>9.1f} ms")
+        print(f"{'GET /api/programs/ idle':<34} {idle_ms:>9.1f} ms")
+        print(f"{'GET /api/programs/ during job':<34} {busy_ms:>9.1f} ms")
+        print(f"progress samples: {progress}")
+        print("OK: deduplicated submissions, download matches the synchronous export")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,311 @@
+# benchmarks/bench_routes.py
+#
+# Route benchmark harness. For each scale it boots the app on a fresh SQLite
+# file, bulk-loads clients/programs/enrollments, indexes them for search and
+# drives every route of the client, program, enrollment and dashboard
+# blueprints through the test client. Per case it records p50/p95/p99
+# latency, SQL statements per request and peak Python memory per request
+# (tracemalloc, measured on a few extra iterations kept out of the latency
+# numbers), prints a table and writes a JSON baseline. Passing --compare
+# with an earlier baseline reports cases whose p95 or query count regressed
+# and exits non-zero if any did.
+#
+#   python -m benchmarks.bench_routes [--scales 1000,10000] [--iterations 30]
+#                                     [--output bench_routes.json] [--compare old.json]
+
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+
+import sqlalchemy
+
+from app import db
+from app.models.enrollment import Enrollment
+from app.models.program import Program
+from app.services.client_search import rebuild_index
+from app.services.dashboard_stats import reconcile
+from app.services.enrollment_timeseries import rebuild as rebuild_timeseries
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALES = [1_000, 10_000]
+DEFAULT_ITERATIONS = 30
+MEMORY_ITERATIONS = 3
+N_PROGRAMS = 10
+ENROLLMENTS_PER_CLIENT = 2
+BLUEPRINTS = ("client", "programs", "enrollment", "dashboard")
+
+# A p95 regression must exceed both the relative tolerance and this many ms
+REGRESSION_FLOOR_MS = 1.0
+
+# `url` and `body` are strings or callables of (ctx, i); `after` runs outside
+# the measurement with (ctx, i, response) to record ids for later cases.
+# `iterations` caps cases that return every row.
+Case = namedtuple("Case", ["label", "endpoint", "method", "url", "body", "after", "iterations", "expect"])
+
+
+def case(label, endpoint, url, method="GET", body=None, after=None, iterations=None, expect=(200,)):
+    return Case(label, endpoint, method, url, body, after, iterations, expect)
+
+
+def remember_client(ctx, i, response):
+    ctx["created_clients"].append(response.get_json()["id"])
+
+
+def remember_program(ctx, i, response):
+    name = f"Bench Program {i}"
+    ctx["created_programs"].append(db.session.query(Program.id).filter(Program.name == name).scalar())
+
+
+def remember_enrollment(ctx, i, response):
+    ctx["created_enrollments"].append(db.session.query(Enrollment.id).filter(
+        Enrollment.client_id == ctx["client_ids"][i], Enrollment.program_id == ctx["created_programs"][0]
+    ).scalar())
+
+
+def bulk_ndjson(ctx, i):
+    return "\n".join(json.dumps({
+        "full_name": f"Bulk Client {i}-{n}", "gender": "Female", "date_of_birth": "1990-01-01",
+        "phone_number": f"0799{i:03d}{n:03d}",
+    }) for n in range(100))
+
+
+CASES = [
+    # Clients
+    case("clients page", "client.get_clients", "/api/clients/?page=5&limit=10"),
+    case("clients cursor", "client.get_clients", "/api/clients/?cursor=&limit=50"),
+    case("clients q", "client.get_clients", "/api/clients/?q=mwangi&limit=10"),
+    case("client detail", "client.get_client", lambda ctx, i: f"/api/clients/{ctx['client_ids'][i]}/"),
+    case("client profile", "client.get_client_profile",
+         lambda ctx, i: f"/api/clients/{ctx['client_ids'][i]}/profile"),
+    case("clients batch", "client.get_clients_batch",
+         lambda ctx, i: "/api/clients/batch?ids=" + ",".join(ctx["client_ids"][i:i + 100])),
+    case("clients batch post", "client.post_clients_batch", "/api/clients/batch", "POST",
+         body=lambda ctx, i: {"ids": ctx["client_ids"][i:i + 1000], "fields": ["full_name"]}),
+    case("client search", "client.search_clients", "/api/clients/search?q=otieno"),
+    case("client create", "client.create_client", "/api/clients/", "POST",
+         body=lambda ctx, i: {"full_name": f"Bench Client {i}", "gender": "Male",
+                              "date_of_birth": "1991-02-03", "phone_number": f"0711{i:06d}"},
+         after=remember_client, expect=(201,)),
+    case("client update", "client.update_client",
+         lambda ctx, i: f"/api/clients/{ctx['created_clients'][i]}/", "PUT",
+         body=lambda ctx, i: {"address": f"Street {i}, Nairobi"}),
+    case("client delete", "client.delete_client",
+         lambda ctx, i: f"/api/clients/{ctx['created_clients'][i]}/", "DELETE"),
+    case("clients bulk import", "client.bulk_import_clients", "/api/clients/bulk?format=ndjson", "POST",
+         body=bulk_ndjson, expect=(201,)),
+    case("client duplicates", "client.get_duplicate_clients", "/api/clients/duplicates?min_score=0.7"),
+    # Pairs from the tail of the loaded clients, away from the ids other cases use
+    case("client merge", "client.merge_clients",
+         lambda ctx, i: f"/api/clients/{ctx['client_ids'][-2 * i - 1]}/merge", "POST",
+         body=lambda ctx, i: {"duplicate_ids": [ctx["client_ids"][-2 * i - 2]]}),
+
+    # Programs
+    case("programs page", "programs.get_programs", "/api/programs/?page=1&limit=10"),
+    case("program detail", "programs.get_program_by_id", lambda ctx, i: f"/api/programs/{i % N_PROGRAMS + 1}"),
+    case("programs search", "programs.search_programs", "/api/programs/search?q=Program"),
+    case("program cache stats", "programs.get_program_cache_stats", "/api/programs/cache/stats"),
+    case("program create", "programs.create_program", "/api/programs/", "POST",
+         body=lambda ctx, i: {"name": f"Bench Program {i}", "start_date": "2025-01-01", "end_date": "2026-12-31"},
+         after=remember_program, expect=(201,)),
+
+    # Enrollments (created against the bench programs so pairs never collide)
+    case("enrollments all", "enrollment.get_all_enrollments", "/api/enrollments/", iterations=5),
+    case("enrollments ndjson", "enrollment.get_all_enrollments", "/api/enrollments/?format=ndjson&limit=1000"),
+    case("enrollment detail", "enrollment.get_enrollment", lambda ctx, i: f"/api/enrollments/{i + 1}/"),
+    case("enrollments search", "enrollment.search_enrollments",
+         lambda ctx, i: f"/api/enrollments/search?client_id={ctx['client_ids'][i]}"),
+    case("enrollment create", "enrollment.create_enrollment", "/api/enrollments/create", "POST",
+         body=lambda ctx, i: {"client_id": ctx["client_ids"][i], "program_id": ctx["created_programs"][0]},
+         after=remember_enrollment, expect=(201,)),
+    case("enrollment update", "enrollment.update_enrollment",
+         lambda ctx, i: f"/api/enrollments/{ctx['created_enrollments'][i]}/", "PUT",
+         body=lambda ctx, i: {"program_id": ctx["created_programs"][1]}),
+    case("enrollment delete", "enrollment.delete_enrollment",
+         lambda ctx, i: f"/api/enrollments/{ctx['created_enrollments'][i]}/", "DELETE"),
+    case("enrollments bulk", "enrollment.bulk_create_enrollments", "/api/enrollments/bulk", "POST",
+         body=lambda ctx, i: {"client_ids": ctx["client_ids"][i * 10:(i + 1) * 10],
+                              "program_ids": [ctx["created_programs"][2]]},
+         expect=(201,)),
+    case("eligible clients", "enrollment.get_eligible_clients", "/api/enrollments/eligible-clients?limit=100"),
+    case("eligible for program", "enrollment.get_eligible_clients",
+         "/api/enrollments/eligible-clients?program_id=1&limit=100"),
+    case("available programs", "enrollment.get_available_programs", "/api/enrollments/available-programs"),
+
+    # Programs written to last: the enrollment cases above use them
+    case("program update", "programs.update_program",
+         lambda ctx, i: f"/api/programs/{ctx['created_programs'][i]}", "PUT",
+         body=lambda ctx, i: {"description": f"Updated {i}"}),
+    case("program delete", "programs.delete_program",
+         lambda ctx, i: f"/api/programs/{ctx['created_programs'][i]}", "DELETE"),
+
+    # Dashboard
+    case("dashboard", "dashboard.get_dashboard_data", "/api/dashboard"),
+    case("timeseries by week", "dashboard.get_enrollment_timeseries",
+         "/api/dashboard/timeseries?interval=week&start=2024-01-01&end=2024-12-31"),
+    case("distribution chart (cached)", "dashboard.get_dashboard_chart", "/api/dashboard/charts/distribution.png"),
+    case("trend chart (cached)", "dashboard.get_dashboard_chart",
+         "/api/dashboard/charts/trend.svg?interval=week&start=2024-01-01&end=2024-12-31"),
+    case("chart cache stats", "dashboard.get_chart_cache_stats", "/api/dashboard/charts/stats"),
+]
+
+
+def check_coverage(app):
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.split(".")[0] in BLUEPRINTS
+    }
+    missing = endpoints - {c.endpoint for c in CASES}
+    assert not missing, f"routes without a benchmark case: {sorted(missing)}"
+
+
+def percentile(sorted_samples, pct):
+    index = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def send(client, c, ctx, i):
+    url = c.url(ctx, i) if callable(c.url) else c.url
+    body = c.body(ctx, i) if callable(c.body) else c.body
+    if isinstance(body, str):
+        response = client.open(url, method=c.method, data=body, content_type="application/x-ndjson")
+    else:
+        response = client.open(url, method=c.method, json=body)
+    response.get_data()  # drain streamed bodies inside the measurement
+    return response
+
+
+def run_case(app, client, c, ctx, iterations):
+    iterations = min(iterations, c.iterations or iterations)
+    if c.method == "GET":
+        send(client, c, ctx, 0)  # warm caches
+
+    latencies, queries, statuses = [], [], {}
+    peaks = []
+    for i in range(iterations + MEMORY_ITERATIONS):
+        traced = i >= iterations
+        if traced:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        with StatementCounter(db.engine) as counter, timed() as t:
+            response = send(client, c, ctx, i)
+        if traced:
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            tracemalloc.stop()
+        else:
+            latencies.append(t["seconds"] * 1000)
+            queries.append(counter.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if c.after and response.status_code in c.expect:
+            c.after(ctx, i, response)
+
+    latencies.sort()
+    return {
+        "endpoint": c.endpoint,
+        "method": c.method,
+        "iterations": iterations,
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries_mean": round(sum(queries) / len(queries), 2),
+        "queries_max": max(queries),
+        "peak_kib": round(max(peaks) / 1024, 1),
+    }
+
+
+def run_scale(scale, iterations):
+    app = make_app()
+    try:
+        check_coverage(app)
+        client_ids = populate(app, scale, N_PROGRAMS, ENROLLMENTS_PER_CLIENT)
+        with app.app_context():
+            rebuild_index()
+            rebuild_timeseries()
+            reconcile()
+            ctx = {"client_ids": client_ids, "created_clients": [], "created_programs": [],
+                   "created_enrollments": []}
+            client = app.test_client()
+            results = {}
+            for c in CASES:
+                results[c.label] = run_case(app, client, c, ctx, iterations)
+                db.session.remove()
+        return results
+    finally:
+        cleanup(app)
+
+
+def print_results(scale, results):
+    print(f"\n{scale} clients")
+    print(f"{'case':<22} {'method':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KiB':>9}  statuses")
+    for label, r in results.items():
+        statuses = ", ".join(f"{code}x{n}" for code, n in r["statuses"].items())
+        print(f"{label:<22} {r['method']:<7} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['queries_mean']:>8.1f} {r['peak_kib']:>9.1f}  {statuses}")
+
+
+def compare(baseline, current, tolerance):
+    """Return (scale, label, reason) for each case that regressed against the baseline"""
+    regressions = []
+    for scale, results in current["results"].items():
+        previous = baseline.get("results", {}).get(scale, {})
+        for label, r in results.items():
+            old = previous.get(label)
+            if old is None:
+                continue
+            if r["p95_ms"] > old["p95_ms"] * (1 + tolerance) and r["p95_ms"] - old["p95_ms"] > REGRESSION_FLOOR_MS:
+                regressions.append((scale, label, f"p95 {old['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms"))
+            if r["queries_max"] > old["queries_max"]:
+                regressions.append((scale, label, f"queries {old['queries_max']} -> {r['queries_max']}"))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark every API route at several data scales.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES))
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--output", default="bench_routes.json")
+    parser.add_argument("--compare", help="earlier JSON baseline to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 increase")
+    args = parser.parse_args(argv)
+    scales = [int(s) for s in args.scales.split(",")]
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "iterations": args.iterations,
+            "memory_iterations": MEMORY_ITERATIONS,
+        },
+        "results": {},
+    }
+    for scale in scales:
+        results = run_scale(scale, args.iterations)
+        report["results"][str(scale)] = results
+        print_results(scale, results)
+        unexpected = [label for label, r in results.items()
+                      if set(r["statuses"]) - {str(code) for code in next(c for c in CASES if c.label == label).expect}]
+        assert not unexpected, f"unexpected statuses at scale {scale}: {unexpected}"
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for scale, label, reason in regressions:
+            print(f"REGRESSION {scale} {label}: {reason}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+# benchmarks/bench_serialization.py
+#
+# Rows/s for 100k-row client and enrollment listings: the previous path (ORM
+# instances, hand-built dicts with isoformat, stdlib json with sorted keys)
+# versus the column projection + app JSON provider, with and without a
+# sparse ?fields= set.
+#
+#   python -m benchmarks.bench_serialization [rows]
+
+import json
+import sys
+
+from app import db
+from app.models.client import Client
+from app.models.enrollment import Enrollment
+from app.json_provider import orjson
+from app.serialization import CLIENT_PROJECTION, ENROLLMENT_PROJECTION
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_ROWS = 100_000
+
+
+def orm_clients():
+    return json.dumps([{
+        "id": c.id,
+        "full_name": c.full_name,
+        "gender": c.gender,
+        "date_of_birth": c.date_of_birth.isoformat() if c.date_of_birth else None,
+        "phone_number": c.phone_number,
+        "address": c.address
+    } for c in Client.query.all()], sort_keys=True, separators=(",", ":"))
+
+
+def orm_enrollments():
+    return json.dumps([{
+        'id': e.id,
+        'client_id': e.client_id,
+        'program_id': e.program_id,
+        'enrollment_date': e.enrollment_date.isoformat() if e.enrollment_date else None
+    } for e in Enrollment.query.all()], sort_keys=True, separators=(",", ":"))
+
+
+def projected(app, projection, fields=None):
+    names = projection.parse_fields(fields)
+    rows = db.session.execute(projection.select(names)).all()
+    return app.json.dumps(projection.serialize_rows(rows, names))
+
+
+def best_of(fn, repeats=3):
+    best = None
+    for _ in range(repeats):
+        db.session.expunge_all()
+        with timed() as t:
+            fn()
+        best = t["seconds"] if best is None else min(best, t["seconds"])
+    return best
+
+
+def main(argv):
+    n_rows = int(argv[0]) if argv else DEFAULT_ROWS
+    app = make_app()
+    try:
+        populate(app, n_rows, n_programs=10, enrollments_per_client=1)
+        client = app.test_client()
+        with app.app_context():
+            print(f"{n_rows} rows, orjson {'enabled' if orjson else 'not installed'}")
+            print(f"{'listing':<34} {'seconds':>8} {'rows/s':>10}")
+            cases = [
+                ("clients: ORM + dicts (before)", orm_clients),
+                ("clients: projection", lambda: projected(app, CLIENT_PROJECTION)),
+                ("clients: ?fields=full_name", lambda: projected(app, CLIENT_PROJECTION, "full_name")),
+                ("enrollments: ORM + dicts (before)", orm_enrollments),
+                ("enrollments: projection", lambda: projected(app, ENROLLMENT_PROJECTION)),
+                ("enrollments: ?fields=client_id", lambda: projected(app, ENROLLMENT_PROJECTION, "client_id")),
+                ("GET /api/enrollments/", lambda: client.get("/api/enrollments/")),
+            ]
+            for label, fn in cases:
+                seconds = best_of(fn)
+                print(f"{label:<34} {seconds:>8.3f} {n_rows / seconds:>10.0f}")
+
+            # Same payload either way (modulo key order)
+            assert json.loads(orm_enrollments()) == json.loads(projected(app, ENROLLMENT_PROJECTION))
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
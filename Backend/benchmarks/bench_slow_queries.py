@@ -0,0 +1,82 @@
+# benchmarks/bench_slow_queries.py
+#
+# Replays the read endpoints against a populated database with a low
+# slow-query threshold and prints the worst offenders reported by
+# /api/debug/slow-queries, plus the capture cost for statements under the
+# threshold. An unindexed ilike('%q%') scan is issued as a probe with the
+# threshold forced to 0, so it is captured (with its plan) at any scale.
+#
+#   python -m benchmarks.bench_slow_queries [scale] [threshold_ms]
+
+import statistics
+import sys
+
+from app import db
+from app.models.client import Client
+from app.services.dashboard_stats import reconcile
+from app.services.slow_queries import get_slow_query_log
+from benchmarks.common import make_app, populate, timed, cleanup
+
+DEFAULT_SCALE = 100_000
+DEFAULT_THRESHOLD_MS = 5.0
+ENDPOINTS = [
+    "/api/clients/?page=50",
+    "/api/clients/search?q=wanj",
+    "/api/programs/",
+    "/api/enrollments/search?program_id=3",
+    "/api/enrollments/eligible-clients?limit=1000",
+    "/api/dashboard",
+]
+
+
+def per_statement_us(app, n=2000):
+    with app.app_context():
+        samples = []
+        for _ in range(5):
+            with timed() as t:
+                for _ in range(n):
+                    db.session.execute(db.text("SELECT 1"))
+            samples.append(t["seconds"] / n * 1e6)
+        return statistics.median(samples)
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    threshold = float(argv[1]) if len(argv) > 1 else DEFAULT_THRESHOLD_MS
+
+    app = make_app(SLOW_QUERY_THRESHOLD_MS=threshold, SLOW_QUERY_EXPLAIN=True)
+    try:
+        populate(app, scale, n_programs=10, enrollments_per_client=2)
+        plain = make_app(app.bench_db_path, SLOW_QUERY_LOG_ENABLED=False)
+        client = app.test_client()
+        with app.app_context():
+            reconcile()
+            get_slow_query_log().clear()
+            for url in ENDPOINTS:
+                assert client.get(url).status_code == 200, url
+            slow_log = get_slow_query_log()
+            slow_log.threshold = 0
+            try:
+                Client.query.filter(Client.full_name.ilike("%wanj%")).count()
+            finally:
+                slow_log.threshold = threshold / 1000.0
+
+        report = client.get("/api/debug/slow-queries?sort=max&limit=8").get_json()
+        print(f"{scale} clients, threshold {threshold} ms, {report['captured']} captured")
+        print(f"{'max ms':>8} {'count':>6}  {'route':<40} statement")
+        for offender in report["offenders"]:
+            route = ", ".join(offender["routes"]) or "-"
+            sql = " ".join(offender["statement"].split())[:70]
+            print(f"{offender['max_ms']:>8.1f} {offender['count']:>6}  {route[:40]:<40} {sql}")
+        assert any("LIKE" in o["statement"].upper() and o["plan"] for o in report["offenders"]), \
+            "ilike probe should be captured with its plan"
+
+        on, off = per_statement_us(app), per_statement_us(plain)
+        print(f"fast statement: {off:.1f} us without the recorder, {on:.1f} us with it")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+# benchmarks/bench_timeseries.py
+#
+# /api/dashboard/timeseries (summing pre-aggregated day buckets) versus the
+# on-the-fly GROUP BY over the enrollment table it replaces, for day, week
+# and month series over a year. Then checks that the incrementally
+# maintained buckets match a full recomputation after create, update,
+# delete and bulk enrollment writes.
+#
+#   python -m benchmarks.bench_timeseries [scale]
+
+import sys
+from collections import Counter
+from datetime import date
+
+from app import db
+from app.models.enrollment import Enrollment
+from app.models.enrollment_rollup import EnrollmentDailyRollup
+from app.services import enrollment_timeseries
+from benchmarks.common import make_app, populate, StatementCounter, timed, cleanup
+
+DEFAULT_SCALE = 100_000
+N_PROGRAMS = 20
+START, END = date(2024, 1, 1), date(2024, 12, 31)
+
+
+def on_the_fly(interval):
+    rows = (
+        db.session.query(Enrollment.program_id, Enrollment.enrollment_date, db.func.count(Enrollment.id))
+        .filter(Enrollment.enrollment_date >= START, Enrollment.enrollment_date <= END)
+        .group_by(Enrollment.program_id, Enrollment.enrollment_date)
+    )
+    totals = Counter()
+    for program_id, day, count in rows:
+        totals[(program_id, enrollment_timeseries.bucket_start(day, interval).isoformat())] += count
+    return totals
+
+
+def from_response(body):
+    return Counter({
+        (s["programId"], bucket): count
+        for s in body["series"] for bucket, count in zip(body["buckets"], s["counts"]) if count
+    })
+
+
+def buckets_match_enrollments():
+    stored = Counter({
+        (row.program_id, row.day): row.count
+        for row in EnrollmentDailyRollup.query.filter(EnrollmentDailyRollup.count != 0)
+    })
+    actual = Counter({
+        (program_id, day): count for program_id, day, count in
+        db.session.query(Enrollment.program_id, Enrollment.enrollment_date, db.func.count(Enrollment.id))
+        .group_by(Enrollment.program_id, Enrollment.enrollment_date)
+    })
+    return stored == actual
+
+
+def main(argv):
+    scale = int(argv[0]) if argv else DEFAULT_SCALE
+    app = make_app()
+    try:
+        client_ids = populate(app, scale, N_PROGRAMS, enrollments_per_client=3)
+        client = app.test_client()
+        with app.app_context():
+            buckets = enrollment_timeseries.rebuild()
+            n_enrollments = db.session.query(db.func.count(Enrollment.id)).scalar()
+            print(f"{n_enrollments} enrollments, {buckets} program/day buckets")
+            print(f"{'interval':<8} {'rollup ms':>10} {'queries':>8} {'group-by ms':>12} {'speedup':>8}")
+            for interval in enrollment_timeseries.INTERVALS:
+                url = f"/api/dashboard/timeseries?interval={interval}&start={START}&end={END}"
+                client.get(url)  # warm up
+                with StatementCounter(db.engine) as q, timed() as rollup_t:
+                    response = client.get(url)
+                with timed() as scan_t:
+                    expected = on_the_fly(interval)
+                assert response.status_code == 200
+                assert from_response(response.get_json()) == expected
+                print(f"{interval:<8} {rollup_t['seconds'] * 1000:>10.1f} {q.count:>8} "
+                      f"{scan_t['seconds'] * 1000:>12.1f} {scan_t['seconds'] / rollup_t['seconds']:>7.1f}x")
+
+            # Incremental maintenance through the write routes
+            assert client.post("/api/enrollments/create", json={
+                "client_id": client_ids[0], "program_id": N_PROGRAMS + 1
+            }).status_code == 404
+            new_ids = client_ids[:5]
+            for i, client_id in enumerate(new_ids):
+                assert client.post("/api/enrollments/create", json={
+                    "client_id": client_id, "program_id": 1 + (i % N_PROGRAMS), "enrollment_date": "2024-06-15"
+                }).status_code in (201, 409)
+            assert client.post("/api/enrollments/create", json={
+                "client_id": client_ids[6], "program_id": N_PROGRAMS
+            }).status_code in (201, 409)  # server-side default date
+            moved = db.session.query(Enrollment.id).filter(Enrollment.client_id == client_ids[7]).first().id
+            assert client.put(f"/api/enrollments/{moved}/", json={"enrollment_date": "2024-02-29"}).status_code == 200
+            removed = db.session.query(Enrollment.id).filter(Enrollment.client_id == client_ids[8]).first().id
+            assert client.delete(f"/api/enrollments/{removed}/").status_code == 200
+            assert client.post("/api/enrollments/bulk", json={
+                "client_ids": client_ids[10:60], "program_ids": list(range(1, N_PROGRAMS + 1))
+            }).status_code == 201
+            db.session.expire_all()
+            assert buckets_match_enrollments(), "rollup drifted from the enrollment table"
+            print("OK: buckets match the enrollment table after create/update/delete/bulk writes")
+    finally:
+        cleanup(app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,135 @@
+# benchmarks/common.py
+#
+# Shared helpers for the benchmark scripts: boot the app against a throwaway
+# SQLite file, bulk-load synthetic rows and count the SQL statements a request
+# issues. Run the scripts from the Backend directory, e.g.
+#   python -m benchmarks.bench_eligible_clients
+
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.enrollment import Enrollment
+
+
+FIRST_NAMES = [
+    "Alice", "James", "Mary", "John", "Grace", "Peter", "Faith", "David", "Mercy", "Joseph",
+    "Ann", "Samuel", "Esther", "Daniel", "Joyce", "Brian", "Wanjiru", "Kevin", "Achieng", "Brenda",
+]
+LAST_NAMES = [
+    "Mwangi", "Otieno", "Kamau", "Wanjiku", "Ochieng", "Njoroge", "Kiprono", "Mutua", "Omondi", "Chebet",
+    "Kariuki", "Wambui", "Odhiambo", "Kiptoo", "Nyambura", "Mohamed", "Achieng", "Kimani", "Atieno", "Korir",
+]
+
+
+def make_app(db_path=None, **config):
+    """Create the app bound to a fresh SQLite database (plus any config overrides) and create the tables"""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="his-bench-")
+        os.close(fd)
+        os.remove(db_path)
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "TESTING": True,
+        "SLOW_QUERY_LOG_FILE": "",  # keep benchmark runs out of the instance folder
+        "REPORT_DIR": tempfile.mkdtemp(prefix="his-bench-reports-"),
+        **config
+    })
+    with app.app_context():
+        db.create_all()
+    app.bench_db_path = db_path
+    return app
+
+
+def populate(app, n_clients, n_programs, enrollments_per_client=1, seed=42, chunk_size=5000):
+    """Bulk-load clients, programs and enrollments with multi-row inserts"""
+    rng = random.Random(seed)
+    with app.app_context():
+        db.session.execute(db.insert(Program), [
+            {"id": i + 1, "name": f"Program {i + 1}", "status": "Active", "is_deleted": False,
+             "start_date": date(2024, 1, 1), "end_date": date(2026, 12, 31)}
+            for i in range(n_programs)
+        ])
+
+        client_ids = []
+        for start in range(0, n_clients, chunk_size):
+            rows = []
+            for i in range(start, min(start + chunk_size, n_clients)):
+                client_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                client_ids.append(client_id)
+                rows.append({
+                    "id": client_id,
+                    "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+                    "gender": rng.choice(["Male", "Female"]),
+                    "date_of_birth": date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 60)),
+                    "phone_number": f"07{rng.randrange(10 ** 8):08d}",
+                    "address": "Nairobi, Kenya",
+                })
+            db.session.execute(db.insert(Client), rows)
+
+        per_client = min(enrollments_per_client, n_programs)
+        enrollments = []
+        for client_id in client_ids:
+            for program_id in rng.sample(range(1, n_programs + 1), per_client):
+                enrollments.append({
+                    "client_id": client_id,
+                    "program_id": program_id,
+                    "enrollment_date": date(2024, 1, 1) + timedelta(days=rng.randrange(365)),
+                })
+            if len(enrollments) >= chunk_size:
+                db.session.execute(db.insert(Enrollment), enrollments)
+                enrollments = []
+        if enrollments:
+            db.session.execute(db.insert(Enrollment), enrollments)
+
+        db.session.commit()
+    return client_ids
+
+
+class StatementCounter:
+    """Counts (and keeps) statements sent to the database while attached to an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timed():
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result["seconds"] = time.perf_counter() - start
+
+
+def cleanup(app):
+    app.extensions["report_jobs"].shutdown()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    if os.path.exists(app.bench_db_path):
+        os.remove(app.bench_db_path)
+    shutil.rmtree(app.config["REPORT_DIR"], ignore_errors=True)
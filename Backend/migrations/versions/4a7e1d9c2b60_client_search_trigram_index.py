@@ -0,0 +1,67 @@
+"""Client search trigram index
+
+Revision ID: 4a7e1d9c2b60
+Revises: c92fa3c83bce
+Create Date: 2026-10-18 11:03:17.402851
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7e1d9c2b60'
+down_revision = 'c92fa3c83bce'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+# Frozen copy of the normalization in app/services/client_search.py at the
+# time of this revision, so the backfill does not depend on application code.
+def _grams(text):
+    if not text:
+        return set()
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    padded = " ".join(folded.lower().replace("$", "").split()) + "$$"
+    if padded == "$$":
+        return set()
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def upgrade():
+    grams = op.create_table('client_search_gram',
+    sa.Column('gram', sa.String(length=3), nullable=False),
+    sa.Column('client_id', sa.String(length=36), nullable=False),
+    sa.Column('field', sa.String(length=1), nullable=False),
+    sa.PrimaryKeyConstraint('gram', 'client_id', 'field')
+    )
+    op.create_index('ix_client_search_gram_client_id', 'client_search_gram', ['client_id'], unique=False)
+
+    # Backfill existing clients in keyset-ordered batches
+    bind = op.get_bind()
+    client = sa.table('client', sa.column('id'), sa.column('full_name'), sa.column('phone_number'))
+    last_id = None
+    while True:
+        query = sa.select(client.c.id, client.c.full_name, client.c.phone_number).order_by(client.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(client.c.id > last_id)
+        batch = bind.execute(query).fetchall()
+        if not batch:
+            break
+        rows = []
+        for client_id, full_name, phone_number in batch:
+            rows += [{'gram': g, 'client_id': client_id, 'field': 'n'} for g in _grams(full_name)]
+            rows += [{'gram': g, 'client_id': client_id, 'field': 'p'} for g in _grams(phone_number)]
+        if rows:
+            bind.execute(grams.insert(), rows)
+        last_id = batch[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_client_search_gram_client_id', table_name='client_search_gram')
+    op.drop_table('client_search_gram')
@@ -0,0 +1,77 @@
+"""Enrollment unique (client_id, program_id) and program_id index
+
+Revision ID: 7f3b5e21a9d4
+Revises: 4a7e1d9c2b60
+Create Date: 2026-10-18 13:26:51.730419
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3b5e21a9d4'
+down_revision = '4a7e1d9c2b60'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.env')
+
+REPORT_LIMIT = 50
+
+
+def upgrade():
+    bind = op.get_bind()
+    enrollment = sa.table('enrollment',
+        sa.column('id', sa.Integer),
+        sa.column('client_id', sa.String),
+        sa.column('program_id', sa.Integer),
+        sa.column('enrollment_date', sa.Date),
+    )
+
+    # Merge duplicate (client_id, program_id) rows: keep the oldest row,
+    # give it the earliest enrollment_date of the group, delete the rest
+    duplicates = bind.execute(
+        sa.select(
+            enrollment.c.client_id,
+            enrollment.c.program_id,
+            sa.func.min(enrollment.c.id),
+            sa.func.min(enrollment.c.enrollment_date),
+            sa.func.count(),
+        )
+        .group_by(enrollment.c.client_id, enrollment.c.program_id)
+        .having(sa.func.count() > 1)
+    ).fetchall()
+
+    removed = 0
+    for client_id, program_id, keep_id, first_date, count in duplicates:
+        if len(duplicates) <= REPORT_LIMIT:
+            logger.info('Merging %d enrollments of client %s in program %s into %s',
+                        count, client_id, program_id, keep_id)
+        bind.execute(
+            enrollment.update().where(enrollment.c.id == keep_id).values(enrollment_date=first_date)
+        )
+        bind.execute(
+            enrollment.delete().where(
+                enrollment.c.client_id == client_id,
+                enrollment.c.program_id == program_id,
+                enrollment.c.id != keep_id,
+            )
+        )
+        removed += count - 1
+
+    if duplicates:
+        logger.warning('Merged %d duplicate (client_id, program_id) groups, removed %d enrollment rows',
+                       len(duplicates), removed)
+        # Rows were deleted outside the ORM: force the dashboard counters to be recomputed
+        bind.execute(sa.text("DELETE FROM dashboard_rollup WHERE metric = '__reconciled__'"))
+
+    op.create_index('uq_enrollment_client_program', 'enrollment', ['client_id', 'program_id'], unique=True)
+    op.create_index('ix_enrollment_program_id', 'enrollment', ['program_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_enrollment_program_id', table_name='enrollment')
+    op.drop_index('uq_enrollment_client_program', table_name='enrollment')
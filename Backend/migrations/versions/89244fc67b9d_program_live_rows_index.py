@@ -0,0 +1,43 @@
+"""Program live-rows scope: NOT NULL is_deleted and (is_deleted, status, name) index
+
+Revision ID: 89244fc67b9d
+Revises: f5ec750798b4
+Create Date: 2026-10-18 21:14:05.318842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '89244fc67b9d'
+down_revision = 'f5ec750798b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows written before the flag had a value are live; the default scope
+    # compares is_deleted = false, which would otherwise skip them
+    op.execute("UPDATE program SET is_deleted = false WHERE is_deleted IS NULL")
+
+    with op.batch_alter_table('program', schema=None) as batch_op:
+        batch_op.alter_column('is_deleted',
+               existing_type=sa.Boolean(),
+               nullable=False,
+               server_default=sa.false())
+
+    op.create_index('ix_program_is_deleted_status_name', 'program', ['is_deleted', 'status', 'name'], unique=False)
+
+    # The programs counter now counts live programs only: force a recompute
+    op.execute("DELETE FROM dashboard_rollup WHERE metric = '__reconciled__'")
+
+
+def downgrade():
+    op.drop_index('ix_program_is_deleted_status_name', table_name='program')
+
+    with op.batch_alter_table('program', schema=None) as batch_op:
+        batch_op.alter_column('is_deleted',
+               existing_type=sa.Boolean(),
+               nullable=True,
+               server_default=None)
@@ -0,0 +1,80 @@
+"""Client normalized phone number column and index
+
+Revision ID: a1e32819d5e4
+Revises: 89244fc67b9d
+Create Date: 2026-10-18 23:02:41.576210
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e32819d5e4'
+down_revision = '89244fc67b9d'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+# Frozen copy of normalize_phone() in app/phone.py at the time of this
+# revision, so the backfill does not depend on application code.
+def _normalize_phone(value):
+    if not value:
+        return None
+    digits = re.sub(r"\D+", "", str(value))
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("254") and len(digits) == 12:
+        digits = digits[3:]
+    if len(digits) == 9:
+        digits = "0" + digits
+    return digits if len(digits) >= 7 else None
+
+
+def upgrade():
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_normalized', sa.String(length=15), nullable=True))
+
+    # Backfill existing clients in keyset-ordered batches
+    bind = op.get_bind()
+    client = sa.table('client', sa.column('id'), sa.column('phone_number'), sa.column('phone_normalized'))
+    update = (
+        client.update()
+        .where(client.c.id == sa.bindparam('client_id'))
+        .values(phone_normalized=sa.bindparam('normalized'))
+    )
+    last_id = None
+    while True:
+        query = (
+            sa.select(client.c.id, client.c.phone_number)
+            .where(client.c.phone_number.isnot(None))
+            .order_by(client.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(client.c.id > last_id)
+        batch = bind.execute(query).fetchall()
+        if not batch:
+            break
+        rows = []
+        for client_id, phone_number in batch:
+            normalized = _normalize_phone(phone_number)
+            if normalized is not None:
+                rows.append({'client_id': client_id, 'normalized': normalized})
+        if rows:
+            bind.execute(update, rows)
+        last_id = batch[-1][0]
+
+    # Built after the backfill so the rows are indexed once
+    op.create_index('ix_client_phone_normalized', 'client', ['phone_normalized'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_client_phone_normalized', table_name='client')
+
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.drop_column('phone_normalized')
@@ -0,0 +1,36 @@
+"""Table version counters for conditional GETs
+
+Revision ID: b33bd0bd285f
+Revises: 7f3b5e21a9d4
+Create Date: 2026-10-18 14:48:02.561937
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b33bd0bd285f'
+down_revision = '7f3b5e21a9d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_version = op.create_table('table_version',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(table_version, [
+        {'table_name': name, 'version': 1, 'updated_at': now}
+        for name in ('client', 'program', 'enrollment')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,31 @@
+"""Dashboard rollup counters
+
+Revision ID: c92fa3c83bce
+Revises: 5795a578fac2
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c92fa3c83bce'
+down_revision = '5795a578fac2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Counters are filled by the first reconciliation (`flask reconcile-dashboard`
+    # or the first /api/dashboard request)
+    op.create_table('dashboard_rollup',
+    sa.Column('metric', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('metric')
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_rollup')
@@ -0,0 +1,24 @@
+"""Program (is_deleted, id) index for the default listing order
+
+Revision ID: d3b8f61c4e27
+Revises: a1e32819d5e4
+Create Date: 2026-10-18 23:48:19.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b8f61c4e27'
+down_revision = 'a1e32819d5e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_program_is_deleted_id', 'program', ['is_deleted', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_program_is_deleted_id', table_name='program')
@@ -0,0 +1,38 @@
+"""Enrollment daily rollup for time-series charts
+
+Revision ID: f5ec750798b4
+Revises: b33bd0bd285f
+Create Date: 2026-10-18 19:02:27.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5ec750798b4'
+down_revision = 'b33bd0bd285f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('enrollment_daily_rollup',
+    sa.Column('program_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('program_id', 'day')
+    )
+    op.create_index('ix_enrollment_daily_rollup_day', 'enrollment_daily_rollup', ['day'], unique=False)
+
+    # Backfill from existing enrollments (same as `flask rebuild-enrollment-timeseries`)
+    op.execute(
+        "INSERT INTO enrollment_daily_rollup (program_id, day, count) "
+        "SELECT program_id, enrollment_date, COUNT(*) FROM enrollment "
+        "WHERE enrollment_date IS NOT NULL GROUP BY program_id, enrollment_date"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_enrollment_daily_rollup_day', table_name='enrollment_daily_rollup')
+    op.drop_table('enrollment_daily_rollup')
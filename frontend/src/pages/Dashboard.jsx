@@ -1,11 +1,7 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
 import { toast, ToastContainer } from "react-toastify";
-import { FaUsers, FaBookOpen, FaClipboardList, FaChartPie } from "react-icons/fa";
-import { Pie } from "react-chartjs-2";
-import { Chart as ChartJS, ArcElement, Tooltip, Legend } from "chart.js";
-
-ChartJS.register(ArcElement, Tooltip, Legend);
+import { FaUsers, FaBookOpen, FaClipboardList, FaChartPie, FaChartLine } from "react-icons/fa";
 
 const Dashboard = () => {
   const [stats, setStats] = useState({
@@ -43,35 +39,6 @@ const Dashboard = () => {
     }
   };
 
-  const pieChartData = {
-    labels: stats.enrollmentData.map((item) => item.programName),
-    datasets: [
-      {
-        data: stats.enrollmentData.map((item) => item.enrollmentCount),
-        backgroundColor: [
-          "#4e73df",
-          "#1cc88a",
-          "#36b9cc",
-          "#f6c23e",
-          "#e74a3b",
-          "#858796",
-          "#5a5c69",
-        ],
-        borderColor: "#fff",
-        borderWidth: 2,
-      },
-    ],
-  };
-
-  const pieChartOptions = {
-    plugins: {
-      legend: {
-        position: "bottom",
-      },
-    },
-    maintainAspectRatio: false,
-  };
-
   return (
     <div className="container my-4" active>
       <ToastContainer />
@@ -132,9 +99,12 @@ const Dashboard = () => {
               </h5>
 
               {stats.enrollmentData.length > 0 ? (
-                <div style={{ height: "400px" }}>
-                  <Pie data={pieChartData} options={pieChartOptions} />
-                </div>
+                <img
+                  src="/api/dashboard/charts/distribution.svg"
+                  alt="Enrollment distribution by program"
+                  className="img-fluid d-block mx-auto"
+                  style={{ maxHeight: "400px" }}
+                />
               ) : (
                 <div className="text-center text-muted py-5">
                   No enrollment data available.
@@ -142,6 +112,21 @@ const Dashboard = () => {
               )}
             </div>
           </div>
+
+          {/* Enrollment Trend Chart (last 90 days, rendered server-side) */}
+          <div className="card shadow-sm border-0 mt-4">
+            <div className="card-body">
+              <h5 className="card-title mb-4 d-flex align-items-center gap-2">
+                <FaChartLine /> Enrollment Trend
+              </h5>
+              <img
+                src="/api/dashboard/charts/trend.svg?interval=week"
+                alt="Weekly enrollments over the last 90 days"
+                className="img-fluid d-block mx-auto"
+                style={{ maxHeight: "400px" }}
+              />
+            </div>
+          </div>
         </>
       )}
     </div>
@@ -10,14 +10,29 @@ const AddEnrollment = () => {
   const [error, setError] = useState('');
   const [successMessage, setSuccessMessage] = useState('');
 
-  // Fetch eligible clients
+  // Fetch eligible clients, following the X-Next-Cursor header page by page
   useEffect(() => {
-    axios.get('http://localhost:5000/api/enrollments/eligible-clients')
-      .then(response => setClients(response.data))
+    let cancelled = false;
+
+    const fetchPage = (cursor) => {
+      const params = { limit: 1000 };
+      if (cursor) params.cursor = cursor;
+      return axios.get('http://localhost:5000/api/enrollments/eligible-clients', { params })
+        .then(response => {
+          if (cancelled) return;
+          setClients(previous => (cursor ? [...previous, ...response.data] : response.data));
+          const next = response.headers['x-next-cursor'];
+          if (next) return fetchPage(next);
+        });
+    };
+
+    fetchPage(null)
       .catch(error => {
         console.error('There was an error fetching clients:', error);
         setError('Failed to load eligible clients.');
       });
+
+    return () => { cancelled = true; };
   }, []);
 
   // Fetch available programs
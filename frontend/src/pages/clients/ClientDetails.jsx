@@ -26,12 +26,12 @@ const ClientDetails = () => {
 
   const fetchEnrollments = useCallback(async () => {
     try {
-      const response = await fetch(`http://localhost:5000/api/enrollments/client/${clientId}`);
+      const response = await fetch(`http://localhost:5000/api/clients/${clientId}/profile`);
       if (!response.ok) {
         throw new Error('Failed to fetch enrollments');
       }
       const data = await response.json();
-      setEnrollments(Array.isArray(data) ? data : []);
+      setEnrollments(Array.isArray(data.enrollments) ? data.enrollments : []);
     } catch (error) {
       console.error('Error fetching enrollments:', error);
       toast.error(error.message || 'Failed to load enrollments');